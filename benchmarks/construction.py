@@ -0,0 +1,64 @@
+"""
+Microbenchmark of the construction of RemoteModel and LocalModel instances,
+as done when parsing the responses of the remote API or loading rows from the database.
+
+Usage, from the root of the repository: python -m benchmarks.construction [number of instances]
+"""
+
+import sys
+import timeit
+
+import flask
+import sqlalchemy as sa
+from flask_sqlalchemy import SQLAlchemy
+
+from flask_scotch import FlaskScotch, LocalModel, LocalRelationship, RemoteModel, RemoteRelationship
+
+
+def main(count: int):
+    app = flask.Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db = SQLAlchemy(app)
+    FlaskScotch(app, "http://localhost", db)
+
+    class Warehouse(RemoteModel):
+        __remote_directory__ = "warehouses"
+
+        name: str
+        city: str
+        capacity: int
+
+        crates = LocalRelationship("Crate", "warehouse_id")
+        main_crate = LocalRelationship("Crate", "warehouse_id", use_list=False)
+
+    class Crate(LocalModel, db.Model):
+        __tablename__ = "crate"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        label = sa.Column(sa.String)
+        warehouse_id = sa.Column(sa.Integer)
+        origin_id = sa.Column(sa.Integer)
+
+        warehouse = RemoteRelationship(Warehouse)
+        origin = RemoteRelationship(Warehouse)
+
+    payloads = [
+        {"id": index, "name": f"Warehouse {index}", "city": "Paris", "capacity": index} for index in range(count)
+    ]
+
+    with app.app_context():
+        remote = min(timeit.repeat(lambda: [Warehouse.parse_obj(item) for item in payloads], number=1, repeat=5))
+        local = min(
+            timeit.repeat(
+                lambda: [Crate(id=index, label="crate", warehouse_id=index) for index in range(count)],
+                number=1,
+                repeat=5,
+            )
+        )
+
+    print(f"RemoteModel: {count} instances in {remote * 1000:.1f} ms ({remote / count * 1e6:.1f} µs per instance)")
+    print(f"LocalModel: {count} instances in {local * 1000:.1f} ms ({local / count * 1e6:.1f} µs per instance)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
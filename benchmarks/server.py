@@ -0,0 +1,181 @@
+"""
+Local stand-in of the remote API used by the benchmarks and the tests: an in-memory REST API served over real
+(keep-alive) HTTP connections, so that the cost of the connections and of the json parsing is measured,
+unlike with the mocks of `responses`.
+
+Each collection is a dict of json items by id, answering:
+    - GET /<collection>/ and GET /<collection>/<id>, with an ETag (and a 304 when it did not change)
+    - POST /<collection>/, PUT, PATCH and DELETE /<collection>/<id>
+
+Every request is answered after `latency` seconds. The GET responses are compressed with gzip when `compress`
+is set, and the request bodies compressed with gzip are decoded. The method and path of the requests are kept
+in `hits`, along with their headers and raw body in `received`.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, which would delay each response by the delayed ACK
+    # of the client (about 40ms) on a keep-alive connection
+    disable_nagle_algorithm = True
+    server: "StandInServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, etag: Optional[str] = None):
+        time.sleep(self.server.latency)
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if body and self.server.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        self._record(body)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return json.loads(body) if length else None
+
+    def _record(self, body: bytes):
+        with self.server.lock:
+            self.server.hits.append((self.command, self.path))
+            self.server.received.append((self.command, self.path, dict(self.headers), body))
+
+    def _route(self) -> tuple[str, Optional[int]]:
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        return parts[0], int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+
+    def do_GET(self):
+        self._record(b"")
+        name, model_id = self._route()
+        if model_id is None:
+            return self._send(200, *self.server.encoded_collection(name))
+        item = self.server.collections.get(name, {}).get(model_id)
+        if item is None:
+            return self._send(404, b'{"msg": "Not found"}')
+        body = json.dumps(item).encode()
+        return self._send(200, body, _etag(body))
+
+    def do_POST(self):
+        name, _ = self._route()
+        payload = self._read_body()
+        with self.server.lock:
+            items = self.server.collections.setdefault(name, {})
+            payload["id"] = payload.get("id") or max(items, default=0) + 1
+            items[payload["id"]] = payload
+            self.server.encoded.pop(name, None)
+        return self._send(200, b'{"msg": "Success"}')
+
+    def do_PUT(self):
+        name, model_id = self._route()
+        payload = self._read_body()
+        with self.server.lock:
+            self.server.collections.setdefault(name, {})[model_id] = payload
+            self.server.encoded.pop(name, None)
+        return self._send(200, b'{"msg": "Success"}')
+
+    def do_PATCH(self):
+        name, model_id = self._route()
+        payload = self._read_body()
+        with self.server.lock:
+            self.server.collections.setdefault(name, {}).setdefault(model_id, {"id": model_id}).update(payload)
+            self.server.encoded.pop(name, None)
+        return self._send(200, b'{"msg": "Success"}')
+
+    def do_DELETE(self):
+        name, model_id = self._route()
+        self._record(b"")
+        with self.server.lock:
+            self.server.collections.setdefault(name, {}).pop(model_id, None)
+            self.server.encoded.pop(name, None)
+        return self._send(200, b'{"msg": "Success"}')
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Exemple of use case
+
+    with StandInServer(latency=0.002, encode_once=True) as server:
+        server.fill("cars", 1000, payload_size=500)
+        requests.get(f"{server.url}/cars/1")
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, encode_once: bool = False):
+        """
+        :param latency: the time waited before answering each request, in seconds
+        :param encode_once: keep the encoded collections until they are written through the API (or `fill`),
+        rather than encoding them on each request. The collections must then not be modified in place
+        """
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.encode_once = encode_once
+        self.compress = False
+        self.collections: dict[str, dict[int, Any]] = {}
+        self.encoded: dict[str, tuple[bytes, str]] = {}
+        self.hits: list[tuple[str, str]] = []
+        self.received: list[tuple[str, str, dict[str, str], bytes]] = []
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def fill(self, name: str, count: int, payload_size: int = 100, **fields: Any):
+        """
+        Replaces the content of a collection with `count` generated items
+
+        :param name: the name of the collection
+        :param count: the number of items
+        :param payload_size: the approximate size of each item once encoded, in bytes
+        :param fields: additional fields of every item
+        """
+        with self.lock:
+            self.collections[name] = {
+                index: {"id": index, "name": f"Item {index}", "description": "x" * payload_size, **fields}
+                for index in range(1, count + 1)
+            }
+            self.encoded.pop(name, None)
+
+    def encoded_collection(self, name: str) -> tuple[bytes, str]:
+        """
+        :return: the json body of the collection, and its ETag
+        """
+        with self.lock:
+            encoded = self.encoded.get(name)
+            if encoded is None:
+                body = json.dumps(list(self.collections.get(name, {}).values())).encode()
+                encoded = (body, _etag(body))
+                if self.encode_once:
+                    self.encoded[name] = encoded
+            return encoded
+
+    def __enter__(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite of the hot paths of flask-scotch, run against a local stand-in of the remote API
+(see benchmarks/server.py), so that the cost of the connections and of the parsing is measured as well.
+
+For each benchmark, the best time of several runs gives the throughput (operations per second),
+and a separate run traced with tracemalloc gives the peak memory allocated.
+
+Usage, from the root of the repository:
+
+    python -m benchmarks.suite --latency 0.001 --payload-size 500 --save baseline.json
+    # ... later, on the release branch
+    python -m benchmarks.suite --latency 0.001 --payload-size 500 --compare baseline.json
+
+When comparing, the command exits with an error when the throughput of a benchmark dropped by more than
+`--tolerance` (or its peak memory grew by more than it), so that it can be used as a release check.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, NamedTuple, Optional
+
+import flask
+import sqlalchemy as sa
+from flask_sqlalchemy import SQLAlchemy
+
+from flask_scotch import (
+    FlaskScotch,
+    LocalModel,
+    LocalRelationship,
+    RemoteModel,
+    RemoteRelationship,
+    prefetch_local,
+    prefetch_remote,
+)
+
+from .server import StandInServer
+
+
+class Result(NamedTuple):
+    name: str
+    operations: int
+    seconds: float
+    peak_bytes: int
+
+    @property
+    def throughput(self) -> float:
+        return self.operations / self.seconds if self.seconds else float("inf")
+
+
+class Benchmark(NamedTuple):
+    name: str
+    operations: int
+    run: Callable[[], Any]
+    #: Called before each run, outside of the measure
+    setup: Optional[Callable[[], Any]] = None
+
+
+def measure(benchmark: Benchmark, repeat: int) -> Result:
+    timings = []
+    for _ in range(repeat):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        gc.collect()
+        started = time.perf_counter()
+        benchmark.run()
+        timings.append(time.perf_counter() - started)
+
+    if benchmark.setup is not None:
+        benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    benchmark.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result(benchmark.name, benchmark.operations, min(timings), peak)
+
+
+def build_benchmarks(db: SQLAlchemy, server: StandInServer, count: int, calls: int):
+    """
+    :param count: the number of entities of the collections, and of the local rows
+    :param calls: the number of requests sent by the benchmarks sending one request per entity
+    """
+
+    class Warehouse(RemoteModel):
+        __remote_directory__ = "warehouses"
+
+        name: str
+        description: str
+        city: str
+
+        crates = LocalRelationship("Crate", "warehouse_id")
+
+    class Crate(LocalModel, db.Model):
+        __tablename__ = "crate"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        label = sa.Column(sa.String)
+        warehouse_id = sa.Column(sa.Integer)
+
+        warehouse = RemoteRelationship(Warehouse)
+
+    db.create_all()
+    db.session.add_all(
+        [Crate(id=index, label="crate", warehouse_id=index % calls + 1) for index in range(1, count + 1)]
+    )
+    db.session.commit()
+
+    payloads = list(server.collections["warehouses"].values())
+    warehouses = [Warehouse.parse_obj(item) for item in payloads]
+    ids = list(range(1, calls + 1))
+    api = Warehouse.api
+
+    def _crates():
+        # Fresh rows, so that the remote objects are not already loaded
+        return [Crate(id=index, label="crate", warehouse_id=index % calls + 1) for index in range(1, count + 1)]
+
+    def _fresh_warehouses():
+        return [Warehouse.parse_obj(item) for item in payloads]
+
+    state: dict[str, Any] = {}
+
+    return [
+        Benchmark("url building", count, lambda: [api._build_url(str(index)) for index in range(count)]),
+        Benchmark("RemoteModel construction", count, lambda: [Warehouse.parse_obj(item) for item in payloads]),
+        Benchmark(
+            "LocalModel construction",
+            count,
+            lambda: [Crate(id=index, label="crate", warehouse_id=index) for index in range(count)],
+        ),
+        Benchmark("ApiAccessor.all", count, lambda: api.all()),
+        Benchmark("ApiAccessor.all, lite", count, lambda: api.all(lite=True)),
+        Benchmark("ApiAccessor.iter_all", count, lambda: sum(1 for _ in api.iter_all())),
+        Benchmark("ApiAccessor.get", calls, lambda: [api.get(model_id) for model_id in ids]),
+        Benchmark("ApiAccessor.get_many", calls, lambda: api.get_many(ids)),
+        Benchmark(
+            "ApiAccessor.create",
+            calls,
+            lambda: [api.create(Warehouse(id=None, name="New", description="", city="Paris")) for _ in ids],
+        ),
+        Benchmark("ApiAccessor.update", calls, lambda: [api.update(warehouse) for warehouse in warehouses[:calls]]),
+        Benchmark(
+            "RemoteRelationship access",
+            count,
+            lambda: [crate.warehouse for crate in state["crates"]],
+            setup=lambda: state.update(crates=_crates()),
+        ),
+        Benchmark(
+            "RemoteRelationship access, prefetched",
+            count,
+            lambda: [crate.warehouse for crate in prefetch_remote(state["crates"], "warehouse")],
+            setup=lambda: state.update(crates=_crates()),
+        ),
+        Benchmark(
+            "LocalRelationship access",
+            calls,
+            lambda: [warehouse.crates for warehouse in state["warehouses"][:calls]],
+            setup=lambda: state.update(warehouses=_fresh_warehouses()),
+        ),
+        Benchmark(
+            "LocalRelationship access, prefetched",
+            count,
+            lambda: [warehouse.crates for warehouse in prefetch_local(state["warehouses"], "crates")],
+            setup=lambda: state.update(warehouses=_fresh_warehouses()),
+        ),
+    ]
+
+
+def run(count: int, calls: int, latency: float, payload_size: int, repeat: int, json_backend: str) -> list[Result]:
+    app = flask.Flask(__name__)
+    app.config["SCOTCH_JSON_BACKEND"] = json_backend
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db = SQLAlchemy(app)
+
+    with StandInServer(latency, encode_once=True) as server:
+        server.fill("warehouses", count, payload_size, city="Paris")
+        FlaskScotch(app, server.url, db)
+        with app.app_context():
+            benchmarks = build_benchmarks(db, server, count, calls)
+            return [measure(benchmark, repeat) for benchmark in benchmarks]
+
+
+def compare(results: list[Result], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    :return: the regressions of the results compared to the baseline
+    """
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        if result.throughput < reference["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.throughput:,.0f} op/s instead of {reference['throughput']:,.0f} op/s"
+            )
+        if result.peak_bytes > reference["peak_bytes"] * (1 + tolerance):
+            peak, reference_peak = result.peak_bytes / 1024, reference["peak_bytes"] / 1024
+            regressions.append(f"{result.name}: {peak:,.0f} KiB instead of {reference_peak:,.0f} KiB")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="number of entities of the collections")
+    parser.add_argument("--calls", type=int, default=100, help="number of requests of the one-per-entity benchmarks")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of the stand-in API, in seconds")
+    parser.add_argument("--payload-size", type=int, default=100, help="approximate size of an entity, in bytes")
+    parser.add_argument("--json-backend", default="json", help="SCOTCH_JSON_BACKEND used by the benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of each benchmark")
+    parser.add_argument("--save", help="write the results to this json file")
+    parser.add_argument("--compare", help="compare the results to those saved in this json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="accepted variation when comparing")
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.count, min(args.calls, args.count), args.latency, args.payload_size, args.repeat, args.json_backend
+    )
+
+    print(f"{'benchmark':<40} {'operations':>10} {'time (ms)':>10} {'op/s':>12} {'peak (KiB)':>11}")
+    for result in results:
+        print(
+            f"{result.name:<40} {result.operations:>10} {result.seconds * 1000:>10.1f} "
+            f"{result.throughput:>12,.0f} {result.peak_bytes / 1024:>11,.0f}"
+        )
+
+    if args.save:
+        with open(args.save, "w") as output:
+            json.dump({result.name: dict(result._asdict(), throughput=result.throughput) for result in results}, output)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import Optional, Any, Iterable, Union
+
+from .CircuitBreaker import CircuitBreaker
+from .LiteRecord import lite_class
+from .RemoteModel import BaseAccessor, RemoteModel, prefetch_local, _MISSING
+from .SessionPool import httpx
+
+
+class AsyncApiAccessor(BaseAccessor):
+    """
+    Asynchronous equivalent of the ApiAccessor, for the async views of Flask or for Quart.
+    The requests are sent with the httpx client of the running event loop (see AsyncSessionPool), so that
+    the remote calls do not tie up a worker thread. The entities created, updated or deleted are written through to the
+    local mirror of the model (see ApiAccessor.mirror), with a (blocking) query of the local database.
+
+    Exemple of use case
+
+    async def show_cars():
+        first, second = await asyncio.gather(Car.aapi.get(1), Car.aapi.get(2))
+        cars = await Car.aapi.get_many([3, 4, 5])
+    """
+
+    _body_argument = "content"
+
+    def __init__(self, model: type[RemoteModel]):
+        super().__init__(model)
+        # The background refreshes of the stale cache entries, by url
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    async def _call(self, breaker: Optional[CircuitBreaker], verb: str, url: str, **kwargs):
+        """
+        Sends the request through the circuit breaker of the remote API, if any
+        """
+        if breaker is None:
+            return await self.scotch.async_session_pool.request(verb, url, **kwargs)
+
+        breaker.before_call()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.scotch.async_session_pool.request(verb, url, **kwargs)
+            return response
+        finally:
+            # Also recorded when the call is cancelled, so that a half-open circuit never waits for its probe forever
+            breaker.record(response is not None and response.status_code < 500, time.perf_counter() - started)
+
+    async def _send(self, verb: str, url: str, **kwargs):
+        breaker = self.circuit_breaker
+        limiter = self.rate_limiter
+        if limiter is None:
+            return await self._call(breaker, verb, url, **kwargs)
+
+        attempt = 0
+        while True:
+            await limiter.aacquire()
+            started = time.perf_counter()
+            try:
+                response = await self._call(breaker, verb, url, **kwargs)
+            except BaseException:
+                # Also when the call is cancelled or interrupted, otherwise its slot would never be given back
+                limiter.release(None)
+                raise
+            limiter.release(time.perf_counter() - started, response.status_code, response.headers.get("Retry-After"))
+            if not self._retries_throttled(response, attempt):
+                return response
+            attempt += 1
+
+    def _is_unavailable(self, error: Exception) -> bool:
+        return super()._is_unavailable(error) or (httpx is not None and isinstance(error, httpx.TransportError))
+
+    def _refresh_in_background(self, url: str, fetch):
+        """
+        Refreshes a stale cache entry in a task of the running loop, unless it is already being refreshed
+        """
+        running = self._refreshing.get(url)
+        if running is not None and not running.done() and running.get_loop() is asyncio.get_running_loop():
+            return
+
+        def _done(task: asyncio.Task):
+            if self._refreshing.get(url) is task:
+                del self._refreshing[url]
+            if not task.cancelled():
+                # Retrieved so that it is not reported: the stale entry is simply served until a refresh succeeds
+                task.exception()
+
+        task = asyncio.ensure_future(fetch())
+        self._refreshing[url] = task
+        task.add_done_callback(_done)
+
+    async def _request(self, verb: str, subdirectory="", url_params: Optional[dict[Any, Any]] = None, **kwargs):
+        """
+        :return: the decoded response
+        :raise httpx.HTTPStatusError: when the remote API answers with an error status (4xx, 5xx)
+        """
+        if verb not in ("get", "post", "put", "patch", "delete"):
+            raise TypeError(f"Unknown verb {verb}")
+
+        url = self._build_url(subdirectory, url_params)
+        cacheable = self._is_cacheable(verb, kwargs)
+        stale = None
+        if cacheable:
+            cached = self.scotch.cache.get(url, _MISSING)
+            if cached is not _MISSING:
+                self._record(verb, subdirectory, url, "hit")
+                return cached
+            stale = self.scotch.cache.stale(url)
+
+        async def _fetch():
+            started = time.perf_counter()
+            response = await self._send(verb, url, **self._conditional(kwargs, stale))
+            received = time.perf_counter()
+            if stale is not None and response.status_code == 304:
+                return self._revalidated(verb, subdirectory, url, stale, response, received - started)
+            # The body of an error is not decoded, the status of the response is raised once recorded
+            payload = self._decode(response) if response.is_success else None
+            self._record(
+                verb,
+                subdirectory,
+                url,
+                "miss" if cacheable else None,
+                response.status_code,
+                received - started,
+                self._body_size(kwargs),
+                self._wire_size(response),
+                time.perf_counter() - received,
+            )
+            response.raise_for_status()
+            if cacheable:
+                self._cache_response(url, subdirectory, payload, len(response.content), response.headers)
+            return payload
+
+        if stale is not None and self._serves_stale(stale):
+            self._refresh_in_background(url, _fetch)
+            self._record(verb, subdirectory, url, "stale")
+            return stale.value
+
+        try:
+            if self._is_coalescable(verb, kwargs):
+                return await self.scotch.single_flight.ado(url, _fetch)
+            return await _fetch()
+        except Exception as error:
+            if stale is None or not self._is_unavailable(error):
+                raise
+            self._record(verb, subdirectory, url, "stale")
+            return stale.value
+
+    async def all(self, prefetch: Iterable[str] = (), lite: bool = False, **kwargs):
+        items = await self._request("get", **kwargs)
+        if lite:
+            record = lite_class(self.model)
+            return prefetch_local([record(item) for item in items], *prefetch)
+        return prefetch_local([self._identify(self._parse(item)) for item in items], *prefetch)
+
+    async def get(self, model_id: int):
+        known = self._known(model_id)
+        if known is not None:
+            return known
+        entity = await self._request("get", str(model_id))
+        return self._identify(self._parse(entity))
+
+    async def get_many(
+        self, model_ids: Iterable[Any], max_workers: Optional[int] = None
+    ) -> list[Union[RemoteModel, Exception]]:
+        """
+        Fetches several entities concurrently, see ApiAccessor.get_many
+
+        :param model_ids: the ids of the entities to fetch, each distinct id is fetched only once
+        :param max_workers: the maximum number of requests in flight, SCOTCH_MAX_WORKERS by default
+        :return: the entities, in the same order as the ids. When an entity could not be fetched,
+        the exception raised is returned in its place
+        """
+        model_ids = list(model_ids)
+        semaphore = asyncio.Semaphore(max_workers or self.scotch.app.config["SCOTCH_MAX_WORKERS"])
+
+        async def _get(model_id):
+            async with semaphore:
+                return await self.get(model_id)
+
+        ids = list(dict.fromkeys(model_ids))
+        entities = await asyncio.gather(*(_get(model_id) for model_id in ids), return_exceptions=True)
+        found = dict(zip(ids, entities))
+        return [found[model_id] for model_id in model_ids]
+
+    async def update(self, entity: RemoteModel, partial: bool = False):
+        if partial:
+            if not entity.changed_fields:
+                return None
+            body = self._body(entity, entity.changed_fields)
+            res = await self._request("patch", str(entity.id), **self._payload(body))
+        else:
+            res = await self._request("put", str(entity.id), **self._payload(self._body(entity)))
+        entity.mark_clean()
+        self._invalidate(entity.id)
+        self._identify(entity, replace=True)
+        self.model.api._mirror_write(entity)
+        return res
+
+    async def delete(self, model_id: int):
+        res = await self._request("delete", str(model_id))
+        self._invalidate(model_id)
+        self._forget(model_id)
+        self.model.api._mirror_delete(model_id)
+        return res
+
+    async def create(self, entity: RemoteModel):
+        # Raises when the API rejects the entity, which keeps its modified fields
+        res = await self._request("post", **self._payload(self._body(entity)))
+        created = self._created(entity, res)
+        if isinstance(created, Exception):
+            raise created
+        self._invalidate()
+        entity.mark_clean()
+        self.model.api._mirror_write(entity)
+        return created
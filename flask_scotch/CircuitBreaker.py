@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+from typing import Any
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of sending a request to a remote API considered as down, see CircuitBreaker
+    """
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(name, retry_in)
+        self.name = name
+        self.retry_in = retry_in
+
+    def __str__(self):
+        return f"The remote API {self.name} is failing, no request is sent to it for {self.retry_in:.1f}s"
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a remote API (a host, or the directory of a model) that keeps failing,
+    so that the workers do not pile up waiting for it.
+
+    The outcomes of the calls of the last `window` seconds are kept: once at least `minimum_calls` calls were made,
+    and at least `failure_rate` of them failed (connection error, timeout, 5xx response, or a response received
+    after more than `slow_call` seconds), the circuit opens: the calls fail immediately with a CircuitOpenError.
+    After `reset_timeout` seconds, the circuit is half-open: a single probe call is let through,
+    and closes the circuit when it succeeds, or opens it again when it fails.
+
+    Exemple of use case
+
+    breaker = CircuitBreaker("api.com", failure_rate=0.5, slow_call=2.0)
+    breaker.before_call()  # raises CircuitOpenError when open
+    started = time.monotonic()
+    response = requests.get("https://api.com/cars/1")
+    breaker.record(response.status_code < 500, time.monotonic() - started)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call: float = 10.0,
+        minimum_calls: int = 10,
+        window: float = 30.0,
+        reset_timeout: float = 30.0,
+    ):
+        """
+        :param name: the name of the remote API, used in the error messages
+        :param failure_rate: the proportion of failed calls from which the circuit opens
+        :param slow_call: the duration (in seconds) from which a call is considered as failed
+        :param minimum_calls: the number of calls in the window needed before the circuit can open
+        :param window: the duration (in seconds) of the window of calls considered
+        :param reset_timeout: how long (in seconds) the circuit stays open before a probe call is let through
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.minimum_calls = minimum_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._calls: deque[tuple[float, bool]] = deque()
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, name: str, config: dict[str, Any]) -> "CircuitBreaker":
+        """
+        Creates the circuit breaker from the SCOTCH_CIRCUIT_* keys of the flask configuration
+
+        :param name: the name of the remote API
+        :param config: the flask app configuration
+        :return: CircuitBreaker
+        """
+        return cls(
+            name,
+            failure_rate=config["SCOTCH_CIRCUIT_FAILURE_RATE"],
+            slow_call=config["SCOTCH_CIRCUIT_SLOW_CALL"],
+            minimum_calls=config["SCOTCH_CIRCUIT_MIN_CALLS"],
+            window=config["SCOTCH_CIRCUIT_WINDOW"],
+            reset_timeout=config["SCOTCH_CIRCUIT_RESET_TIMEOUT"],
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def before_call(self):
+        """
+        To call before sending a request
+
+        :raise CircuitOpenError: when the circuit is open, or half-open with its probe call in progress
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(self.name, max(self._opened_at + self.reset_timeout - now, 0))
+
+    def record(self, success: bool, duration: float):
+        """
+        To call once the response is received, or the request failed
+
+        :param success: whether a (non 5xx) response was received
+        :param duration: how long the call took, in seconds
+        """
+        failed = not success or duration >= self.slow_call
+        with self._lock:
+            now = time.monotonic()
+            if self._current_state(now) == self.HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._state = self.CLOSED
+                    self._calls.clear()
+                    self._failures = 0
+                return
+
+            self._calls.append((now, failed))
+            self._failures += failed
+            while self._calls and self._calls[0][0] <= now - self.window:
+                self._failures -= self._calls.popleft()[1]
+            if len(self._calls) >= self.minimum_calls and self._failures >= self.failure_rate * len(self._calls):
+                self._open(now)
+
+    def _open(self, now: float):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probing = False
+        self._calls.clear()
+        self._failures = 0
+
+    def stats(self) -> dict[str, Any]:
+        """
+        :return: the state of the circuit, and the number of calls and of failures in the current window
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return {"state": state, "calls": len(self._calls), "failures": self._failures}
@@ -0,0 +1,76 @@
+from typing import Any, Optional, TYPE_CHECKING
+
+from flask import current_app, g, has_app_context
+
+if TYPE_CHECKING:
+    from .RemoteModel import RemoteModel
+
+G_ATTRIBUTE = "_scotch_identity_map"
+
+
+class IdentityMap:
+    """
+    Remote entities loaded during the current Flask request (or app context), by model and id,
+    so that the same remote entity is fetched once, and is represented by a single instance, however
+    many times (and through however many relationships) it is accessed.
+
+    It is stored in `flask.g`, and so discarded when the app context is torn down.
+
+    Exemple of use case
+
+    first = Storage.api.get(1)
+    item.storage  # No request sent when item.storage_id == 1
+    assert item.storage is first
+    """
+
+    def __init__(self):
+        self._entities: dict[tuple[type["RemoteModel"], Any], "RemoteModel"] = {}
+
+    @staticmethod
+    def current() -> Optional["IdentityMap"]:
+        """
+        :return: the identity map of the current app context, None outside of an app context
+        or when it is disabled with SCOTCH_IDENTITY_MAP
+        """
+        if not has_app_context() or not current_app.config.get("SCOTCH_IDENTITY_MAP", False):
+            return None
+        identity_map = g.get(G_ATTRIBUTE)
+        if identity_map is None:
+            identity_map = IdentityMap()
+            setattr(g, G_ATTRIBUTE, identity_map)
+        return identity_map
+
+    @staticmethod
+    def clear_current(exception: Optional[BaseException] = None):
+        """
+        Discards the identity map of the current app context, registered as a teardown function by the extension
+        """
+        identity_map = g.pop(G_ATTRIBUTE, None)
+        if identity_map is not None:
+            identity_map.clear()
+
+    def get(self, model: type["RemoteModel"], model_id: Any) -> Optional["RemoteModel"]:
+        return self._entities.get((model, model_id))
+
+    def add(self, entity: "RemoteModel", replace: bool = False) -> "RemoteModel":
+        """
+        :param entity: the loaded entity
+        :param replace: replace the instance already known for this id, instead of keeping it
+        :return: the instance representing the entity: the given one, or the one already known for its id
+        """
+        if entity.id is None:
+            return entity
+        key = (type(entity), entity.id)
+        if replace:
+            self._entities[key] = entity
+            return entity
+        return self._entities.setdefault(key, entity)
+
+    def discard(self, model: type["RemoteModel"], model_id: Any):
+        self._entities.pop((model, model_id), None)
+
+    def clear(self):
+        self._entities.clear()
+
+    def __len__(self):
+        return len(self._entities)
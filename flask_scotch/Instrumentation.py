@@ -0,0 +1,210 @@
+import contextvars
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple, Optional, TYPE_CHECKING
+
+from flask import current_app, g, has_request_context
+from flask.signals import Namespace
+
+if TYPE_CHECKING:
+    from .MetricsSink import MetricsSink
+
+scotch_signals = Namespace()
+
+#: Sent after each call to the remote API (or cache hit), with the RemoteCall as `call`
+remote_call = scotch_signals.signal("remote-call")
+
+#: Sent at the end of each Flask request that called the remote API, with the RequestSummary as `summary`
+request_summary = scotch_signals.signal("request-summary")
+
+G_ATTRIBUTE = "_scotch_request_summary"
+
+_relationship: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("scotch_relationship", default=None)
+
+# The summary of the request a worker thread calls the remote API for, see for_worker
+_summary: contextvars.ContextVar[Optional["RequestSummary"]] = contextvars.ContextVar("scotch_summary", default=None)
+
+
+class RemoteCall(NamedTuple):
+    """
+    A call to the remote API, or a response read from the cache instead
+    """
+
+    model: str
+    verb: str
+    #: The path of the call, the id of the entity being replaced by {id}: /cars/{id}
+    url_template: str
+    url: str
+    #: The status code of the response, None when it was read from the cache
+    status: Optional[int]
+    #: The time spent waiting for the response, in seconds
+    latency: float
+    request_bytes: int
+    response_bytes: int
+    #: The time spent decoding the json response, in seconds
+    parse_time: float
+    #: "hit", "miss", "revalidated" (304 Not Modified) or "stale" (expired response served while the remote API
+    #: is refreshed in the background, or unavailable) when the response can be cached, None otherwise
+    cache: Optional[str]
+    #: The RemoteRelationship ("Item.storage") that made the call, if any
+    relationship: Optional[str] = None
+
+
+class RequestSummary:
+    """
+    The calls made to the remote API during a single Flask request, also by the worker threads of the request
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.remote_time = 0.0
+        self.templates: Counter[tuple[str, str]] = Counter()
+        self.relationships: Counter[str] = Counter()
+
+    def add(self, call: RemoteCall):
+        with self._lock:
+            if call.cache in ("hit", "stale"):
+                self.cache_hits += 1
+                return
+            self.calls += 1
+            self.remote_time += call.latency + call.parse_time
+            self.templates[(call.verb, call.url_template)] += 1
+            if call.relationship is not None:
+                self.relationships[call.relationship] += 1
+
+    def n_plus_one(self, threshold: int) -> list[str]:
+        """
+        :param threshold: the number of calls from which the same call is reported
+        :return: the warnings about the relationships (or else the urls) called once per entity
+        """
+        warnings = [
+            f"{name} loaded {count} times, use prefetch_remote"
+            for name, count in self.relationships.items()
+            if count >= threshold
+        ]
+        if not warnings:
+            warnings = [
+                f"{verb.upper()} {template} called {count} times"
+                for (verb, template), count in self.templates.items()
+                if count >= threshold and "{id}" in template
+            ]
+        return warnings
+
+    def server_timing(self) -> str:
+        return f'scotch;desc="{self.calls} remote calls";dur={self.remote_time * 1000:.1f}'
+
+
+class Instrumentation:
+    """
+    Collects the calls made to the remote API by the accessors:
+        - sent to the registered metrics sinks (see MetricsSink)
+        - sent with the `remote_call` blinker signal
+        - summarized for each Flask request, see RequestSummary
+
+    Exemple of use case
+
+    scotch.instrumentation.add_sink(StatsdSink("localhost", 8125))
+
+    @remote_call.connect
+    def log_call(sender, call):
+        print(call.url, call.latency)
+    """
+
+    def __init__(self):
+        self.sinks: list["MetricsSink"] = []
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: "MetricsSink"):
+        with self._lock:
+            self.sinks = [*self.sinks, sink]
+
+    def remove_sink(self, sink: "MetricsSink"):
+        with self._lock:
+            self.sinks = [registered for registered in self.sinks if registered is not sink]
+
+    def record(self, sender: Any, call: RemoteCall):
+        for sink in self.sinks:
+            sink.record(call)
+        remote_call.send(sender, call=call)
+        summary = self._request_summary()
+        if summary is not None:
+            summary.add(call)
+
+    @staticmethod
+    def _request_summary() -> Optional[RequestSummary]:
+        """
+        :return: the summary of the current Flask request (or of the request of the worker thread), created
+        when missing, None outside of a request
+        """
+        summary = _summary.get()
+        if summary is not None or not has_request_context():
+            return summary
+        summary = g.get(G_ATTRIBUTE)
+        if summary is None:
+            summary = RequestSummary()
+            setattr(g, G_ATTRIBUTE, summary)
+        return summary
+
+    @staticmethod
+    def current_summary() -> Optional[RequestSummary]:
+        """
+        :return: the summary of the calls made during the current Flask request, None when none was made
+        """
+        return g.get(G_ATTRIBUTE) if has_request_context() else None
+
+    @staticmethod
+    def after_request(response):
+        """
+        Reports the summary of the calls made during the request, registered as an `after_request`
+        function by the extension: logs the N+1 warnings, sends the `request_summary` signal and
+        sets the Server-Timing header of the response when SCOTCH_SERVER_TIMING is enabled
+        """
+        summary = g.pop(G_ATTRIBUTE, None)
+        if summary is None:
+            return response
+        for warning in summary.n_plus_one(current_app.config["SCOTCH_N_PLUS_ONE_THRESHOLD"]):
+            current_app.logger.warning("Possible N+1 remote calls: %s", warning)
+        request_summary.send(current_app._get_current_object(), summary=summary)  # type: ignore
+        if current_app.config["SCOTCH_SERVER_TIMING"]:
+            response.headers.add("Server-Timing", summary.server_timing())
+        return response
+
+
+def current_relationship() -> Optional[str]:
+    return _relationship.get()
+
+
+def for_worker(function: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wraps a function called by a worker thread, which has neither the request context nor the context variables
+    of the calling thread, so that its calls are summarized with those of the current request and attributed
+    to the current relationship. To call from the calling thread
+    """
+    summary = Instrumentation._request_summary()
+    relationship = _relationship.get()
+
+    def _run(*args, **kwargs):
+        summary_token = _summary.set(summary)
+        relationship_token = _relationship.set(relationship)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _relationship.reset(relationship_token)
+            _summary.reset(summary_token)
+
+    return _run
+
+
+@contextmanager
+def loading_relationship(name: str) -> Iterator[None]:
+    """
+    Attributes the calls made within the block to the given relationship
+    """
+    token = _relationship.set(name)
+    try:
+        yield
+    finally:
+        _relationship.reset(token)
@@ -0,0 +1,114 @@
+from typing import Any, Callable, ClassVar, Optional, TYPE_CHECKING
+
+from .LocalRelationship import LocalRelationship
+
+if TYPE_CHECKING:
+    from .RemoteModel import RemoteModel
+
+
+class LiteRecord:
+    """
+    Compact, read-only representation of a remote entity, returned by `all(lite=True)` and `iter_all(lite=True)`.
+
+    The class of the records of a model is generated from its fields (see lite_class), and stores their values
+    in `__slots__`: a record has no `__dict__`, no set of modified fields and no pydantic validation, so that
+    it costs a fraction of the memory and of the time of the model. Only the declared fields are kept,
+    with their values as sent by the remote API (like with `__trust_responses__`).
+
+    The fields are read as attributes, and the LocalRelationship of the model are resolved when accessed,
+    or prefetched with prefetch_local.
+
+    Exemple of use case
+
+    for car in Car.api.iter_all(lite=True):
+        print(car.name, car.tires)
+
+    car.to_model().save()  # a full entity is needed to modify it
+    """
+
+    __slots__ = ("_proxies",)
+
+    __model__: ClassVar[type["RemoteModel"]]
+    #: The name of each field, the key of its value in the json, and its default value (or factory)
+    __lite_fields__: ClassVar[tuple[tuple[str, str, Any, Optional[Callable[[], Any]]], ...]] = ()
+
+    def __init__(self, item: dict[str, Any]):
+        """
+        :param item: the json of the entity, as sent by the remote API
+        """
+        setter = object.__setattr__
+        for name, key, default, factory in self.__lite_fields__:
+            if factory is None:
+                setter(self, name, item.get(key, default))
+            else:
+                setter(self, name, item[key] if key in item else factory())
+        setter(self, "_proxies", None)
+
+    @classmethod
+    def local_relationship(cls, key: str) -> LocalRelationship:
+        return cls.__model__.local_relationship(key)
+
+    def set_local(self, key: str, value: Any):
+        """
+        Sets the loaded value of a LocalRelationship, so that it is not queried when accessed, see RemoteModel
+
+        :param key: the name of the relationship
+        :param value: the local object(s)
+        """
+        if self._proxies is None:
+            object.__setattr__(self, "_proxies", {})
+        self._proxies[key] = value
+
+    def __getattr__(self, item):
+        relationship = self.__model__.__local_relationships__.get(item)
+        if relationship is None:
+            raise AttributeError(f"{type(self).__name__} object has no attribute {item}")
+        if self._proxies is None or item not in self._proxies:
+            self.set_local(item, relationship.get_query(self)())
+        return self._proxies[item]
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} records are read-only, use to_model to modify the entity")
+
+    def dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name, _, _, _ in self.__lite_fields__}
+
+    def to_model(self) -> "RemoteModel":
+        """
+        :return: the full (validated) entity
+        """
+        return self.__model__.parse_obj(self.dict())
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.dict() == other.dict()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={value!r}" for name, value in self.dict().items())
+        return f"{type(self).__name__}({values})"
+
+
+def lite_class(model: type["RemoteModel"]) -> type[LiteRecord]:
+    """
+    Generates the LiteRecord class of a model, once: a slot per field of the model.
+    The class is kept on the model itself, so that it does not keep the model alive
+
+    :param model: the RemoteModel
+    :return: a subclass of LiteRecord
+    """
+    record = model.__dict__.get("_lite_class")
+    if record is not None:
+        return record
+    fields = tuple(
+        (name, field.alias, None if field.default_factory else field.default, field.default_factory)
+        for name, field in model.__fields__.items()
+    )
+    namespace = {
+        "__slots__": tuple(name for name, _, _, _ in fields),
+        "__model__": model,
+        "__lite_fields__": fields,
+        "__qualname__": f"{model.__qualname__}Lite",
+        "__module__": model.__module__,
+    }
+    record = type(f"{model.__name__}Lite", (LiteRecord,), namespace)
+    model._lite_class = record
+    return record
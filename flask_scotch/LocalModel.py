@@ -1,32 +1,71 @@
-from functools import lru_cache
+from typing import Any, ClassVar, Iterable
 
+from .ModelRegistry import ModelRegistry
 from .RemoteRelationship import RemoteRelationship
 
 
 class LocalModel:
     """
     Must be inherited by the SqlAlchemy models.
-    When initialized, it will search for all the RemoteModel instance
-    and configure them to fetch the wanted data from the api when the attribute
+    When the class is created, it searches for all the RemoteRelationship declared on the model
+    (or on one of its mixins) and replaces them with properties fetching the wanted data from the api when the attribute
     is accessed
 
     It does not expect any input data
     """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._configure_foreign_models()
+    __remote_relationships__: ClassVar[dict[str, RemoteRelationship]] = {}
+    __registry__: ClassVar[ModelRegistry] = ModelRegistry("LocalModel")
 
-    def _configure_foreign_models(self):
-        attributes = [key for key in dir(self) if not key.startswith("__")]
-        for key in attributes:
-            value = getattr(self, key)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.__registry__.register(cls)
+        relationships = dict(cls.__remote_relationships__)
+        # The attributes of the whole hierarchy, so that the relationships declared on a mixin are found too,
+        # each one as resolved on the class (the first class of the mro declaring it)
+        attributes: dict[str, Any] = {}
+        for base in cls.__mro__:
+            for key, value in vars(base).items():
+                attributes.setdefault(key, value)
+        for key, value in attributes.items():
             if isinstance(value, RemoteRelationship):
-                self._setup_proxy(key, value)
-
-    def _setup_proxy(self, key: str, value: RemoteRelationship):
-        setattr(
-            self.__class__,
-            key,
-            property(lru_cache(lambda this: value.retrieve_object(getattr(this, value.key_attribute())))),
-        )
+                relationships[key] = value
+                setattr(cls, key, property(value.load))
+        cls.__remote_relationships__ = relationships
+
+    @classmethod
+    def remote_relationship(cls, key: str) -> RemoteRelationship:
+        """
+        Retrieves the RemoteRelationship declared with the given name
+
+        :param key: the name of the attribute
+        :return: RemoteRelationship
+        """
+        if key not in cls.__remote_relationships__:
+            raise ValueError(f"{cls.__name__}.{key} is not a RemoteRelationship")
+        return cls.__remote_relationships__[key]
+
+
+def prefetch_remote(items: Iterable[Any], *keys: str) -> list[Any]:
+    """
+    Loads the remote objects of the given relationships for all the items at once:
+    the distinct ids are fetched with a single bulk request when the remote model declares a
+    `__bulk_filter__`, or with concurrent requests otherwise, rather than one request per item.
+
+    Exemple of use case
+
+    items = prefetch_remote(Item.query.all(), "storage")
+
+    for item in items:
+        print(item.storage)  # No more request sent
+
+    :param items: the LocalModel instances
+    :param keys: the name of the RemoteRelationship attributes to load
+    :return: the items, as a list
+    """
+    items = list(items)
+    if not items:
+        return items
+    for key in keys:
+        type(items[0]).remote_relationship(key).prefetch(items)
+    return items
@@ -1,5 +1,7 @@
-from functools import lru_cache
-from typing import Any, Union, Optional
+from collections import defaultdict
+from typing import Any, Union, Optional, Iterable
+
+from flask import current_app
 
 from flask_scotch.utils import local_model_from_name
 
@@ -57,14 +59,19 @@ class LocalRelationship:
         self.local_model = local_model
         self.database_field_name = database_field_name
         self.use_list = use_list
+        self.name: Optional[str] = None
+        self._resolved_class: Optional[type[Any]] = None
 
     def __set_name__(self, owner, name):
+        self.name = name
         if self.database_field_name is None:
             self.database_field_name = f"{owner.__name__}_id"
 
-    @lru_cache
     def _local_class(self):
-        return local_model_from_name(self.local_model)
+        # Resolved on first use, so that the model can be declared after the relationship
+        if self._resolved_class is None:
+            self._resolved_class = local_model_from_name(self.local_model)
+        return self._resolved_class
 
     def get_query(self, remote_instance: Any):
         def _callback():
@@ -77,3 +84,32 @@ class LocalRelationship:
             return query.all() if self.use_list else query.first()
 
         return _callback
+
+    def prefetch(self, remote_instances: Iterable[Any]):
+        """
+        Loads the local objects of all the given remote instances at once, with a single
+        `WHERE <database_field_name> IN (...)` query (split in chunks of SCOTCH_SQL_CHUNK_SIZE ids to respect
+        the limit of parameters of the database) instead of one query per remote instance
+
+        :param remote_instances: the RemoteModel instances that owns the relationship
+        """
+        if self.database_field_name is None:
+            raise ValueError("Database field name not set.")
+        if self.name is None:
+            raise ValueError("LocalRelationship is not declared on a RemoteModel.")
+
+        remote_instances = list(remote_instances)
+        ids = list(dict.fromkeys(instance.id for instance in remote_instances if instance.id is not None))
+        local_class = self._local_class()
+        column = getattr(local_class, self.database_field_name)
+        chunk_size = current_app.config["SCOTCH_SQL_CHUNK_SIZE"]
+
+        rows_by_id = defaultdict(list)
+        for start in range(0, len(ids), chunk_size):
+            end = start + chunk_size
+            for row in local_class.query.filter(column.in_(ids[start:end])).all():
+                rows_by_id[getattr(row, self.database_field_name)].append(row)
+
+        for instance in remote_instances:
+            rows = rows_by_id.get(instance.id, [])
+            instance.set_local(self.name, rows if self.use_list else next(iter(rows), None))
@@ -0,0 +1,126 @@
+import abc
+import socket
+from typing import Any, Optional
+
+from .Instrumentation import RemoteCall
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None  # type: ignore
+
+
+class MetricsSink(abc.ABC):
+    """
+    Destination of the calls made to the remote API, registered with `scotch.instrumentation.add_sink`.
+    Sinks are called from the thread making the call, and so must be fast and must not raise
+    """
+
+    @abc.abstractmethod
+    def record(self, call: RemoteCall):
+        """
+        :param call: the call made to the remote API, or the response read from the cache
+        """
+
+    @staticmethod
+    def status_class(call: RemoteCall) -> str:
+        return "cache" if call.status is None else f"{call.status // 100}xx"
+
+
+class StatsdSink(MetricsSink):
+    """
+    Sends the metrics to a StatsD daemon (or any agent speaking its protocol) over UDP:
+        - scotch.<model>.<verb>.calls: counter of the calls, by class of status (scotch.cars.get.calls.2xx)
+        - scotch.<model>.<verb>.latency, scotch.<model>.<verb>.parse: timers, in milliseconds
+        - scotch.<model>.<verb>.request_bytes, scotch.<model>.<verb>.response_bytes: counters
+        - scotch.<model>.cache.hit, scotch.<model>.cache.miss: counters
+
+    Exemple of use case
+
+    scotch.instrumentation.add_sink(StatsdSink("localhost", 8125, prefix="shop.scotch"))
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 8125, prefix: str = "scotch"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def record(self, call: RemoteCall):
+        name = f"{self.prefix}.{call.model.lower()}"
+        lines = []
+        if call.cache is not None:
+            lines.append(f"{name}.cache.{call.cache}:1|c")
+        if call.status is not None:
+            lines += [
+                f"{name}.{call.verb}.calls.{self.status_class(call)}:1|c",
+                f"{name}.{call.verb}.latency:{call.latency * 1000:.3f}|ms",
+                f"{name}.{call.verb}.parse:{call.parse_time * 1000:.3f}|ms",
+                f"{name}.{call.verb}.request_bytes:{call.request_bytes}|c",
+                f"{name}.{call.verb}.response_bytes:{call.response_bytes}|c",
+            ]
+        try:
+            self._socket.sendto("\n".join(lines).encode(), self.address)
+        except OSError:
+            # Metrics are best effort, a missing or overloaded daemon must not fail the call
+            pass
+
+    def close(self):
+        self._socket.close()
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Exposes the metrics with prometheus_client:
+        - scotch_remote_call_seconds: histogram of the latency, by model, verb, url template and class of status
+        - scotch_remote_parse_seconds: histogram of the time spent decoding the responses, by model
+        - scotch_remote_bytes_total: counter of the bytes sent and received, by model and direction
+        - scotch_cache_total: counter of the cache hits and misses, by model
+
+    Exemple of use case
+
+    scotch.instrumentation.add_sink(PrometheusSink())
+    """
+
+    def __init__(self, registry: Optional[Any] = None, namespace: str = "scotch"):
+        """
+        :param registry: the prometheus registry to register the metrics in, the default one when None
+        :param namespace: the prefix of the name of the metrics
+        """
+        if prometheus_client is None:
+            raise ImportError("PrometheusSink requires prometheus_client to be installed")
+        registry = prometheus_client.REGISTRY if registry is None else registry
+        self.latency = prometheus_client.Histogram(
+            "remote_call_seconds",
+            "Latency of the calls to the remote API",
+            ["model", "verb", "url_template", "status"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self.parse = prometheus_client.Histogram(
+            "remote_parse_seconds",
+            "Time spent decoding the responses of the remote API",
+            ["model"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self.bytes = prometheus_client.Counter(
+            "remote_bytes",
+            "Bytes exchanged with the remote API",
+            ["model", "direction"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self.cache = prometheus_client.Counter(
+            "cache", "Lookups of the response cache", ["model", "result"], namespace=namespace, registry=registry
+        )
+
+    def record(self, call: RemoteCall):
+        if call.cache is not None:
+            self.cache.labels(call.model, call.cache).inc()
+        if call.status is None:
+            return
+        self.latency.labels(call.model, call.verb, call.url_template, self.status_class(call)).observe(call.latency)
+        self.parse.labels(call.model).observe(call.parse_time)
+        self.bytes.labels(call.model, "sent").inc(call.request_bytes)
+        self.bytes.labels(call.model, "received").inc(call.response_bytes)
@@ -0,0 +1,75 @@
+import threading
+import weakref
+from typing import Any
+
+
+class ModelRegistry:
+    """
+    Registry of the models, filled when the model classes are created, used to resolve the name
+    given to a RemoteRelationship or to a LocalRelationship in constant time.
+
+    A model can be referenced by its name ("Storage"), its qualified name ("Warehouse.Storage")
+    or its full name ("app.models.Warehouse.Storage"). When two models with the same name are declared
+    in different modules, referencing them by their name is ambiguous, and the full name must be used.
+
+    The classes are weakly referenced, so that the models that no longer exist are not kept alive, nor resolved.
+    """
+
+    def __init__(self, kind: str):
+        """
+        :param kind: the name of the base class of the registered models, used in the error messages
+        """
+        self.kind = kind
+        self._classes: dict[str, dict[str, weakref.ref]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def full_name(cls: type[Any]) -> str:
+        return f"{cls.__module__}.{cls.__qualname__}"
+
+    def register(self, cls: type[Any]):
+        """
+        :param cls: the model class to register
+        """
+        full_name = self.full_name(cls)
+        reference = weakref.ref(cls)
+        with self._lock:
+            for name in {cls.__name__, cls.__qualname__, full_name}:
+                self._classes.setdefault(name, {})[full_name] = reference
+
+    def resolve(self, name: str) -> type[Any]:
+        """
+        :param name: the name, qualified name or full name of the model
+        :return: the model class
+        """
+        with self._lock:
+            candidates = self._classes.get(name, {})
+            classes = []
+            for full_name, reference in list(candidates.items()):
+                cls = reference()
+                if cls is None:
+                    del candidates[full_name]
+                else:
+                    classes.append(cls)
+
+        if not classes:
+            raise ValueError(f"Failed to find class with name {name}, is it a subclass of {self.kind} ?")
+        if len(classes) > 1:
+            raise ValueError(f"Ambiguous class name {name}, use one of {', '.join(sorted(candidates))}")
+        return classes[0]
+
+    def models(self) -> list[type[Any]]:
+        """
+        :return: all the registered models that still exist
+        """
+        with self._lock:
+            # A list rather than a set: the reference of a class that no longer exists cannot be hashed
+            references = [reference for candidates in self._classes.values() for reference in candidates.values()]
+        return list(dict.fromkeys(cls for cls in (reference() for reference in references) if cls is not None))
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self.resolve(name)
+        except ValueError:
+            return False
+        return True
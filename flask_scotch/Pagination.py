@@ -0,0 +1,147 @@
+from typing import Any, Iterator, Optional, Union, TYPE_CHECKING
+
+from .utils import iter_json_array
+
+if TYPE_CHECKING:
+    from .RemoteModel import ApiAccessor
+
+
+class Pagination:
+    """
+    Way of walking through a collection of the remote API, used by ApiAccessor.iter_all.
+
+    The default implementation does not paginate: the collection is fetched with a single request,
+    and its items are parsed one by one while the response is streamed, so that the whole body is never
+    held in memory.
+
+    The pages are requested like any other request of the accessor: the calls are recorded, the cached pages
+    reused, and an error status raised (requests.HTTPError).
+    """
+
+    def iter_items(self, accessor: "ApiAccessor", page_size: int, params: dict[str, Any]) -> Iterator[Any]:
+        """
+        :param accessor: the accessor of the model to fetch
+        :param page_size: the number of items to request at once
+        :param params: the additional query parameters of the requests
+        :return: an iterator over the raw json items of the collection
+        """
+        response = accessor._checked_get(accessor._build_url("", params or None), stream=True)
+        with response:
+            yield from iter_json_array(response.iter_content(chunk_size=64 * 1024), response.encoding or "utf-8")
+
+
+class OffsetPagination(Pagination):
+    """
+    Pages requested with an offset and a limit: /cars/?offset=200&limit=100
+
+    The pages are requested until an empty one, since the remote API may send fewer items than requested
+    (when it caps the size of its pages)
+    """
+
+    def __init__(self, offset_param: str = "offset", limit_param: str = "limit"):
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+
+    def iter_items(self, accessor: "ApiAccessor", page_size: int, params: dict[str, Any]) -> Iterator[Any]:
+        offset = 0
+        while True:
+            page_params = params | {self.offset_param: offset, self.limit_param: page_size}
+            items = accessor._request("get", url_params=page_params)
+            if not items:
+                return
+            yield from items
+            offset += len(items)
+
+
+class PagePagination(Pagination):
+    """
+    Pages requested by number: /cars/?page=3&page_size=100
+
+    The pages are requested until an empty one, see OffsetPagination
+    """
+
+    def __init__(self, page_param: str = "page", size_param: str = "page_size", first_page: int = 1):
+        self.page_param = page_param
+        self.size_param = size_param
+        self.first_page = first_page
+
+    def iter_items(self, accessor: "ApiAccessor", page_size: int, params: dict[str, Any]) -> Iterator[Any]:
+        page = self.first_page
+        while True:
+            page_params = params | {self.page_param: page, self.size_param: page_size}
+            items = accessor._request("get", url_params=page_params)
+            if not items:
+                return
+            yield from items
+            page += 1
+
+
+class CursorPagination(Pagination):
+    """
+    Pages returned as an object holding the items and the cursor of the next page:
+    /cars/?limit=100 -> {"results": [...], "next": "abc"}
+    /cars/?limit=100&cursor=abc -> {"results": [...], "next": null}
+    """
+
+    def __init__(
+        self,
+        cursor_param: str = "cursor",
+        size_param: str = "limit",
+        results_key: str = "results",
+        next_key: str = "next",
+    ):
+        self.cursor_param = cursor_param
+        self.size_param = size_param
+        self.results_key = results_key
+        self.next_key = next_key
+
+    def iter_items(self, accessor: "ApiAccessor", page_size: int, params: dict[str, Any]) -> Iterator[Any]:
+        cursor = None
+        while True:
+            page_params = params | {self.size_param: page_size}
+            if cursor is not None:
+                page_params[self.cursor_param] = cursor
+            page = accessor._request("get", url_params=page_params)
+            yield from page[self.results_key]
+            cursor = page.get(self.next_key)
+            if cursor is None:
+                return
+
+
+class LinkPagination(Pagination):
+    """
+    Pages linked by the `Link` header of the responses (RFC 8288):
+    Link: <https://api.com/cars/?page=2>; rel="next"
+    """
+
+    def __init__(self, size_param: str = "per_page"):
+        self.size_param = size_param
+
+    def iter_items(self, accessor: "ApiAccessor", page_size: int, params: dict[str, Any]) -> Iterator[Any]:
+        url: Optional[str] = accessor._build_url("", params | {self.size_param: page_size})
+        while url is not None:
+            response = accessor._checked_get(url)
+            yield from accessor._decode(response)
+            url = response.links.get("next", {}).get("url")
+
+
+PAGINATIONS: dict[str, type[Pagination]] = {
+    "offset": OffsetPagination,
+    "page": PagePagination,
+    "cursor": CursorPagination,
+    "link": LinkPagination,
+}
+
+
+def get_pagination(pagination: Union[None, str, Pagination]) -> Pagination:
+    """
+    :param pagination: a Pagination instance, the name of one of the PAGINATIONS, or None for no pagination
+    :return: Pagination
+    """
+    if pagination is None:
+        return Pagination()
+    if isinstance(pagination, str):
+        if pagination not in PAGINATIONS:
+            raise ValueError(f"Unknown pagination {pagination}, expected one of {', '.join(PAGINATIONS)}")
+        return PAGINATIONS[pagination]()
+    return pagination
@@ -0,0 +1,197 @@
+import asyncio
+import email.utils
+import threading
+import time
+from typing import Any, Optional
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """
+    :param value: the Retry-After header of a response: a number of seconds, or an HTTP date
+    :param default: the delay used when the header is missing or invalid
+    :return: the number of seconds to wait
+    """
+    if not value:
+        return default
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """
+    Limits the requests sent to a remote API (a host, or the directory of a model), shared by all the threads.
+
+    The requests are spaced by a token bucket: at most `rate` requests per second on average, with bursts
+    of at most `burst` requests. When the remote API answers 429 Too Many Requests, no request is sent to it until
+    the delay of its Retry-After header is elapsed.
+
+    With `adaptive`, the number of requests in flight is also limited, and the limit adjusted like the congestion
+    window of TCP (AIMD): it grows by one request per round trip while the calls succeed, and is halved when the
+    API throttles a call (429) or answers more than `latency_tolerance` times slower than its lowest recent latency.
+    The concurrency then settles at the level the remote API sustains, instead of piling up throttled retries.
+
+    Exemple of use case
+
+    limiter = RateLimiter("api.com", rate=50, adaptive=True)
+    limiter.acquire()
+    started = time.monotonic()
+    response = requests.get("https://api.com/cars/1")
+    limiter.release(time.monotonic() - started, response.status_code, response.headers.get("Retry-After"))
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        adaptive: bool = False,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        latency_tolerance: float = 2.0,
+    ):
+        """
+        :param name: the name of the remote API
+        :param rate: the average number of requests per second, unlimited when None
+        :param burst: the maximum number of requests sent at once, `rate` (a second of requests) when None
+        :param adaptive: adjust the number of requests in flight to the throttling and latency of the remote API
+        :param min_concurrency: the lowest limit of requests in flight
+        :param max_concurrency: the highest limit of requests in flight, also the initial one
+        :param latency_tolerance: how much slower than usual a response must be to lower the limit
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst if burst is not None else rate or 1, 1)
+        self.adaptive = adaptive
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_tolerance = latency_tolerance
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._decreased_at = 0.0
+        self._throttled = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, name: str, config: dict[str, Any]) -> "RateLimiter":
+        """
+        Creates the rate limiter from the SCOTCH_RATE_* and SCOTCH_*_CONCURRENCY keys of the flask configuration
+
+        :param name: the name of the remote API
+        :param config: the flask app configuration
+        :return: RateLimiter
+        """
+        return cls(
+            name,
+            rate=config["SCOTCH_RATE_LIMIT"],
+            burst=config["SCOTCH_RATE_BURST"],
+            adaptive=config["SCOTCH_ADAPTIVE_CONCURRENCY"],
+            min_concurrency=config["SCOTCH_MIN_CONCURRENCY"],
+            max_concurrency=config["SCOTCH_MAX_CONCURRENCY"],
+        )
+
+    @property
+    def limit(self) -> int:
+        """
+        :return: the current limit of requests in flight
+        """
+        return max(int(self._limit), self.min_concurrency)
+
+    def _reserve(self) -> float:
+        """
+        Takes a token, possibly in advance
+
+        :return: how long (in seconds) to wait before sending the request
+        """
+        with self._condition:
+            now = time.monotonic()
+            delay = max(self._blocked_until - now, 0.0)
+            if self.rate is None:
+                return delay
+            self._tokens = min(self._tokens + (now - self._updated_at) * self.rate, self.burst) - 1
+            self._updated_at = now
+            return max(delay, -self._tokens / self.rate)
+
+    def _enter(self) -> bool:
+        # Called with the condition acquired
+        if self.adaptive and self._in_flight >= self.limit:
+            return False
+        self._in_flight += 1
+        return True
+
+    def acquire(self):
+        """
+        Waits until a request can be sent, to call before sending it
+        """
+        with self._condition:
+            while not self._enter():
+                self._condition.wait()
+        delay = self._reserve()
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            except BaseException:
+                self.release(None)
+                raise
+
+    async def aacquire(self):
+        """
+        Asynchronous version of acquire, polling for a free slot rather than blocking the event loop
+        """
+        pause = 0.001
+        while True:
+            with self._condition:
+                if self._enter():
+                    break
+            await asyncio.sleep(pause)
+            pause = min(pause * 2, 0.05)
+        delay = self._reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                self.release(None)
+                raise
+
+    def release(self, latency: Optional[float], status: Optional[int] = None, retry_after: Optional[str] = None):
+        """
+        To call once the response is received, or the request failed
+
+        :param latency: how long the call took, in seconds, None when it failed
+        :param status: the status code of the response
+        :param retry_after: the Retry-After header of the response
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._in_flight -= 1
+            throttled = status == 429
+            if throttled:
+                self._throttled += 1
+                self._blocked_until = max(self._blocked_until, now + parse_retry_after(retry_after))
+
+            if self.adaptive and latency is not None:
+                # The lowest recent latency, slowly forgotten so that a lasting change of the API is followed
+                self._baseline = latency if self._baseline is None else min(latency, self._baseline * 1.01)
+                congested = throttled or latency > self._baseline * self.latency_tolerance
+                if congested:
+                    # At most once per round trip, the calls in flight answering the same congestion
+                    if now - self._decreased_at > latency:
+                        self._limit = max(self._limit / 2, self.min_concurrency)
+                        self._decreased_at = now
+                else:
+                    self._limit = min(self._limit + 1 / self._limit, self.max_concurrency)
+            self._condition.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        :return: the current limit and number of requests in flight, and the number of throttled requests
+        """
+        with self._condition:
+            return {"limit": self.limit, "in_flight": self._in_flight, "throttled": self._throttled}
@@ -0,0 +1,123 @@
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Iterable, Optional, TYPE_CHECKING
+
+from flask import Flask
+
+if TYPE_CHECKING:
+    from .RemoteModel import RemoteModel
+
+
+class RefreshScheduler:
+    """
+    Loads the collections of the remote models declaring `__warmup__ = True` ahead of their first use,
+    and refreshes those declaring a `__refresh_interval__` (in seconds) in the background, before their
+    cached responses expire, see ApiAccessor.warm.
+
+    At most `concurrency` collections are loaded at once, and each refresh is delayed or advanced by a random
+    `jitter` (a fraction of the interval), so that the workers of an application started at the same time
+    do not all request the remote API at the same time.
+
+    Exemple of use case
+
+    class Country(RemoteModel):
+        __remote_directory__ = "countries"
+        __cache_ttl__ = 3600
+        __warmup__ = True
+        __refresh_interval__ = 3000
+
+    scotch.warm_up()  # or automatically, see SCOTCH_WARMUP
+    """
+
+    def __init__(self, app: Flask, concurrency: int = 2, jitter: float = 0.1):
+        """
+        :param app: the flask app, whose context is pushed to load the collections
+        :param concurrency: the maximum number of collections loaded at once
+        :param jitter: the maximal random variation of the intervals, as a fraction of them
+        """
+        self.app = app
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self._executor = ThreadPoolExecutor(concurrency, thread_name_prefix="scotch-refresh")
+        # The next refresh of each model: its time, a counter breaking the ties, the model and its interval
+        self._queue: list[tuple[float, int, type["RemoteModel"], float]] = []
+        self._running: set[type["RemoteModel"]] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._counter = 0
+
+    def _delay(self, interval: float) -> float:
+        return interval * (1 + self.jitter * random.uniform(-1, 1))
+
+    def warm(self, models: Iterable[type["RemoteModel"]], wait_for: bool = True):
+        """
+        Loads the collections of the given models, concurrently
+
+        :param models: the remote models
+        :param wait_for: wait until all the collections are loaded
+        """
+        futures = [self._executor.submit(self._load, model, False) for model in models]
+        if wait_for:
+            wait(futures)
+
+    def schedule(self, model: type["RemoteModel"], interval: float):
+        """
+        Refreshes the collection of the model every `interval` seconds (give or take the jitter)
+
+        :param model: the remote model
+        :param interval: the interval between two refreshes, in seconds
+        """
+        if interval <= 0:
+            raise ValueError(f"The refresh interval of {model.__name__} must be positive")
+        with self._lock:
+            self._counter += 1
+            heapq.heappush(self._queue, (time.monotonic() + self._delay(interval), self._counter, model, interval))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scotch-scheduler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self):
+        """
+        Stops the refreshes, and waits for those in progress
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            due = []
+            with self._lock:
+                now = time.monotonic()
+                while self._queue and self._queue[0][0] <= now:
+                    _, _, model, interval = heapq.heappop(self._queue)
+                    self._counter += 1
+                    heapq.heappush(self._queue, (now + self._delay(interval), self._counter, model, interval))
+                    # A refresh still in progress is not started again
+                    if model not in self._running:
+                        self._running.add(model)
+                        due.append(model)
+                next_at = self._queue[0][0] if self._queue else None
+
+            for model in due:
+                self._executor.submit(self._load, model, True)
+            self._wakeup.wait(None if next_at is None else max(next_at - time.monotonic(), 0))
+
+    def _load(self, model: type["RemoteModel"], refresh: bool) -> Any:
+        try:
+            with self.app.app_context():
+                return model.api.warm(refresh)
+        except Exception:
+            self.app.logger.exception("Failed to load the collection of %s", model.__name__)
+        finally:
+            with self._lock:
+                self._running.discard(model)
@@ -0,0 +1,275 @@
+import datetime
+import json
+from typing import Any, Iterable, Optional, TYPE_CHECKING
+
+import sqlalchemy as sa
+from flask import has_app_context
+from pydantic.fields import SHAPE_SINGLETON
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .utils import iter_json_array
+
+if TYPE_CHECKING:
+    from .RemoteModel import ApiAccessor, RemoteModel
+
+STATE_TABLE = "scotch_mirror_state"
+
+_COLUMN_TYPES: dict[type, Any] = {
+    bool: sa.Boolean,
+    int: sa.Integer,
+    float: sa.Float,
+    str: sa.String,
+    datetime.datetime: sa.DateTime,
+    datetime.date: sa.Date,
+}
+
+
+class RemoteMirror:
+    """
+    Copy of a remote collection in a table of the local database, so that the entities can be read
+    without sending any request to the remote API, and joined with the local tables in SQL.
+
+    The table has a column for each field of the model (json columns for the complex types), as well as:
+        - `_payload`: the whole entity, as sent by the remote API, used to rebuild the model
+        - `_generation`: the synchronization that last wrote the row, used to remove the deleted entities
+
+    The mirror is synchronized with ApiAccessor.sync, either incrementally, when the model declares
+    the field holding the date of the last modification of an entity (`__mirror_updated_field__`), or by
+    downloading the whole collection again when it changed (detected with its ETag) otherwise.
+
+    Exemple of use case
+
+    class Storage(RemoteModel):
+        __remote_directory__ = "storages"
+        __mirror__ = True
+        __mirror_updated_field__ = "updated_at"
+
+        name: str
+        updated_at: datetime
+
+    Storage.api.sync()  # From a cron job for instance
+    Storage.api.get(1)  # Read from the local table
+    """
+
+    def __init__(self, accessor: "ApiAccessor"):
+        self.accessor = accessor
+        self.model = accessor.model
+        self.db = accessor.scotch.sql_engine
+        if self.db is None:
+            raise AssertionError(f"{self.model.__name__} is mirrored, but no SqlAlchemy engine is registered")
+
+        name = self.model.__mirror__
+        self.name = name if isinstance(name, str) else f"{self.model.__remote_directory__}_mirror"
+        self.table = self._build_table(self.db.metadata)
+        self.state = self._build_state_table(self.db.metadata)
+        self._json_columns = {name for name, column in self.table.columns.items() if isinstance(column.type, sa.JSON)}
+        self._plain_columns = [
+            name for name in self.table.columns.keys() if not name.startswith("_") and name not in self._json_columns
+        ]
+        self._ready = False
+        self._tables_created = False
+
+    def _build_table(self, metadata: sa.MetaData) -> sa.Table:
+        if self.name in metadata.tables:
+            return metadata.tables[self.name]
+
+        columns = [sa.Column("id", sa.Integer, primary_key=True, autoincrement=False)]
+        for name, field in self.model.__fields__.items():
+            if name != "id":
+                column_type = (
+                    _COLUMN_TYPES.get(field.outer_type_, sa.JSON) if field.shape == SHAPE_SINGLETON else sa.JSON
+                )
+                columns.append(sa.Column(name, column_type))
+        columns.append(sa.Column("_payload", sa.Text, nullable=False))
+        columns.append(sa.Column("_generation", sa.Integer, nullable=False, index=True))
+        return sa.Table(self.name, metadata, *columns)
+
+    @staticmethod
+    def _build_state_table(metadata: sa.MetaData) -> sa.Table:
+        if STATE_TABLE in metadata.tables:
+            return metadata.tables[STATE_TABLE]
+        return sa.Table(
+            STATE_TABLE,
+            metadata,
+            sa.Column("name", sa.String, primary_key=True),
+            sa.Column("watermark", sa.String),
+            sa.Column("etag", sa.String),
+            sa.Column("generation", sa.Integer, nullable=False),
+            sa.Column("synced_at", sa.DateTime, nullable=False),
+        )
+
+    @property
+    def engine(self) -> sa.engine.Engine:
+        if has_app_context():
+            return self.db.engine
+        with self.accessor.scotch.app.app_context():
+            return self.db.engine
+
+    def create_tables(self):
+        if not self._tables_created:
+            self.table.create(self.engine, checkfirst=True)
+            self.state.create(self.engine, checkfirst=True)
+            self._tables_created = True
+
+    def is_ready(self) -> bool:
+        """
+        Whether the mirror has been synchronized at least once, and so can be read from
+
+        :return: bool
+        """
+        if not self._ready:
+            self.create_tables()
+            with self.engine.connect() as connection:
+                self._ready = connection.execute(self._select_state()).first() is not None
+        return self._ready
+
+    def get(self, model_id: Any) -> Optional["RemoteModel"]:
+        with self.engine.connect() as connection:
+            payload = connection.execute(sa.select(self.table.c._payload).where(self.table.c.id == model_id)).scalar()
+        return None if payload is None else self.model.parse_raw(payload)
+
+    def all(self) -> list["RemoteModel"]:
+        with self.engine.connect() as connection:
+            payloads = connection.execute(sa.select(self.table.c._payload).order_by(self.table.c.id)).scalars()
+            return [self.model.parse_raw(payload) for payload in payloads]
+
+    def items(self) -> list[Any]:
+        """
+        :return: the json of all the mirrored entities, not parsed
+        """
+        loads = self.accessor.scotch.serializer.loads
+        with self.engine.connect() as connection:
+            payloads = connection.execute(sa.select(self.table.c._payload).order_by(self.table.c.id)).scalars()
+            return [loads(payload) for payload in payloads]
+
+    def upsert(self, entities: Iterable["RemoteModel"], generation: Optional[int] = None) -> int:
+        """
+        Inserts the entities in the mirror, or updates them when they are already in it,
+        by chunks of SCOTCH_SQL_CHUNK_SIZE rows
+
+        :param entities: the entities to write
+        :param generation: the synchronization writing the rows, the current one by default
+        :return: the number of rows written
+        """
+        self.create_tables()
+        chunk_size = self.accessor.scotch.app.config["SCOTCH_SQL_CHUNK_SIZE"]
+        count = 0
+        with self.engine.begin() as connection:
+            if generation is None:
+                generation = connection.execute(sa.select(self.state.c.generation).where(self._is_mirror())).scalar()
+            rows = []
+            for entity in entities:
+                if entity.id is None:
+                    continue
+                rows.append(self._row(entity, generation or 0))
+                if len(rows) >= chunk_size:
+                    count += self._write(connection, rows)
+                    rows = []
+            count += self._write(connection, rows)
+        return count
+
+    def delete(self, model_id: Any):
+        self.create_tables()
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.id == model_id))
+
+    def sync(self, full: bool = False) -> int:
+        """
+        Synchronizes the mirror with the remote API, see ApiAccessor.sync
+
+        :param full: download the whole collection even when an incremental synchronization is possible,
+        to remove the entities deleted from the remote API
+        :return: the number of entities written in the mirror
+        """
+        self.create_tables()
+        with self.engine.connect() as connection:
+            state = connection.execute(self._select_state()).first()
+
+        updated_field = self.model.__mirror_updated_field__
+        if updated_field is not None and state is not None and state.watermark is not None and not full:
+            params = {self.model.__mirror_since_param__: state.watermark}
+            entities = _Watermarked(self.accessor.iter_all(**params), updated_field)
+            count = self.upsert(entities, state.generation)
+            self._save_state(entities.watermark or state.watermark, state.etag, state.generation)
+            return count
+
+        headers = {"If-None-Match": state.etag} if state is not None and state.etag and not full else {}
+        response = self.accessor._send("get", self.accessor._build_url(), headers=headers, stream=True)
+        with response:
+            if response.status_code == 304 and state is not None:
+                self._save_state(state.watermark, state.etag, state.generation)
+                return 0
+            response.raise_for_status()
+
+            generation = (state.generation if state is not None else 0) + 1
+            items = iter_json_array(response.iter_content(chunk_size=64 * 1024), response.encoding or "utf-8")
+            entities = _Watermarked((self.model.parse_obj(item) for item in items), updated_field)
+            count = self.upsert(entities, generation)
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c._generation != generation))
+        self._save_state(entities.watermark, response.headers.get("ETag"), generation)
+        return count
+
+    def _row(self, entity: "RemoteModel", generation: int) -> dict[str, Any]:
+        row = {name: getattr(entity, name, None) for name in self._plain_columns}
+        if self._json_columns:
+            row.update(json.loads(entity.json(include=self._json_columns)))
+        row["_payload"] = entity.json()
+        row["_generation"] = generation
+        return row
+
+    def _write(self, connection, rows: list[dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        dialect = connection.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = (sqlite if dialect == "sqlite" else postgresql).insert(self.table)
+            updated = {name: insert.excluded[name] for name in rows[0] if name != "id"}
+            connection.execute(insert.on_conflict_do_update(index_elements=["id"], set_=updated), rows)
+        else:
+            connection.execute(self.table.delete().where(self.table.c.id.in_([row["id"] for row in rows])))
+            connection.execute(self.table.insert(), rows)
+        return len(rows)
+
+    def _is_mirror(self):
+        return self.state.c.name == self.name
+
+    def _select_state(self):
+        return sa.select(self.state).where(self._is_mirror())
+
+    def _save_state(self, watermark: Optional[str], etag: Optional[str], generation: int):
+        values = {
+            "watermark": watermark,
+            "etag": etag,
+            "generation": generation,
+            "synced_at": datetime.datetime.utcnow(),
+        }
+        with self.engine.begin() as connection:
+            if connection.execute(self.state.update().where(self._is_mirror()).values(**values)).rowcount == 0:
+                connection.execute(self.state.insert().values(name=self.name, **values))
+        self._ready = True
+
+
+class _Watermarked:
+    """
+    Iterates over entities, keeping track of the greatest value of their `field`
+    """
+
+    def __init__(self, entities: Iterable["RemoteModel"], field: Optional[str]):
+        self.entities = entities
+        self.field = field
+        self.highest: Any = None
+
+    def __iter__(self):
+        for entity in self.entities:
+            if self.field is not None:
+                value = getattr(entity, self.field, None)
+                if value is not None and (self.highest is None or value > self.highest):
+                    self.highest = value
+            yield entity
+
+    @property
+    def watermark(self) -> Optional[str]:
+        if self.highest is None:
+            return None
+        return self.highest.isoformat() if hasattr(self.highest, "isoformat") else str(self.highest)
@@ -1,19 +1,48 @@
-from typing import Optional, Any
+import copy
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, ClassVar, Iterable, Iterator, Union, TYPE_CHECKING
 from flask import current_app
 from urllib import parse
 from os import path
-import requests
 
+import requests
 from pydantic import BaseModel, Extra, PrivateAttr
-from functools import lru_cache
 
+from .CircuitBreaker import CircuitBreaker, CircuitOpenError
+from .IdentityMap import IdentityMap
+from .RateLimiter import RateLimiter
+from .LiteRecord import LiteRecord, lite_class
+from .Instrumentation import RemoteCall, current_relationship, for_worker
+from .ResponseCache import CacheEntry
+from .LocalRelationship import LocalRelationship
+from .ModelRegistry import ModelRegistry
+
+if TYPE_CHECKING:
+    from .AsyncApiAccessor import AsyncApiAccessor
+    from .Pagination import Pagination
+    from .RemoteQuery import QueryStyle, RemoteQuery
+    from .RemoteMirror import RemoteMirror
+
+_MISSING = object()
+
+
+class BaseAccessor:
+    """
+    Configuration shared by the synchronous and asynchronous accessors of a model:
+    the extension it belongs to and the way the URLs of the remote API are built
+    """
+
+    #: The keyword argument of the HTTP client holding the body of a request
+    _body_argument = "data"
 
-class ApiAccessor:
     def __init__(self, model: type["RemoteModel"]):
         if not current_app or not current_app.extensions["scotch"]:
             raise AssertionError("Scotch extension not registered")
         self.model = model
-        self.api_url = parse.urlparse(current_app.extensions["scotch"].api_url)
+        self.scotch = current_app.extensions["scotch"]
+        self.api_url = parse.urlparse(self.scotch.api_url)
 
     def _build_url(self, subdirectory: str = "", parameters: Optional[dict[Any, Any]] = None):
         url_path = path.join(self.api_url.path, self.model.__remote_directory__, subdirectory)
@@ -32,41 +61,803 @@ class ApiAccessor:
         )
         return constructed_url.geturl()
 
-    def _request(self, verb: str, subdirectory="", url_params: Optional[dict[Any, Any]] = None, **kwargs):
+    @property
+    def cache_ttl(self) -> float:
+        """
+        How long (in seconds) the responses of the remote API are cached for this model:
+        the `__cache_ttl__` of the model, or the SCOTCH_CACHE_TTL config. The cache is disabled when 0
+
+        :return: the time to live of the cached responses
+        """
+        ttl = self.model.__cache_ttl__
+        return self.scotch.app.config["SCOTCH_CACHE_TTL"] if ttl is None else ttl
+
+    def _is_cacheable(self, verb: str, kwargs: dict[str, Any]) -> bool:
+        return verb == "get" and not kwargs and self.cache_ttl > 0
+
+    @property
+    def coalesce_requests(self) -> bool:
+        """
+        Whether the identical GET requests sent at the same time for this model are coalesced into a single one:
+        the `__coalesce_requests__` of the model, or the SCOTCH_COALESCE_REQUESTS config
+
+        :return: bool
+        """
+        coalesce = self.model.__coalesce_requests__
+        return self.scotch.app.config["SCOTCH_COALESCE_REQUESTS"] if coalesce is None else coalesce
+
+    def _is_coalescable(self, verb: str, kwargs: dict[str, Any]) -> bool:
+        return verb == "get" and not kwargs and self.coalesce_requests
+
+    def _cache_response(self, url: str, subdirectory: str, payload: Any, size: int, headers: Any):
+        """
+        Caches the decoded response, along with its validators (ETag, Last-Modified) if any,
+        so that it can be revalidated with a conditional request once expired
+        """
+        tags = (self._model_tag,) if subdirectory else (self._model_tag, self._collection_tag)
+        validators = []
+        if headers.get("ETag"):
+            validators.append(("If-None-Match", headers["ETag"]))
+        if headers.get("Last-Modified"):
+            validators.append(("If-Modified-Since", headers["Last-Modified"]))
+        stale_ttl = self.scotch.app.config["SCOTCH_CACHE_STALE_TTL"]
+        self.scotch.cache.set(
+            url, payload, ttl=self.cache_ttl, size=size, tags=tags, validators=validators, stale_ttl=stale_ttl
+        )
+
+    @staticmethod
+    def _serves_stale(stale: CacheEntry) -> bool:
+        """
+        :return: whether the expired cache entry is served right away, while it is refreshed in the background
+        """
+        return stale.stale_until > time.monotonic()
+
+    @property
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """
+        The circuit breaker of the remote API of this model, when SCOTCH_CIRCUIT_BREAKER is enabled:
+        shared by all the models of the same host, or one per model when SCOTCH_CIRCUIT_SCOPE is "model"
+
+        :return: CircuitBreaker
+        """
+        config = self.scotch.app.config
+        if not config["SCOTCH_CIRCUIT_BREAKER"]:
+            return None
+        name = self.model.__name__ if config["SCOTCH_CIRCUIT_SCOPE"] == "model" else self.api_url.netloc
+        return self.scotch.circuit_breaker(name)
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        """
+        The rate limiter of the remote API of this model, when SCOTCH_RATE_LIMIT or SCOTCH_ADAPTIVE_CONCURRENCY
+        is enabled: shared by all the models of the same host, or one per model when SCOTCH_RATE_LIMIT_SCOPE is "model"
+
+        :return: RateLimiter
+        """
+        config = self.scotch.app.config
+        if config["SCOTCH_RATE_LIMIT"] is None and not config["SCOTCH_ADAPTIVE_CONCURRENCY"]:
+            return None
+        name = self.model.__name__ if config["SCOTCH_RATE_LIMIT_SCOPE"] == "model" else self.api_url.netloc
+        return self.scotch.rate_limiter(name)
+
+    def _retries_throttled(self, response, attempt: int) -> bool:
+        """
+        :return: whether the request throttled by the remote API (429) is sent again, the rate limiter
+        holding it back until the Retry-After delay is elapsed
+        """
+        return response.status_code == 429 and attempt < self.scotch.app.config["SCOTCH_RATE_LIMIT_RETRIES"]
+
+    #: The errors of the HTTP client raised when the remote API could not be reached
+    _unreachable_errors: tuple[type[Exception], ...] = (requests.ConnectionError, requests.Timeout)
+
+    def _is_unavailable(self, error: Exception) -> bool:
+        """
+        :return: whether the error means that the remote API is unavailable: its circuit is open, it could not
+        be reached, or it answered with a server error (5xx). The stale cached response is then served instead
+        """
+        if isinstance(error, (CircuitOpenError, *self._unreachable_errors)):
+            return True
+        response = getattr(error, "response", None)
+        return response is not None and response.status_code >= 500
+
+    @staticmethod
+    def _conditional(kwargs: dict[str, Any], stale: Optional[CacheEntry]) -> dict[str, Any]:
+        """
+        :return: the arguments of the request, with the headers revalidating the stale cache entry if any
+        """
+        if stale is None:
+            return kwargs
+        return dict(kwargs, headers=dict(stale.validators))
+
+    def _revalidated(
+        self, verb: str, subdirectory: str, url: str, stale: CacheEntry, response: Any, latency: float
+    ) -> Any:
+        """
+        The remote API answered 304 Not Modified: the stale cache entry is fresh again, and reused
+        """
+        self.scotch.cache.refresh(url, self.cache_ttl)
+        self._record(
+            verb, subdirectory, url, "revalidated", response.status_code, latency, 0, self._wire_size(response)
+        )
+        return stale.value
+
+    @staticmethod
+    def _wire_size(response: Any) -> int:
+        # The size of the (possibly compressed) body received, rather than of the decoded one
+        length = response.headers.get("Content-Length")
+        return int(length) if length is not None else len(response.content)
+
+    def _invalidate(self, model_id: Optional[Any] = None):
+        """
+        Removes the cached responses made outdated by a change on the remote API:
+        the entity with the given id (if any) and all the collections of the model
+        """
+        if model_id is not None:
+            self.scotch.cache.invalidate(self._build_url(str(model_id)))
+        self.scotch.cache.invalidate_tag(self._collection_tag)
+
+    def _known(self, model_id: Any) -> Optional["RemoteModel"]:
+        """
+        :return: the entity with the given id already loaded during the current request, if any
+        """
+        identity_map = IdentityMap.current()
+        return None if identity_map is None else identity_map.get(self.model, model_id)
+
+    def _identify(self, entity: "RemoteModel", replace: bool = False) -> "RemoteModel":
+        """
+        Adds the loaded entity to the identity map of the current request, see IdentityMap.add
+
+        :return: the instance representing the entity during the current request
+        """
+        identity_map = IdentityMap.current()
+        return entity if identity_map is None else identity_map.add(entity, replace)
+
+    def _forget(self, model_id: Any):
+        identity_map = IdentityMap.current()
+        if identity_map is not None:
+            identity_map.discard(self.model, model_id)
+
+    def _record(
+        self,
+        verb: str,
+        subdirectory: str,
+        url: str,
+        cache: Optional[str],
+        status: Optional[int] = None,
+        latency: float = 0.0,
+        request_bytes: int = 0,
+        response_bytes: int = 0,
+        parse_time: float = 0.0,
+    ):
+        """
+        Reports a call to the remote API (or a response read from the cache) to the instrumentation of the extension
+        """
+        directory = self.model.__remote_directory__
+        if not subdirectory:
+            template = f"/{directory}/"
+        elif subdirectory == self.model.__bulk_endpoint__:
+            template = f"/{directory}/{subdirectory}"
+        else:
+            template = f"/{directory}/{{id}}"
+        call = RemoteCall(
+            model=self.model.__name__,
+            verb=verb,
+            url_template=template,
+            url=url,
+            status=status,
+            latency=latency,
+            request_bytes=request_bytes,
+            response_bytes=response_bytes,
+            parse_time=parse_time,
+            cache=cache,
+            relationship=current_relationship(),
+        )
+        self.scotch.instrumentation.record(self.model, call)
+
+    def _parse(self, item: Any) -> "RemoteModel":
+        """
+        Builds an entity from the json sent by the remote API, without validating it
+        when the model trusts the responses of the API (`__trust_responses__`).
+        The item is then copied, since it may be the cached response, shared by all the callers
+        """
+        if self.model.__trust_responses__:
+            return self.model.construct(**copy.deepcopy(item))
+        return self.model.parse_obj(item)
+
+    def _decode(self, response: Any) -> Any:
+        return self.scotch.serializer.loads(response.content)
+
+    def _body(self, entity: "RemoteModel", include: Optional[set[str]] = None) -> bytes:
+        return self.scotch.serializer.dump_model(entity, include)
+
+    def _payload(self, body: bytes) -> dict[str, Any]:
+        """
+        The arguments sending the given json body, compressed with gzip when it is larger
+        than SCOTCH_COMPRESS_MIN_SIZE bytes
+
+        :return: the keyword arguments of the request
+        """
+        headers = {"Content-Type": self.scotch.serializer.content_type}
+        min_size = self.scotch.app.config["SCOTCH_COMPRESS_MIN_SIZE"]
+        if min_size is not None and len(body) >= min_size:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return {self._body_argument: body, "headers": headers}
+
+    @staticmethod
+    def _body_size(kwargs: dict[str, Any]) -> int:
+        body = kwargs.get("data", kwargs.get("content"))
+        if body is None:
+            return 0
+        return len(body.encode() if isinstance(body, str) else body)
+
+    @property
+    def _model_tag(self) -> str:
+        # Every cached response of the model
+        return self.model.__remote_directory__
+
+    @property
+    def _collection_tag(self) -> str:
+        return f"{self.model.__remote_directory__}:collection"
+
+    @staticmethod
+    def _failed(res: Any) -> bool:
+        """
+        :return: whether the result of a write failed: the exception raised, or an error message of the API
+        """
+        return isinstance(res, Exception) or (isinstance(res, dict) and res.get("msg", "Success") != "Success")
+
+    @staticmethod
+    def _created(entity: "RemoteModel", res: Any) -> Union["RemoteModel", Exception]:
+        if isinstance(res, Exception):
+            return res
+        if isinstance(res, dict) and res.get("msg", None) == "Success":
+            return entity
+        return ValueError("Failed to create entity")
+
+
+class ApiAccessor(BaseAccessor):
+    def __init__(self, model: type["RemoteModel"]):
+        super().__init__(model)
+        self._mirror: Optional["RemoteMirror"] = None
+
+    @property
+    def mirror(self) -> Optional["RemoteMirror"]:
+        """
+        The local copy of the remote collection, when the model declares a `__mirror__`
+
+        :return: RemoteMirror
+        """
+        if not self.model.__mirror__:
+            return None
+        if self._mirror is None:
+            from .RemoteMirror import RemoteMirror
+
+            self._mirror = RemoteMirror(self)
+        return self._mirror
+
+    def _ready_mirror(self) -> Optional["RemoteMirror"]:
+        mirror = self.mirror
+        return mirror if mirror is not None and mirror.is_ready() else None
+
+    def sync(self, full: bool = False) -> int:
+        """
+        Synchronizes the local mirror of the model with the remote API.
+        When the model declares a `__mirror_updated_field__`, only the entities modified since the
+        last synchronization are requested (with the `__mirror_since_param__` query parameter), otherwise
+        the whole collection is downloaded again, unless its ETag did not change.
+        The rows are written with bulk upserts.
+
+        :param full: download the whole collection even when an incremental synchronization is possible,
+        to remove the entities deleted from the remote API
+        :return: the number of entities written in the mirror
+        """
+        mirror = self.mirror
+        if mirror is None:
+            raise ValueError(f"{self.model.__name__} does not declare a __mirror__")
+        return mirror.sync(full)
+
+    def _call(self, breaker: Optional[CircuitBreaker], verb: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends the request through the circuit breaker of the remote API, if any
+        """
+        if breaker is None:
+            return self.scotch.session_pool.request(verb, url, **kwargs)
+
+        breaker.before_call()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.scotch.session_pool.request(verb, url, **kwargs)
+            return response
+        finally:
+            # Also recorded when the call is interrupted, so that a half-open circuit never waits for its probe forever
+            breaker.record(response is not None and response.status_code < 500, time.perf_counter() - started)
+
+    def _send(self, verb: str, url: str, **kwargs) -> requests.Response:
+        breaker = self.circuit_breaker
+        limiter = self.rate_limiter
+        if limiter is None:
+            return self._call(breaker, verb, url, **kwargs)
+
+        attempt = 0
+        while True:
+            limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self._call(breaker, verb, url, **kwargs)
+            except BaseException:
+                # Also when the call is cancelled or interrupted, otherwise its slot would never be given back
+                limiter.release(None)
+                raise
+            limiter.release(time.perf_counter() - started, response.status_code, response.headers.get("Retry-After"))
+            if not self._retries_throttled(response, attempt):
+                return response
+            attempt += 1
+
+    def _checked_get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a GET request of the collection whose response is read by the caller (streamed, or with its headers)
+        rather than decoded and cached like by _request: the call is recorded, and the status of the response checked
+
+        :param url: the url of the collection, or of one of its pages
+        :return: the response
+        :raise requests.HTTPError: when the remote API answers with an error status (4xx, 5xx)
+        """
+        started = time.perf_counter()
+        response = self._send("get", url, **kwargs)
+        # The body of a streamed response is not read yet, only its announced size is known
+        size = int(response.headers.get("Content-Length") or 0) if kwargs.get("stream") else self._wire_size(response)
+        self._record("get", "", url, None, response.status_code, time.perf_counter() - started, 0, size)
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        return response
+
+    def _request(
+        self,
+        verb: str,
+        subdirectory="",
+        url_params: Optional[dict[Any, Any]] = None,
+        refresh: bool = False,
+        **kwargs,
+    ):
+        """
+        :param refresh: request the remote API even when the response is cached, to refresh it
+        :return: the decoded response
+        :raise requests.HTTPError: when the remote API answers with an error status (4xx, 5xx)
+        """
+        if verb not in ("get", "post", "put", "patch", "delete"):
+            raise TypeError(f"Unknown verb {verb}")
+
         url = self._build_url(subdirectory, url_params)
-        if verb == "get":
-            response = requests.get(url, **kwargs)
-            return response.json()
-        if verb == "post":
-            response = requests.post(url, **kwargs)
-            return response.json()
-        if verb == "put":
-            response = requests.put(url, **kwargs)
-            return response.json()
-        if verb == "delete":
-            response = requests.delete(url, **kwargs)
-            return response.json()
-        raise TypeError(f"Unknown verb {verb}")
-
-    def all(self, **kwargs):
-        entities = self._request("get", **kwargs)
-        return list(self.model.parse_obj(item) for item in entities)
+        cacheable = self._is_cacheable(verb, kwargs)
+        stale = None
+        if cacheable:
+            cached = _MISSING if refresh else self.scotch.cache.get(url, _MISSING)
+            if cached is not _MISSING:
+                self._record(verb, subdirectory, url, "hit")
+                return cached
+            stale = self.scotch.cache.stale(url)
+
+        def _fetch():
+            started = time.perf_counter()
+            response = self._send(verb, url, **self._conditional(kwargs, stale))
+            received = time.perf_counter()
+            if stale is not None and response.status_code == 304:
+                return self._revalidated(verb, subdirectory, url, stale, response, received - started)
+            # The body of an error is not decoded, the status of the response is raised once recorded
+            payload = self._decode(response) if response.ok else None
+            self._record(
+                verb,
+                subdirectory,
+                url,
+                "miss" if cacheable else None,
+                response.status_code,
+                received - started,
+                self._body_size(kwargs),
+                self._wire_size(response),
+                time.perf_counter() - received,
+            )
+            response.raise_for_status()
+            if cacheable:
+                self._cache_response(url, subdirectory, payload, len(response.content), response.headers)
+            return payload
+
+        if stale is not None and not refresh and self._serves_stale(stale):
+            self.scotch.run_in_background(url, _fetch)
+            self._record(verb, subdirectory, url, "stale")
+            return stale.value
+
+        try:
+            if self._is_coalescable(verb, kwargs):
+                return self.scotch.single_flight.do(url, _fetch)
+            return _fetch()
+        except Exception as error:
+            if stale is None or not self._is_unavailable(error):
+                raise
+            self._record(verb, subdirectory, url, "stale")
+            return stale.value
+
+    def all(self, prefetch: Iterable[str] = (), lite: bool = False, **kwargs):
+        """
+        Fetches all the entities of the remote directory
+
+        :param prefetch: the name of the LocalRelationship to load at once for all the entities, see prefetch_local
+        :param lite: returns compact read-only records instead of the entities, see LiteRecord
+        :return: the list of entities
+        """
+        mirror = self._ready_mirror()
+        if lite:
+            record = lite_class(self.model)
+            items = mirror.items() if mirror is not None and not kwargs else self._request("get", **kwargs)
+            return prefetch_local([record(item) for item in items], *prefetch)
+        if mirror is not None and not kwargs:
+            entities = mirror.all()
+        else:
+            entities = [self._parse(item) for item in self._request("get", **kwargs)]
+        return prefetch_local([self._identify(entity) for entity in entities], *prefetch)
+
+    def warm(self, refresh: bool = False) -> int:
+        """
+        Loads the collection of the model ahead of its use: the local mirror is synchronized when the model
+        declares one, otherwise the collection is cached, along with each of its entities, so that the
+        `get` of the entities (e.g. by a RemoteRelationship) are read from the cache as well.
+        Only useful when the responses of the model are cached, or mirrored. See RefreshScheduler
+
+        :param refresh: request the remote API even when the collection is already cached
+        :return: the number of entities loaded
+        """
+        if self.mirror is not None:
+            return self.sync()
+
+        items = self._request("get", refresh=refresh)
+        if self.cache_ttl > 0 and items:
+            # The size of each entity is estimated, so that the byte budget of the cache is roughly respected
+            size = len(self.scotch.serializer.dumps(items)) // len(items)
+            for item in items:
+                if item.get("id") is not None:
+                    url = self._build_url(str(item["id"]))
+                    self.scotch.cache.set(url, item, ttl=self.cache_ttl, size=size, tags=(self._model_tag,))
+        return len(items)
+
+    def query(self) -> "RemoteQuery":
+        """
+        A lazily evaluated query on the collection, see RemoteQuery
+
+        :return: RemoteQuery
+        """
+        from .RemoteQuery import RemoteQuery
+
+        return RemoteQuery(self)
+
+    def filter(self, **filters: Any) -> "RemoteQuery":
+        """
+        Exemple of use case
+
+        red_cars = Car.api.filter(color="red", price__lte=100).order_by("-price").limit(10)
+
+        :param filters: the values of the fields (color="red"), or of their operators (price__lte=100)
+        :return: the filtered query, see RemoteQuery
+        """
+        return self.query().filter(**filters)
+
+    def only(self, *fields: str) -> "RemoteQuery":
+        return self.query().only(*fields)
+
+    def order_by(self, *fields: str) -> "RemoteQuery":
+        return self.query().order_by(*fields)
+
+    def limit(self, limit: int) -> "RemoteQuery":
+        return self.query().limit(limit)
+
+    def iter_all(
+        self,
+        page_size: int = 100,
+        pagination: Union[None, str, "Pagination"] = None,
+        lite: bool = False,
+        **params,
+    ) -> Iterator[Any]:
+        """
+        Iterates over all the entities of the remote directory, without ever holding the whole collection in memory:
+        either page by page, or by parsing the items one by one while the response is received.
+
+        Exemple of use case
+
+        for car in Car.api.iter_all(page_size=500, pagination="offset", color="red"):
+            print(car.name)
+
+        :param page_size: the number of entities requested at once
+        :param pagination: how the collection is paginated by the remote API: "offset", "page", "cursor", "link",
+        or a Pagination instance. By default, the `__pagination__` of the model, and when it is not set, the
+        collection is fetched with a single streamed request
+        :param lite: yields compact read-only records instead of the entities, see LiteRecord
+        :param params: additional query parameters
+        :return: an iterator over the entities
+        """
+        from .Pagination import get_pagination
+
+        strategy = get_pagination(pagination if pagination is not None else self.model.__pagination__)
+        parse = lite_class(self.model) if lite else self._parse
+        for item in strategy.iter_items(self, page_size, params):
+            yield parse(item)
 
     def get(self, model_id: int):
-        entity = self._request("get", str(model_id))
-        return self.model.parse_obj(entity)
+        """
+        Fetches the entity with the given id, unless it was already loaded during the current request,
+        in which case the same instance is returned
+
+        :param model_id: the id of the entity
+        :return: the entity
+        """
+        known = self._known(model_id)
+        if known is not None:
+            return known
+
+        mirror = self._ready_mirror()
+        if mirror is not None:
+            mirrored = mirror.get(model_id)
+            if mirrored is not None:
+                return self._identify(mirrored)
+
+        entity = self._parse(self._request("get", str(model_id)))
+        if mirror is not None:
+            mirror.upsert([entity])
+        return self._identify(entity)
+
+    def fetch_many(self, model_ids: Iterable[Any]) -> dict[Any, "RemoteModel"]:
+        """
+        Fetches several entities at once.
+        When the model declares a `__bulk_filter__`, the ids are sent by chunks of SCOTCH_BULK_CHUNK_SIZE
+        in the query parameter of this name, otherwise the entities are fetched with concurrent requests,
+        with at most SCOTCH_MAX_WORKERS requests in flight.
+
+        :param model_ids: the ids of the entities to fetch
+        :return: the fetched entities, by id. Ids of entities not returned by the API are missing
+        """
+        found = {}
+        ids = []
+        for model_id in dict.fromkeys(model_ids):
+            known = self._known(model_id)
+            if known is None:
+                ids.append(model_id)
+            else:
+                found[model_id] = known
+        if not ids:
+            return found
+
+        bulk_filter = self.model.__bulk_filter__
+        if bulk_filter is not None:
+            chunk_size = self.scotch.app.config["SCOTCH_BULK_CHUNK_SIZE"]
+            for start in range(0, len(ids), chunk_size):
+                end = start + chunk_size
+                chunk = ids[start:end]
+                for entity in self.all(url_params={bulk_filter: ",".join(str(model_id) for model_id in chunk)}):
+                    found[entity.id] = entity
+            return found
+
+        entities = self.get_many(ids)
+        error = next((entity for entity in entities if isinstance(entity, Exception)), None)
+        if error is not None:
+            raise error
+        for model_id, entity in zip(ids, entities):
+            if not isinstance(entity, Exception):
+                found[model_id] = entity
+        return found
+
+    def get_many(
+        self, model_ids: Iterable[Any], max_workers: Optional[int] = None
+    ) -> list[Union["RemoteModel", Exception]]:
+        """
+        Fetches several entities with concurrent requests sent over the pooled connections,
+        so that the call takes about as long as the slowest request, rather than the sum of all of them
+
+        Exemple of use case
+
+        cars = Car.api.get_many([1, 2, 3])
+        failed = [car for car in cars if isinstance(car, Exception)]
+
+        :param model_ids: the ids of the entities to fetch, each distinct id is fetched only once
+        :param max_workers: the maximum number of requests in flight, SCOTCH_MAX_WORKERS by default
+        :return: the entities, in the same order as the ids. When an entity could not be fetched,
+        the exception raised is returned in its place
+        """
+        model_ids = list(model_ids)
+        found: dict[Any, Union["RemoteModel", Exception]] = {}
+        for model_id in model_ids:
+            known = self._known(model_id)
+            if known is not None:
+                found[model_id] = known
+        ids = [model_id for model_id in dict.fromkeys(model_ids) if model_id not in found]
+        # The worker threads have no app context, the fetched entities are identified from the calling thread
+        for model_id, entity in zip(ids, self._map(self.get, ids, max_workers)):
+            found[model_id] = entity if isinstance(entity, Exception) else self._identify(entity)
+        return [found[model_id] for model_id in model_ids]
+
+    def _map(self, function, items: list[Any], max_workers: Optional[int] = None) -> list[Union[Any, Exception]]:
+        """
+        Calls the function on each item with a pool of threads, with at most `max_workers`
+        (SCOTCH_MAX_WORKERS by default) calls at once
+
+        :return: the results of the calls, in the same order as the items. When a call fails,
+        the exception raised is returned in its place
+        """
+        if not items:
+            return []
+
+        # The calls of the workers are summarized with those of the current request
+        run = for_worker(function)
+
+        def _call(item):
+            try:
+                return run(item)
+            except Exception as error:
+                return error
+
+        max_workers = max_workers or self.scotch.app.config["SCOTCH_MAX_WORKERS"]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(_call, items))
+
+    def _bulk(self, verb: str, payloads: list[bytes], max_workers: Optional[int] = None) -> list[Union[Any, Exception]]:
+        """
+        Sends the json payloads to the `__bulk_endpoint__` of the model, by chunks of `__bulk_chunk_size__`
+        (SCOTCH_BULK_CHUNK_SIZE by default) payloads, the chunks being sent concurrently
+
+        :return: the result of each payload: the matching item of the response when the API answers with
+        a list of results, the whole response otherwise, or the exception raised when the chunk failed
+        """
+        chunk_size = self.model.__bulk_chunk_size__ or self.scotch.app.config["SCOTCH_BULK_CHUNK_SIZE"]
+        chunks = []
+        for start in range(0, len(payloads), chunk_size):
+            end = start + chunk_size
+            chunks.append(payloads[start:end])
+
+        def _send_chunk(chunk):
+            return self._request(verb, self.model.__bulk_endpoint__, **self._payload(b"[" + b",".join(chunk) + b"]"))
+
+        results = []
+        for chunk, response in zip(chunks, self._map(_send_chunk, chunks, max_workers)):
+            if isinstance(response, list) and len(response) == len(chunk):
+                results.extend(response)
+            else:
+                results.extend([response] * len(chunk))
+        return results
+
+    def create_many(
+        self, entities: Iterable["RemoteModel"], max_workers: Optional[int] = None
+    ) -> list[Union["RemoteModel", Exception]]:
+        """
+        Creates several entities, with the `__bulk_endpoint__` of the model when it declares one,
+        or with concurrent requests otherwise (at most `max_workers` in flight, SCOTCH_MAX_WORKERS by default).
+
+        Exemple of use case
+
+        results = Car.api.create_many([Car(name="first"), Car(name="second")])
+        failed = [result for result in results if isinstance(result, Exception)]
+
+        :param entities: the entities to create
+        :param max_workers: the maximum number of requests in flight
+        :return: for each entity, in the same order, the entity or the exception raised when it failed to be created.
+        The entities that failed to be created keep their modified fields
+        """
+        entities = list(entities)
+        if self.model.__bulk_endpoint__ is None:
+            return self._map(self.create, entities, max_workers)
+
+        results = self._bulk("post", [self._body(entity) for entity in entities], max_workers)
+        created = [self._created(entity, res) for entity, res in zip(entities, results)]
+        succeeded = [entity for entity in created if not isinstance(entity, Exception)]
+        for entity in succeeded:
+            entity.mark_clean()
+        if succeeded:
+            self._invalidate()
+            mirror = self._ready_mirror()
+            if mirror is not None:
+                mirror.upsert(succeeded)
+        return created
+
+    def update_many(
+        self, entities: Iterable["RemoteModel"], max_workers: Optional[int] = None
+    ) -> list[Union[Any, Exception]]:
+        """
+        Updates several entities, see create_many. The entities whose update failed keep their modified fields
+
+        :param entities: the entities to update
+        :param max_workers: the maximum number of requests in flight
+        :return: for each entity, in the same order, the response of the API or the exception raised
+        """
+        entities = list(entities)
+        if self.model.__bulk_endpoint__ is None:
+            return self._map(self.update, entities, max_workers)
+
+        results = self._bulk("put", [self._body(entity) for entity in entities], max_workers)
+        updated = [entity for entity, res in zip(entities, results) if not self._failed(res)]
+        for entity in updated:
+            entity.mark_clean()
+            self._invalidate(entity.id)
+            self._identify(entity, replace=True)
+        mirror = self._ready_mirror()
+        if mirror is not None and updated:
+            mirror.upsert(updated)
+        return results
 
-    def update(self, entity: "RemoteModel"):
-        return self._request("put", str(entity.id), data=entity.json())
+    def delete_many(self, model_ids: Iterable[Any], max_workers: Optional[int] = None) -> list[Union[Any, Exception]]:
+        """
+        Deletes several entities, see create_many. The entities whose deletion failed are still cached
+
+        :param model_ids: the ids of the entities to delete
+        :param max_workers: the maximum number of requests in flight
+        :return: for each id, in the same order, the response of the API or the exception raised
+        """
+        model_ids = list(model_ids)
+        if self.model.__bulk_endpoint__ is None:
+            return self._map(self.delete, model_ids, max_workers)
+
+        dumps = self.scotch.serializer.dumps
+        results = self._bulk("delete", [dumps(model_id) for model_id in model_ids], max_workers)
+        mirror = self._ready_mirror()
+        for model_id, res in zip(model_ids, results):
+            if self._failed(res):
+                continue
+            self._invalidate(model_id)
+            self._forget(model_id)
+            if mirror is not None:
+                mirror.delete(model_id)
+        return results
+
+    def update(self, entity: "RemoteModel", partial: bool = False):
+        """
+        Updates the entity in the remote API
+
+        :param entity: the entity to update
+        :param partial: when True, only the fields changed since the entity was loaded are sent, with a PATCH request.
+        Nothing is sent when no field changed. Otherwise, the whole entity is sent with a PUT request
+        :return: the response of the API, None when nothing was sent
+        :raise requests.HTTPError: when the API rejects the update, the entity keeps its modified fields
+        """
+        if partial:
+            if not entity.changed_fields:
+                return None
+            body = self._body(entity, entity.changed_fields)
+            res = self._request("patch", str(entity.id), **self._payload(body))
+        else:
+            res = self._request("put", str(entity.id), **self._payload(self._body(entity)))
+        entity.mark_clean()
+        self._invalidate(entity.id)
+        self._identify(entity, replace=True)
+        self._mirror_write(entity)
+        return res
+
+    def _mirror_write(self, entity: "RemoteModel"):
+        """
+        Writes the entity saved in the remote API through to the local mirror, if any
+        """
+        mirror = self._ready_mirror()
+        if mirror is not None:
+            mirror.upsert([entity])
+
+    def _mirror_delete(self, model_id: Any):
+        mirror = self._ready_mirror()
+        if mirror is not None:
+            mirror.delete(model_id)
 
     def delete(self, model_id: int):
-        return self._request("delete", str(model_id))
+        res = self._request("delete", str(model_id))
+        self._invalidate(model_id)
+        self._forget(model_id)
+        self._mirror_delete(model_id)
+        return res
 
     def create(self, entity: "RemoteModel"):
-        res = self._request("post", data=entity.json())
-        if res.get("msg", None) == "Success":
-            return entity
-        raise ValueError("Failed to create entity")
+        # Raises when the API rejects the entity, which keeps its modified fields
+        res = self._request("post", **self._payload(self._body(entity)))
+        created = self._created(entity, res)
+        if isinstance(created, Exception):
+            raise created
+        self._invalidate()
+        entity.mark_clean()
+        self._mirror_write(entity)
+        return created
 
 
 class RemoteModel(BaseModel):
@@ -87,6 +878,48 @@ class RemoteModel(BaseModel):
     RemoteModel automatically adds an "id" attribute as a sort of primary key used to retrieve
     the object in the remote API as well as (if needed) in the local databse)
 
+    When the remote API can filter a collection on a list of ids (e.g. /computers/?id__in=1,2,3),
+    the name of this query parameter can be declared with `__bulk_filter__ = "id__in"`, so that
+    several entities are fetched with a single request
+
+    The responses of the remote API are cached for SCOTCH_CACHE_TTL seconds, which can be overridden
+    for a single model with `__cache_ttl__ = 60` (or disabled with `__cache_ttl__ = 0`)
+
+    The way the collection is paginated by the remote API, used by `Model.api.iter_all()`,
+    can be declared with `__pagination__ = "offset"` (see Pagination)
+
+    When the remote API can create, update or delete several entities at once, the path of this endpoint
+    can be declared with `__bulk_endpoint__ = "bulk"` (and its maximum number of entities per request with
+    `__bulk_chunk_size__`), so that create_many, update_many and delete_many send a list of entities
+    to /computers/bulk instead of one request per entity
+
+    The fields modified since the model was loaded are tracked, and `save()` only sends them to the remote API,
+    with a PATCH request. For the APIs that do not support PATCH, `__patch_updates__ = False` makes `save()`
+    send the whole entity with a PUT request instead. Note that only the assignments are tracked:
+    a list or a dict modified in place must be assigned again to be detected
+
+    A copy of the remote collection can be kept in a table of the local database with `__mirror__ = True`
+    (or the name of the table): once synchronized with `Computer.api.sync()`, `get` and `all` read the
+    entities from this table instead of requesting the remote API (see RemoteMirror)
+
+    Queries such as `Computer.api.filter(year__gte=2020).order_by("-year").limit(10)` are sent to the remote API
+    as query parameters, spelled as declared by the `__query_style__` of the model (see QueryStyle)
+
+    When the remote API is trusted, `__trust_responses__ = True` builds the entities from its responses
+    without validating them (with pydantic's `construct`), which is much faster, but leaves the values as sent
+    by the API: a date is kept as a string, a nested model as a dict
+
+    Within a Flask request, the entities loaded by `get`, `all` and the relationships are kept in an identity map
+    (see IdentityMap): an entity already loaded is not fetched again, and is always the same instance
+
+    The GET requests sent at the same time for the same URL (e.g. by several threads loading the same entity)
+    are coalesced into a single request, whose response is shared by all the callers. This can be disabled
+    with SCOTCH_COALESCE_REQUESTS, or for a single model with `__coalesce_requests__ = False`
+
+    The collection of a model declaring `__warmup__ = True` is loaded (and cached, or mirrored) when the application
+    starts (see SCOTCH_WARMUP), and the one of a model declaring `__refresh_interval__ = 300` is refreshed
+    in the background every 300 seconds, so that it does not expire (see RefreshScheduler)
+
     """
 
     class Config:
@@ -94,43 +927,106 @@ class RemoteModel(BaseModel):
         extra = Extra.allow
 
     __remote_directory__: str
+    __bulk_filter__: Optional[str] = None
+    __cache_ttl__: Optional[float] = None
+    __pagination__: Union[None, str, "Pagination"] = None
+    __bulk_endpoint__: Optional[str] = None
+    __bulk_chunk_size__: Optional[int] = None
+    __coalesce_requests__: Optional[bool] = None
+    __local_relationships__: ClassVar[dict[str, LocalRelationship]] = {}
+    __registry__: ClassVar[ModelRegistry] = ModelRegistry("RemoteModel")
     api: ApiAccessor
-    _proxies = PrivateAttr()
+    __patch_updates__: bool = True
+    __mirror__: Union[bool, str] = False
+    __mirror_updated_field__: Optional[str] = None
+    __mirror_since_param__: str = "updated_since"
+    __trust_responses__: bool = False
+    __query_style__: Optional["QueryStyle"] = None
+    __warmup__: bool = False
+    __refresh_interval__: Optional[float] = None
+    _api_accessor: ClassVar[ApiAccessor]
+    _aapi_accessor: ClassVar["AsyncApiAccessor"]
+    _lite_class: ClassVar[type[LiteRecord]]
+    _proxies: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _changed_fields: set[str] = PrivateAttr(default_factory=set)
 
     id: Optional[int]
 
+    def __init_subclass__(cls, **kwargs):
+        """
+        Registers the model, so that it can be referenced by its name in a RemoteRelationship,
+        and looks for the LocalRelationship of the model once, when the class is created, so that
+        instantiating the model does not have to search for them.
+        The relationships are removed from the pydantic fields: they are neither validated nor serialized,
+        and are resolved by __getattr__ when accessed
+        """
+        super().__init_subclass__(**kwargs)
+        cls.__registry__.register(cls)
+        relationships = dict(cls.__local_relationships__)
+        for key, field in list(cls.__fields__.items()):
+            if isinstance(field.default, LocalRelationship):
+                relationships[key] = field.default
+                del cls.__fields__[key]
+        cls.__local_relationships__ = relationships
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         assert (
             hasattr(self, "__remote_directory__") and self.__remote_directory__ is not None
         ), "A remote model must have a directory path set"
-        self._proxies = dict()
-        self.instantiate_local_models()
 
-    def instantiate_local_models(self):
-        from flask_scotch import LocalRelationship
+    @classmethod
+    def local_relationship(cls, key: str) -> LocalRelationship:
+        """
+        Retrieves the LocalRelationship declared with the given name
 
-        attributes = [key for key in dir(self) if not key.startswith("__")]
-        for key in attributes:
-            value = getattr(self, key)
-            if isinstance(value, LocalRelationship):
-                self._setup_proxy(key, value)
+        :param key: the name of the attribute
+        :return: LocalRelationship
+        """
+        if key not in cls.__local_relationships__:
+            raise ValueError(f"{cls.__name__}.{key} is not a LocalRelationship")
+        return cls.__local_relationships__[key]
 
-    def _setup_proxy(self, key, model):
-        delattr(self, key)
-        self._proxies[key] = model.get_query(self)
+    def set_local(self, key: str, value: Any):
+        """
+        Sets the loaded value of a LocalRelationship, so that it is not queried when accessed
+
+        :param key: the name of the relationship
+        :param value: the local object(s)
+        """
+        self._proxies[key] = value
+
+    def __setattr__(self, name, value):
+        if name not in self.__private_attributes__ and not name.startswith("_"):
+            self._changed_fields.add(name)
+        super().__setattr__(name, value)
+
+    @property
+    def changed_fields(self) -> set[str]:
+        """
+        The name of the fields modified since the model was loaded from (or last saved to) the remote API
+
+        :return: a set of field names
+        """
+        return set(self._changed_fields)
+
+    def mark_clean(self):
+        """
+        Forgets the modified fields, once they have been sent to the remote API
+        """
+        self._changed_fields.clear()
 
     def __getattr__(self, item):
-        if item in self._proxies:
-            instance = self._proxies[item]()
-            setattr(self, item, instance)
-            return instance
+        relationship = self.__local_relationships__.get(item)
+        if relationship is not None:
+            if item not in self._proxies:
+                self._proxies[item] = relationship.get_query(self)()
+            return self._proxies[item]
 
         return super().__getattr__(item)
 
     @classmethod  # type: ignore
     @property
-    @lru_cache
     def api(cls) -> ApiAccessor:
         """
         Access to the object used to query the remote API,
@@ -138,16 +1034,52 @@ class RemoteModel(BaseModel):
 
         :return: ApiAccessor
         """
-        accessor = ApiAccessor(cls)
+        # Kept on the class itself (not inherited by the subclasses), so that it does not keep the model alive
+        accessor = cls.__dict__.get("_api_accessor")
+        if accessor is None:
+            accessor = ApiAccessor(cls)
+            cls._api_accessor = accessor
         return accessor
 
-    def update(self):
+    @classmethod  # type: ignore
+    @property
+    def aapi(cls) -> "AsyncApiAccessor":
+        """
+        Asynchronous version of the api accessor, to use from async views:
+
+        car = await Car.aapi.get(1)
+
+        :return: AsyncApiAccessor
+        """
+        from .AsyncApiAccessor import AsyncApiAccessor
+
+        accessor = cls.__dict__.get("_aapi_accessor")
+        if accessor is None:
+            accessor = AsyncApiAccessor(cls)
+            cls._aapi_accessor = accessor
+        return accessor
+
+    def update(self, partial: bool = False):
         """
         Creates and sends an HTTP request to update the data to the remote API
 
+        :param partial: only send the modified fields, with a PATCH request, see ApiAccessor.update
         :return:
         """
-        return self.api.update(self)
+        return self.api.update(self, partial)
+
+    def save(self):
+        """
+        Sends the fields modified since the model was loaded to the remote API,
+        with a PATCH request, or with a PUT request of the whole entity when the model
+        sets `__patch_updates__ = False`.
+        Does nothing when no field has been modified
+
+        :return: the response of the API, None when nothing was sent
+        """
+        if not self._changed_fields:
+            return None
+        return self.api.update(self, partial=self.__patch_updates__)
 
     def delete(self):
         """
@@ -156,3 +1088,29 @@ class RemoteModel(BaseModel):
         :return:
         """
         return self.api.delete(self.id)
+
+
+def prefetch_local(entities: Iterable[Any], *keys: str) -> list[Any]:
+    """
+    Loads the local objects of the given relationships for all the entities at once,
+    with one database query per relationship rather than one query per entity.
+
+    Exemple of use case
+
+    storages = prefetch_local(Storage.api.all(), "items")
+    # or
+    storages = Storage.api.all(prefetch=["items"])
+
+    for storage in storages:
+        print(storage.items)  # No more query sent
+
+    :param entities: the RemoteModel instances (or their LiteRecord)
+    :param keys: the name of the LocalRelationship attributes to load
+    :return: the entities, as a list
+    """
+    entities = list(entities)
+    if not entities:
+        return entities
+    for key in keys:
+        type(entities[0]).local_relationship(key).prefetch(entities)
+    return entities
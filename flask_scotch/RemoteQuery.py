@@ -0,0 +1,235 @@
+import copy
+import datetime
+from typing import Any, Iterator, NoReturn, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .RemoteModel import ApiAccessor, RemoteModel
+
+
+class QueryStyle:
+    """
+    How the remote API spells the filters, the projection, the sorting and the limits of a query,
+    declared on a model with `__query_style__`.
+
+    The default style is the one of django-rest-framework and django-filter:
+    /cars/?color=red&price__lte=100&fields=id,name&ordering=-price&limit=10&offset=20
+
+    Exemple of use case, for an API expecting /cars/?filter[price][lte]=100&sort=-price&page[size]=10
+
+    class Car(RemoteModel):
+        __remote_directory__ = "cars"
+        __query_style__ = QueryStyle(
+            filter_format="filter[{field}]",
+            operator_format="filter[{field}][{operator}]",
+            order_param="sort",
+            limit_param="page[size]",
+            offset_param="page[offset]",
+        )
+    """
+
+    def __init__(
+        self,
+        filter_format: str = "{field}",
+        operator_format: str = "{field}__{operator}",
+        operators: Optional[dict[str, str]] = None,
+        fields_param: Optional[str] = "fields",
+        order_param: Optional[str] = "ordering",
+        limit_param: Optional[str] = "limit",
+        offset_param: Optional[str] = "offset",
+        count_header: Optional[str] = "X-Total-Count",
+        separator: str = ",",
+    ):
+        """
+        :param filter_format: the name of the parameter filtering a field on its value
+        :param operator_format: the name of the parameter filtering a field with an operator (price__lte=100)
+        :param operators: the name given by the remote API to the operators, when it differs, e.g. {"lte": "max"}
+        :param fields_param: the parameter listing the fields to send, None when the API does not support it
+        :param order_param: the parameter listing the fields to sort by, None when the API does not support it
+        :param limit_param: the parameter limiting the number of entities sent
+        :param offset_param: the parameter skipping the first entities
+        :param count_header: the header of the response holding the total number of entities, used by `count`
+        :param separator: the separator of the values of a list
+        """
+        self.filter_format = filter_format
+        self.operator_format = operator_format
+        self.operators = operators or {}
+        self.fields_param = fields_param
+        self.order_param = order_param
+        self.limit_param = limit_param
+        self.offset_param = offset_param
+        self.count_header = count_header
+        self.separator = separator
+
+    def filter_param(self, lookup: str) -> str:
+        """
+        :param lookup: the name of a keyword argument of `filter`: the field, and optionally the operator (price__lte)
+        :return: the name of the query parameter
+        """
+        field, _, operator = lookup.partition("__")
+        if not operator:
+            return self.filter_format.format(field=field)
+        return self.operator_format.format(field=field, operator=self.operators.get(operator, operator))
+
+    def format_value(self, value: Any) -> str:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return self.separator.join(self.format_value(item) for item in value)
+        return str(value)
+
+    @staticmethod
+    def unsupported(name: str, feature: str) -> NoReturn:
+        raise ValueError(f"The remote API does not support {feature}: the {name} parameter of the query style is None")
+
+
+class RemoteQuery:
+    """
+    Lazily evaluated query on the collection of a remote model, compiled to query parameters so that
+    the remote API only sends the entities (and the fields) needed.
+    Each method returns a new query, the request is only sent when the query is evaluated: when iterated,
+    or with `all`, `first` or `count`.
+
+    Exemple of use case
+
+    cheap = Car.api.filter(color="red", price__lte=100).order_by("-price")
+    for car in cheap.limit(10):
+        print(car.name)
+
+    names = [car.name for car in Car.api.filter(color="red").only("name")]
+    most_expensive = Car.api.order_by("-price").first()
+    count = Car.api.filter(color="red").count()
+    """
+
+    def __init__(self, accessor: "ApiAccessor"):
+        self.accessor = accessor
+        self.style: QueryStyle = accessor.model.__query_style__ or QueryStyle()
+        self._filters: dict[str, Any] = {}
+        self._fields: tuple[str, ...] = ()
+        self._ordering: tuple[str, ...] = ()
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._result: Optional[list["RemoteModel"]] = None
+
+    def _clone(self, **changes: Any) -> "RemoteQuery":
+        query = RemoteQuery.__new__(RemoteQuery)
+        query.__dict__.update(self.__dict__, _result=None)
+        for name, value in changes.items():
+            setattr(query, f"_{name}", value)
+        return query
+
+    def filter(self, **filters: Any) -> "RemoteQuery":
+        """
+        :param filters: the values of the fields (color="red"), or of their operators (price__lte=100)
+        :return: the filtered query
+        """
+        return self._clone(filters={**self._filters, **filters})
+
+    def only(self, *fields: str) -> "RemoteQuery":
+        """
+        Requests only the given fields (and the id) of the entities. The entities are then not validated,
+        and the other fields are not set
+
+        :param fields: the name of the fields
+        :return: the projected query
+        """
+        if self.style.fields_param is None:
+            self.style.unsupported("fields_param", "projections")
+        return self._clone(fields=tuple(dict.fromkeys(("id", *fields))))
+
+    def order_by(self, *fields: str) -> "RemoteQuery":
+        """
+        :param fields: the name of the fields to sort by, prefixed with "-" for a descending order
+        :return: the sorted query
+        """
+        if self.style.order_param is None:
+            self.style.unsupported("order_param", "sorting")
+        return self._clone(ordering=fields)
+
+    def limit(self, limit: int) -> "RemoteQuery":
+        if self.style.limit_param is None:
+            self.style.unsupported("limit_param", "limits")
+        return self._clone(limit=limit)
+
+    def offset(self, offset: int) -> "RemoteQuery":
+        if self.style.offset_param is None:
+            self.style.unsupported("offset_param", "offsets")
+        return self._clone(offset=offset)
+
+    def params(self) -> dict[str, str]:
+        """
+        :return: the query parameters sent to the remote API
+        """
+        style = self.style
+        params = {style.filter_param(lookup): style.format_value(value) for lookup, value in self._filters.items()}
+        if self._fields and style.fields_param is not None:
+            params[style.fields_param] = style.separator.join(self._fields)
+        if self._ordering and style.order_param is not None:
+            params[style.order_param] = style.separator.join(self._ordering)
+        if self._limit is not None and style.limit_param is not None:
+            params[style.limit_param] = str(self._limit)
+        if self._offset is not None and style.offset_param is not None:
+            params[style.offset_param] = str(self._offset)
+        return params
+
+    def url(self) -> str:
+        return self.accessor._build_url("", self.params() or None)
+
+    def all(self) -> list["RemoteModel"]:
+        """
+        Sends the query, once: the entities are kept, and returned again when the query is evaluated again
+
+        :return: the entities
+        """
+        if self._result is None:
+            if self._fields:
+                # Partial entities: not validated, and not shared with the entities loaded in full
+                items = self.accessor._request("get", url_params=self.params())
+                self._result = [self.accessor.model.construct(**copy.deepcopy(item)) for item in items]
+            else:
+                self._result = self.accessor.all(url_params=self.params() or None)
+        return self._result
+
+    def first(self) -> Optional["RemoteModel"]:
+        """
+        :return: the first entity of the query, None when there is none
+        """
+        if self._result is not None:
+            return self._result[0] if self._result else None
+        # The whole result is requested when the remote API cannot limit it
+        entities = self.limit(1).all() if self.style.limit_param is not None else self.all()
+        return entities[0] if entities else None
+
+    def count(self) -> int:
+        """
+        The number of entities matching the query, read from the `count_header` of the response to
+        a request of a single entity when the remote API sends it, counted from the ids of the entities otherwise
+
+        :return: int
+        :raise requests.HTTPError: when the remote API answers with an error status (4xx, 5xx)
+        """
+        if self._result is not None:
+            return len(self._result)
+        header = self.style.count_header
+        if header is not None and self.style.limit_param is not None:
+            query = self._clone(limit=1, offset=None, ordering=())
+            total = self.accessor._checked_get(query.url()).headers.get(header)
+            if total is not None:
+                remaining = max(int(total) - (self._offset or 0), 0)
+                return remaining if self._limit is None else min(remaining, self._limit)
+        if self.style.fields_param is not None:
+            return len(self.only().all())
+        return len(self.all())
+
+    def __iter__(self) -> Iterator["RemoteModel"]:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        return len(self.all())
+
+    def __bool__(self) -> bool:
+        return bool(self.all())
+
+    def __repr__(self) -> str:
+        return f"<RemoteQuery {self.url()}>"
@@ -1,6 +1,6 @@
-from functools import lru_cache
-from typing import Optional, Any, Union
+from typing import Optional, Any, Union, Iterable
 
+from flask_scotch.Instrumentation import loading_relationship
 from flask_scotch.utils import remote_model_from_name
 
 
@@ -35,17 +35,57 @@ class RemoteRelationship:
 
         self.remote_model = remote_model
         self._key_attribute = key_attribute
+        self.name: Optional[str] = None
+        self.owner_name: Optional[str] = None
+        self._resolved_class: Optional[type[Any]] = None
 
     def __set_name__(self, owner, name):
+        self.name = name
+        self.owner_name = owner.__name__
         self._key_attribute = self._key_attribute or f"{name}_id"
 
-    @lru_cache
     def _remote_class(self):
-        return remote_model_from_name(self.remote_model)
+        # Resolved on first use, so that the model can be declared after the relationship
+        if self._resolved_class is None:
+            self._resolved_class = remote_model_from_name(self.remote_model)
+        return self._resolved_class
 
     def retrieve_object(self, id_value: Optional[str]):
         return None if id_value is None else self._remote_class().api.get(id_value)
 
+    def load(self, instance: Any):
+        """
+        Returns the remote object of the given local instance, fetching it only when it was not already
+        fetched (or prefetched) for the current value of the key attribute
+
+        :param instance: the LocalModel instance that owns the relationship
+        :return: the remote model instance, or None
+        """
+        id_value = getattr(instance, self.key_attribute())
+        loaded = instance.__dict__.setdefault("_remote_objects", {})
+        if self.name in loaded and loaded[self.name][0] == id_value:
+            return loaded[self.name][1]
+        with loading_relationship(f"{self.owner_name}.{self.name}"):
+            remote_object = self.retrieve_object(id_value)
+        loaded[self.name] = (id_value, remote_object)
+        return remote_object
+
+    def prefetch(self, instances: Iterable[Any]):
+        """
+        Fetches the remote objects of all the given local instances at once, instead of
+        sending one request per instance when the attribute is accessed
+
+        :param instances: the LocalModel instances that owns the relationship
+        """
+        instances = list(instances)
+        ids = {getattr(instance, self.key_attribute()) for instance in instances}
+        ids.discard(None)
+        found = self._remote_class().api.fetch_many(ids)
+        for instance in instances:
+            id_value = getattr(instance, self.key_attribute())
+            loaded = instance.__dict__.setdefault("_remote_objects", {})
+            loaded[self.name] = (id_value, found.get(id_value))
+
     def key_attribute(self):
         if self._key_attribute is None:
             raise ValueError("Attribute used to retrieve the foreign model was not set on the Foreign Model")
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, NamedTuple, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .Serializer import Serializer
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    size: int
+    expires_at: float
+    tags: tuple[str, ...]
+    #: The headers of a conditional request revalidating the entry once expired: If-None-Match, If-Modified-Since
+    validators: tuple[tuple[str, str], ...] = ()
+    #: Until when the entry is still served once expired, while it is refreshed in the background
+    stale_until: float = 0.0
+
+    def is_servable(self, now: float) -> bool:
+        """
+        :return: whether the expired entry can still be used: served, or revalidated
+        """
+        return bool(self.validators) or self.stale_until > now
+
+
+class ResponseCache:
+    """
+    Thread-safe cache of the responses of the remote API, used by the ApiAccessor.
+
+    Each entry expires after its own time to live, and the least recently used entries are evicted
+    once the cache holds more than `max_entries` entries or more than `max_bytes` bytes.
+    Entries can be tagged, so that a group of entries (e.g. all the collections of a model) can be
+    invalidated at once.
+    Entries stored with validators (e.g. the ETag of the response) are kept once expired, until evicted,
+    so that they can be revalidated with a conditional request and reused when they did not change.
+    Entries stored with a `stale_ttl` are kept for that long once expired, so that they can be served
+    while they are refreshed (stale-while-revalidate), or while the remote API is unavailable.
+
+    Exemple of use case
+
+    cache = ResponseCache(max_entries=100)
+    cache.set("http://localhost/cars/1", {"id": 1}, ttl=60, size=9)
+    cache.get("http://localhost/cars/1")
+
+    cache.stats()["hits"]
+
+    The entries are held in the memory of the process, the SqliteCache shares them between the processes of a host.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 1024, max_bytes: Optional[int] = None):
+        """
+        :param max_entries: the maximum number of entries kept, unbounded when None
+        :param max_bytes: the maximum total size of the entries kept, unbounded when None
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def from_config(
+        cls, config: dict[str, Any], serializer: "Serializer", instance_path: Optional[str] = None
+    ) -> "ResponseCache":
+        """
+        Creates the cache selected by the SCOTCH_CACHE_BACKEND config: "memory" (the default), "sqlite"
+        (a SqliteCache stored at SCOTCH_CACHE_PATH), or a ResponseCache instance
+
+        :param config: the flask app configuration
+        :param serializer: the serializer of the extension, used by the caches storing encoded values
+        :param instance_path: the instance folder of the flask app, holding the "sqlite" cache when
+        SCOTCH_CACHE_PATH is None
+        :return: ResponseCache
+        """
+        backend = config["SCOTCH_CACHE_BACKEND"]
+        max_entries, max_bytes = config["SCOTCH_CACHE_MAX_ENTRIES"], config["SCOTCH_CACHE_MAX_BYTES"]
+        if isinstance(backend, ResponseCache):
+            return backend
+        if backend == "memory":
+            return cls(max_entries, max_bytes)
+        if backend == "sqlite":
+            from .SqliteCache import SqliteCache
+
+            cache_path = config["SCOTCH_CACHE_PATH"]
+            if cache_path is None:
+                if instance_path is None:
+                    raise ValueError("The sqlite cache backend requires a SCOTCH_CACHE_PATH")
+                # A database per application, rather than a predictable path shared by all the users of the host
+                os.makedirs(instance_path, exist_ok=True)
+                cache_path = os.path.join(instance_path, "scotch-cache.sqlite")
+            return SqliteCache(cache_path, max_entries, max_bytes, serializer)
+        raise ValueError(f"Unknown cache backend {backend}, expected memory, sqlite or a ResponseCache instance")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        :param key: the key of the entry
+        :param default: the value returned when the entry is missing or expired
+        :return: the value of the entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry.expires_at <= now:
+                if not entry.is_servable(now):
+                    self._remove(key)
+                    self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float,
+        size: int = 0,
+        tags: Iterable[str] = (),
+        validators: Iterable[tuple[str, str]] = (),
+        stale_ttl: float = 0.0,
+    ):
+        """
+        :param key: the key of the entry
+        :param value: the value to cache
+        :param ttl: the time to live of the entry, in seconds
+        :param size: the size of the entry in bytes, used to respect the `max_bytes` budget
+        :param tags: the tags of the entry, see invalidate_tag
+        :param validators: the headers of the conditional request revalidating the entry, see stale
+        :param stale_ttl: how long (in seconds) the entry is kept once expired, see stale
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + ttl
+            self._entries[key] = CacheEntry(
+                value, size, expires_at, tuple(tags), tuple(validators), expires_at + stale_ttl
+            )
+            self._bytes += size
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def stale(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        :param key: the key of the entry
+        :return: the entry, even expired, when it can be revalidated (it has validators)
+        or is still in its stale time to live
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry if entry is not None and entry.is_servable(time.monotonic()) else None
+
+    def refresh(self, key: Hashable, ttl: float):
+        """
+        Makes a revalidated entry fresh again, for another time to live
+
+        :param key: the key of the entry
+        :param ttl: the time to live of the entry, in seconds
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at = time.monotonic() + ttl
+                self._entries[key] = entry._replace(
+                    expires_at=expires_at, stale_until=expires_at + entry.stale_until - entry.expires_at
+                )
+                self._entries.move_to_end(key)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._counters["invalidations"] += 1
+
+    def invalidate_tag(self, tag: str):
+        """
+        Removes all the entries tagged with the given tag
+
+        :param tag: the tag of the entries to remove
+        """
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if tag in entry.tags]:
+                self._remove(key)
+                self._counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Counters of the cache: hits, misses, evictions (entries removed to respect the limits),
+        expirations, invalidations, as well as the current number of entries and of bytes
+
+        :return: a dict of counters
+        """
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
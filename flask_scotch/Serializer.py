@@ -0,0 +1,88 @@
+import json
+from functools import partial
+from typing import Any, Optional, Union, TYPE_CHECKING
+
+from pydantic.json import custom_pydantic_encoder, pydantic_encoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+if TYPE_CHECKING:
+    from .RemoteModel import RemoteModel
+
+
+class Serializer:
+    """
+    Way of decoding the responses of the remote API and of encoding the bodies of the requests,
+    selected with the SCOTCH_JSON_BACKEND config.
+
+    The default implementation uses the json module of the standard library.
+    """
+
+    content_type = "application/json"
+
+    def loads(self, content: bytes) -> Any:
+        """
+        :param content: the raw body of a response
+        :return: the decoded json
+        """
+        return json.loads(content)
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        :param value: a json serializable value
+        :return: the encoded json
+        """
+        return json.dumps(value, default=pydantic_encoder).encode()
+
+    def dump_model(self, entity: "RemoteModel", include: Optional[set[str]] = None) -> bytes:
+        """
+        :param entity: the entity to send to the remote API
+        :param include: the fields to send, all of them when None
+        :return: the encoded json
+        """
+        return entity.json(include=include).encode()
+
+
+class OrjsonSerializer(Serializer):
+    """
+    Serializer using orjson, which decodes and encodes json several times faster than the standard library,
+    directly from and to bytes
+    """
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The orjson json backend requires orjson to be installed")
+
+    def loads(self, content: bytes) -> Any:
+        return orjson.loads(content)
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=pydantic_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+    def dump_model(self, entity: "RemoteModel", include: Optional[set[str]] = None) -> bytes:
+        encoders = entity.__config__.json_encoders
+        default = partial(custom_pydantic_encoder, encoders) if encoders else pydantic_encoder
+        return orjson.dumps(entity.dict(include=include), default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+SERIALIZERS: dict[str, type[Serializer]] = {
+    "json": Serializer,
+    "orjson": OrjsonSerializer,
+}
+
+
+def get_serializer(backend: Union[None, str, Serializer]) -> Serializer:
+    """
+    :param backend: a Serializer instance, the name of one of the SERIALIZERS, or None for the standard library
+    :return: Serializer
+    """
+    if backend is None:
+        return Serializer()
+    if isinstance(backend, str):
+        if backend not in SERIALIZERS:
+            raise ValueError(f"Unknown json backend {backend}, expected one of {', '.join(SERIALIZERS)}")
+        return SERIALIZERS[backend]()
+    return backend
@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, AsyncGenerator, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+Timeout = Union[None, float, tuple[Optional[float], Optional[float]]]
+
+
+class SessionPool:
+    """
+    Pool of keep-alive HTTP connections shared by all the ApiAccessor of an application.
+
+    A single HTTPAdapter (and so a single urllib3 connection pool per host) is shared by every thread,
+    while each thread gets its own requests.Session mounted on this adapter, since sessions themselves
+    are not meant to be shared between threads.
+    This makes the pool safe to use from the threads of a threaded WSGI server, while still reusing
+    the TCP/TLS connections opened by the other threads.
+
+    Exemple of use case
+
+    pool = SessionPool(pool_maxsize=20, timeout=(3, 10), max_retries=2)
+    response = pool.request("get", "http://localhost/cars/1")
+
+    pool.stats()["reused"]
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        timeout: Timeout = None,
+        max_retries: int = 0,
+        backoff_factor: float = 0.0,
+    ):
+        """
+        :param pool_connections: the number of hosts for which a connection pool is kept
+        :param pool_maxsize: the maximum number of connections kept open for a single host
+        :param pool_block: when all the connections of a host are in use, wait for one to be released
+        instead of opening a new (non reusable) connection
+        :param timeout: the default (connect, read) timeout used when none is given to the request
+        :param max_retries: how many times a failed connection or a 502/503/504 response is retried
+        :param backoff_factor: the exponential backoff factor applied between two retries
+        """
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry,
+        )
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "SessionPool":
+        """
+        Creates the pool from the SCOTCH_* keys of the flask configuration
+
+        :param config: the flask app configuration
+        :return: SessionPool
+        """
+        return cls(
+            pool_connections=config["SCOTCH_POOL_CONNECTIONS"],
+            pool_maxsize=config["SCOTCH_POOL_MAXSIZE"],
+            pool_block=config["SCOTCH_POOL_BLOCK"],
+            timeout=(config["SCOTCH_CONNECT_TIMEOUT"], config["SCOTCH_READ_TIMEOUT"]),
+            max_retries=config["SCOTCH_MAX_RETRIES"],
+            backoff_factor=config["SCOTCH_RETRY_BACKOFF"],
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        The session of the current thread, created on first access
+
+        :return: requests.Session
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            self._local.session = session
+        return session
+
+    def request(self, verb: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(verb.upper(), url, **kwargs)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Counters of the underlying connection pools, to check that the connections are reused.
+
+        - hosts: the number of hosts with an open connection pool
+        - connections: the number of connections opened so far
+        - requests: the number of requests sent so far
+        - reused: the number of requests sent over an already opened connection
+
+        :return: a dict of counters
+        """
+        pools = self.adapter.poolmanager.pools
+        hosts = connections = sent = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts += 1
+            connections += pool.num_connections
+            sent += pool.num_requests
+        return {"hosts": hosts, "connections": connections, "requests": sent, "reused": max(sent - connections, 0)}
+
+    def close(self):
+        self.adapter.close()
+
+
+class AsyncSessionPool:
+    """
+    Asynchronous equivalent of the SessionPool, based on httpx (installed with `pip install flask-scotch[async]`).
+
+    An httpx client can only be used by the event loop that created it, so one client (and so one pool
+    of connections) is kept per running event loop, and closed when the loop is shut down (by `asyncio.run`,
+    or at the end of an async view of Flask).
+
+    The connections are therefore only reused during the life of a loop: for the whole application under
+    a long-lived loop (Quart, an ASGI server), but only within a request for the async views of Flask, which
+    run each request in a new event loop (e.g. between the requests sent concurrently by `aapi.get_many`).
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        timeout: Timeout = None,
+        max_retries: int = 0,
+    ):
+        """
+        :param pool_maxsize: the maximum number of connections opened by a client
+        :param timeout: the default (connect, read) timeout used when none is given to the request
+        :param max_retries: how many times a failed connection is retried
+        """
+        if httpx is None:
+            raise ImportError("httpx is required to use the async api, install it with flask-scotch[async]")
+
+        self.limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            self.timeout = httpx.Timeout(read, connect=connect)
+        else:
+            self.timeout = httpx.Timeout(timeout)
+        self.max_retries = max_retries
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any] = weakref.WeakKeyDictionary()
+        # The client of each loop, and the generator closing it when the loop shuts down, see _close_on_shutdown
+        self._closers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[Any, AsyncGenerator]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "AsyncSessionPool":
+        return cls(
+            pool_maxsize=config["SCOTCH_POOL_MAXSIZE"],
+            timeout=(config["SCOTCH_CONNECT_TIMEOUT"], config["SCOTCH_READ_TIMEOUT"]),
+            max_retries=config["SCOTCH_MAX_RETRIES"],
+        )
+
+    @property
+    def client(self):
+        """
+        The client of the running event loop, created on first access
+
+        :return: httpx.AsyncClient
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=httpx.AsyncHTTPTransport(limits=self.limits, retries=self.max_retries),
+            )
+            self._clients[loop] = client
+        return client
+
+    @staticmethod
+    async def _close_on_shutdown(client) -> AsyncGenerator[None, None]:
+        # Suspended until the loop shuts down: the async generators still alive are then closed by
+        # loop.shutdown_asyncgens(), called by asyncio.run and by the loop of each async view of Flask
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+    async def request(self, verb: str, url: str, **kwargs):
+        client = self.client
+        loop = asyncio.get_running_loop()
+        closing, _ = self._closers.get(loop, (None, None))
+        if closing is not client:
+            # Kept here, the loop only holding a weak reference to its async generators
+            closer = self._close_on_shutdown(client)
+            self._closers[loop] = (client, closer)
+            await closer.__anext__()
+        return await client.request(verb.upper(), url, **kwargs)
+
+    async def aclose(self):
+        """
+        Closes the client of the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        _, closer = self._closers.pop(loop, (None, None))
+        if closer is not None:
+            # Closes its client
+            await closer.aclose()
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces the identical calls made at the same time: while a call for a given key is in flight,
+    the other callers asking for the same key wait for it and receive its result (or its exception),
+    instead of making the same call again.
+
+    Used by the accessors so that many threads (or tasks) requesting the same remote entity at once
+    only send a single request.
+
+    Exemple of use case
+
+    flights = SingleFlight()
+    payload = flights.do(url, lambda: session.get(url).json())
+    payload = await flights.ado(url, lambda: client.get(url))
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._async_flights: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[Hashable, asyncio.Future]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        :param key: the key identifying the call
+        :param function: the call to make when no identical call is in flight
+        :return: the result of the call
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    async def ado(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronous version of `do`, coalescing the calls made by the tasks of the running event loop
+
+        :param key: the key identifying the call
+        :param function: the coroutine function to call when no identical call is in flight
+        :return: the result of the call
+        """
+        loop = asyncio.get_running_loop()
+        flights = self._async_flights.setdefault(loop, {})
+        future = flights.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = flights[key] = loop.create_future()
+        try:
+            result = await function()
+        except BaseException as error:
+            future.set_exception(error)
+            # Retrieves the exception, so that it is not reported as never retrieved when nobody waited for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del flights[key]
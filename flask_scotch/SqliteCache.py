@@ -0,0 +1,250 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Hashable, Iterable, Iterator, Optional
+
+from .ResponseCache import CacheEntry, ResponseCache
+from .Serializer import Serializer
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS scotch_cache (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        compressed INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        stale_until REAL NOT NULL,
+        validators TEXT NOT NULL,
+        accessed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS scotch_cache_accessed_at ON scotch_cache (accessed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS scotch_cache_tag (
+        tag TEXT NOT NULL,
+        key TEXT NOT NULL REFERENCES scotch_cache (key) ON DELETE CASCADE,
+        PRIMARY KEY (tag, key)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS scotch_cache_tag_key ON scotch_cache_tag (key)",
+)
+
+
+class SqliteCache(ResponseCache):
+    """
+    Cache of the responses of the remote API stored in a SQLite database on the local disk, shared by all the
+    processes (e.g. the gunicorn workers) and threads of a host, selected with SCOTCH_CACHE_BACKEND = "sqlite".
+
+    A response fetched by a worker is then reused by all the others, and the invalidation of a response
+    (when an entity is created, updated or deleted) is visible to all of them as soon as its transaction is
+    committed. The values are encoded with the serializer of the extension, and compressed with zlib
+    when larger than `compress_min_size` bytes.
+
+    The expiration, the stale entries and the least recently used evictions work as in the in-memory cache,
+    using the wall clock rather than the monotonic clock of the process. The time of the last access to an entry
+    is only written once per second, so that most reads do not lock the database. The hits, misses, evictions,
+    expirations and invalidations counters of `stats` are those of the current process.
+
+    Exemple of use case
+
+    cache = SqliteCache("/tmp/scotch.sqlite", max_entries=10_000)
+    cache.set("http://localhost/cars/1", {"id": 1}, ttl=60, size=9)
+    cache.get("http://localhost/cars/1")
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        serializer: Optional[Serializer] = None,
+        compress_min_size: int = 1024,
+        timeout: float = 5.0,
+    ):
+        """
+        :param path: the path of the database file, created readable by the current user only
+        :param max_entries: the maximum number of entries kept, unbounded when None
+        :param max_bytes: the maximum total size of the entries kept, unbounded when None
+        :param serializer: encodes and decodes the values, the json module of the standard library when None
+        :param compress_min_size: the size (in bytes) of the encoded values from which they are compressed
+        :param timeout: how long (in seconds) to wait for the lock of the database held by another process
+        """
+        super().__init__(max_entries, max_bytes)
+        self.path = path
+        # Created before SQLite does, so that the responses cached are not readable by the other users of the host
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        self.serializer = serializer or Serializer()
+        self.compress_min_size = compress_min_size
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._transaction() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # A connection per thread, and per process: a connection must not be used after a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _encode(self, value: Any) -> tuple[bytes, bool]:
+        encoded = self.serializer.dumps(value)
+        if len(encoded) >= self.compress_min_size:
+            return zlib.compress(encoded, 1), True
+        return encoded, False
+
+    def _decode(self, value: bytes, compressed: bool) -> Any:
+        return self.serializer.loads(zlib.decompress(value) if compressed else value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT value, compressed, expires_at, stale_until, validators, accessed_at "
+            "FROM scotch_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is not None and row[2] <= now:
+            if row[4] == "[]" and row[3] <= now:
+                with self._transaction() as connection:
+                    connection.execute("DELETE FROM scotch_cache WHERE key = ? AND expires_at <= ?", (key, now))
+                with self._lock:
+                    self._counters["expirations"] += 1
+            row = None
+        if row is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            return default
+
+        if row[5] < now - 1:
+            self._connection.execute("UPDATE scotch_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self._counters["hits"] += 1
+        return self._decode(row[0], row[1])
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float,
+        size: int = 0,
+        tags: Iterable[str] = (),
+        validators: Iterable[tuple[str, str]] = (),
+        stale_ttl: float = 0.0,
+    ):
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        encoded, compressed = self._encode(value)
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM scotch_cache WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT INTO scotch_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, encoded, compressed, size, now + ttl, now + ttl + stale_ttl, json.dumps(list(validators)), now),
+            )
+            connection.executemany("INSERT INTO scotch_cache_tag VALUES (?, ?)", [(tag, key) for tag in set(tags)])
+            evicted = self._evict(connection)
+        if evicted:
+            with self._lock:
+                self._counters["evictions"] += evicted
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """
+        Removes the least recently used entries beyond the limits of the cache
+
+        :return: the number of entries removed
+        """
+        if self.max_entries is None and self.max_bytes is None:
+            return 0
+        entries, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scotch_cache").fetchone()
+        evicted: list[tuple[str]] = []
+        if (self.max_entries is not None and entries > self.max_entries) or (
+            self.max_bytes is not None and total > self.max_bytes
+        ):
+            for key, size in connection.execute("SELECT key, size FROM scotch_cache ORDER BY accessed_at"):
+                if (self.max_entries is None or entries - len(evicted) <= self.max_entries) and (
+                    self.max_bytes is None or total <= self.max_bytes
+                ):
+                    break
+                evicted.append((key,))
+                total -= size
+        connection.executemany("DELETE FROM scotch_cache WHERE key = ?", evicted)
+        return len(evicted)
+
+    def stale(self, key: Hashable) -> Optional[CacheEntry]:
+        row = self._connection.execute(
+            "SELECT value, compressed, size, expires_at, stale_until, validators FROM scotch_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        # The entries use the monotonic clock of the process, see ResponseCache
+        offset = time.monotonic() - time.time()
+        entry = CacheEntry(
+            value=self._decode(row[0], row[1]),
+            size=row[2],
+            expires_at=row[3] + offset,
+            tags=(),
+            validators=tuple((name, value) for name, value in json.loads(row[5])),
+            stale_until=row[4] + offset,
+        )
+        return entry if entry.is_servable(time.monotonic()) else None
+
+    def refresh(self, key: Hashable, ttl: float):
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE scotch_cache SET stale_until = ? + stale_until - expires_at, expires_at = ?, accessed_at = ? "
+                "WHERE key = ?",
+                (now + ttl, now + ttl, now, key),
+            )
+
+    def invalidate(self, key: Hashable):
+        with self._transaction() as connection:
+            removed = connection.execute("DELETE FROM scotch_cache WHERE key = ?", (key,)).rowcount
+        with self._lock:
+            self._counters["invalidations"] += removed
+
+    def invalidate_tag(self, tag: str):
+        with self._transaction() as connection:
+            removed = connection.execute(
+                "DELETE FROM scotch_cache WHERE key IN (SELECT key FROM scotch_cache_tag WHERE tag = ?)", (tag,)
+            ).rowcount
+        with self._lock:
+            self._counters["invalidations"] += removed
+
+    def clear(self):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM scotch_cache")
+
+    def stats(self) -> dict[str, int]:
+        entries, total = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scotch_cache"
+        ).fetchone()
+        with self._lock:
+            return dict(self._counters, entries=entries, bytes=total)
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM scotch_cache").fetchone()[0]
@@ -0,0 +1,145 @@
+import hashlib
+import hmac
+import time
+from functools import partial
+from typing import Any, Optional, TYPE_CHECKING
+
+from flask import Blueprint, Flask, abort, current_app, jsonify, request
+
+if TYPE_CHECKING:
+    from . import FlaskScotch
+    from .RemoteModel import RemoteModel
+
+SIGNATURE_HEADER = "X-Scotch-Signature"
+TIMESTAMP_HEADER = "X-Scotch-Timestamp"
+
+
+def sign_event(body: bytes, secret: str, timestamp: Optional[int] = None) -> dict[str, str]:
+    """
+    Signs the body of a change event, as expected by the webhook: an HMAC-SHA256 of the timestamp and the body
+
+    Exemple of use case, on the side of the remote API
+
+    body = json.dumps({"directory": "cars", "ids": [1, 2]}).encode()
+    requests.post("https://shop.com/scotch/webhook", data=body, headers=sign_event(body, secret))
+
+    :param body: the raw body of the request
+    :param secret: the secret shared with the application, its SCOTCH_WEBHOOK_SECRET
+    :param timestamp: the unix time of the event, now when None
+    :return: the headers of the request
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return {TIMESTAMP_HEADER: str(timestamp), SIGNATURE_HEADER: f"sha256={digest}"}
+
+
+def _verify_signature(body: bytes, secret: str, tolerance: float) -> bool:
+    timestamp = request.headers.get(TIMESTAMP_HEADER, "")
+    signature = request.headers.get(SIGNATURE_HEADER, "")
+    if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > tolerance:
+        return False
+    expected = sign_event(body, secret, int(timestamp))[SIGNATURE_HEADER]
+    return hmac.compare_digest(expected, signature)
+
+
+def _models(directory: str) -> list[type["RemoteModel"]]:
+    from .RemoteModel import RemoteModel
+
+    return [model for model in RemoteModel.__registry__.models() if model.__remote_directory__ == directory]
+
+
+def _refresh(app: Flask, model: type["RemoteModel"], ids: Optional[list[Any]], deleted: bool):
+    """
+    Brings the local mirror of the model up to date with the change, and fetches the changed entities
+    (or collection) again when SCOTCH_WEBHOOK_REFRESH is enabled, so that the next requests find them in the cache
+    """
+    with app.app_context():
+        api = model.api
+        mirror = api._ready_mirror()
+        if ids is None:
+            if mirror is not None:
+                mirror.sync()
+            elif app.config["SCOTCH_WEBHOOK_REFRESH"]:
+                api._request("get")
+            return
+
+        if deleted:
+            for model_id in ids:
+                if mirror is not None:
+                    mirror.delete(model_id)
+            return
+        if mirror is None and not app.config["SCOTCH_WEBHOOK_REFRESH"]:
+            return
+        fetched = api._map(lambda model_id: api._parse(api._request("get", str(model_id))), ids)
+        if mirror is not None:
+            mirror.upsert([entity for entity in fetched if not isinstance(entity, Exception)])
+
+
+def _handle(scotch: "FlaskScotch", app: Flask, event: Any) -> bool:
+    """
+    :param event: {"directory": "cars", "ids": [1, 2], "deleted": false}, or {"directory": "cars"} when the whole
+    collection changed
+    :return: whether a remote model of this directory is declared
+    """
+    if not isinstance(event, dict) or not isinstance(event.get("directory"), str):
+        abort(400, "A change event must be an object with a directory")
+    ids = event.get("ids")
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(model_id, (int, str)) for model_id in ids)):
+        abort(400, "The ids of a change event must be a list of numbers or strings")
+    deleted = bool(event.get("deleted", False))
+
+    models = _models(event["directory"])
+    for model in models:
+        api = model.api
+        if ids is None:
+            scotch.cache.invalidate_tag(api._model_tag)
+        else:
+            for model_id in ids:
+                api._invalidate(model_id)
+                api._forget(model_id)
+        if model.__mirror__ or app.config["SCOTCH_WEBHOOK_REFRESH"]:
+            key = ("webhook", model, None if ids is None else tuple(ids), deleted)
+            scotch.run_in_background(key, partial(_refresh, app, model, ids, deleted))
+    return bool(models)
+
+
+def webhook_blueprint(scotch: "FlaskScotch", url: str) -> Blueprint:
+    """
+    The blueprint receiving the change events pushed by the remote API, registered by `init_app`
+    at SCOTCH_WEBHOOK_URL when a SCOTCH_WEBHOOK_SECRET is configured.
+
+    The body of an event is a json object (or a list of them) naming the remote directory of a model,
+    and either the ids of the entities changed (created, updated, or deleted with "deleted": true),
+    or no ids when the whole collection changed:
+
+    {"directory": "cars", "ids": [1, 2]}
+    {"directory": "cars", "ids": [3], "deleted": true}
+    {"directory": "cars"}
+
+    Each request must be signed with the secret (see sign_event) less than SCOTCH_WEBHOOK_TOLERANCE seconds ago.
+    Note that the event only reaches the worker receiving it: with several workers, the cache must be shared
+    by all of them (e.g. SCOTCH_CACHE_BACKEND = "sqlite") for the invalidations to be seen by the others.
+    The cached responses of the changed entities (and the collections of the model) are invalidated right away,
+    while the local mirror of the model (if any) is updated in the background. With SCOTCH_WEBHOOK_REFRESH,
+    the changed entities are also fetched again in the background, so that the next requests find them cached.
+
+    :param scotch: the extension
+    :param url: the url of the webhook
+    :return: Blueprint
+    """
+    blueprint = Blueprint("scotch_webhook", __name__)
+
+    @blueprint.route(url, methods=["POST"])
+    def receive_change_events():
+        app = current_app._get_current_object()  # type: ignore
+        config = app.config
+        body = request.get_data()
+        if not _verify_signature(body, config["SCOTCH_WEBHOOK_SECRET"], config["SCOTCH_WEBHOOK_TOLERANCE"]):
+            abort(401, "Invalid signature")
+
+        payload = request.get_json(force=True, silent=True)
+        events = payload if isinstance(payload, list) else [payload]
+        unknown = [event["directory"] for event in events if not _handle(scotch, app, event)]
+        return jsonify({"events": len(events), "unknown": unknown})
+
+    return blueprint
@@ -1,11 +1,32 @@
-from typing import Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
 
 from flask import Flask
 
-from .RemoteModel import RemoteModel
+from .RemoteModel import RemoteModel, ApiAccessor, prefetch_local
+from .AsyncApiAccessor import AsyncApiAccessor
+from .CircuitBreaker import CircuitBreaker, CircuitOpenError
+from .RateLimiter import RateLimiter
 from .RemoteRelationship import RemoteRelationship
 from .LocalRelationship import LocalRelationship
-from .LocalModel import LocalModel
+from .LocalModel import LocalModel, prefetch_remote
+from .SessionPool import SessionPool, AsyncSessionPool
+from .ModelRegistry import ModelRegistry
+from .IdentityMap import IdentityMap
+from .LiteRecord import LiteRecord, lite_class
+from .Instrumentation import Instrumentation, RemoteCall, RequestSummary, remote_call, request_summary
+from .MetricsSink import MetricsSink, StatsdSink, PrometheusSink
+from .RemoteMirror import RemoteMirror
+from .ResponseCache import ResponseCache
+from .SqliteCache import SqliteCache
+from .Serializer import Serializer, OrjsonSerializer, get_serializer
+from .SingleFlight import SingleFlight
+from .Webhook import webhook_blueprint, sign_event
+from .RemoteQuery import RemoteQuery, QueryStyle
+from .RefreshScheduler import RefreshScheduler
+from .Pagination import Pagination, OffsetPagination, PagePagination, CursorPagination, LinkPagination
+from .utils import remote_model_from_name
 
 __version__ = "0.0.2"
 
@@ -31,6 +52,19 @@ class FlaskScotch:
         self.app = app
         self.api_url = api_url
         self.sql_engine = sql_engine
+        self.session_pool: Optional[SessionPool] = None
+        self._async_session_pool: Optional[AsyncSessionPool] = None
+        self.cache: ResponseCache = ResponseCache()
+        self.single_flight = SingleFlight()
+        self.instrumentation = Instrumentation()
+        self.serializer: Serializer = Serializer()
+        self.circuit_breakers: dict[str, CircuitBreaker] = {}
+        self.rate_limiters: dict[str, RateLimiter] = {}
+        self.refresh_scheduler: Optional[RefreshScheduler] = None
+        self._warm_up_requested = False
+        self._background: dict[Hashable, Future] = {}
+        self._background_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
 
         if app is not None:
             self.init_app(app)
@@ -43,6 +77,77 @@ class FlaskScotch:
         Configures the missing pieces of the extension if needed base on the given app instance
         Tries to get the alchemy engine in the extensions dictionary.
         Also tries to configure the api url if it has not already been done
+        and creates the pool of HTTP connections used by all the remote models
+
+        The pool can be configured with the following keys:
+            - SCOTCH_POOL_CONNECTIONS: number of hosts for which connections are kept open
+            - SCOTCH_POOL_MAXSIZE: maximum number of connections kept open for a single host
+            - SCOTCH_POOL_BLOCK: wait for a free connection instead of opening a new one when the pool is full
+            - SCOTCH_CONNECT_TIMEOUT, SCOTCH_READ_TIMEOUT: default timeouts (in seconds) of a request
+            - SCOTCH_MAX_RETRIES, SCOTCH_RETRY_BACKOFF: retries of failed connections and 502/503/504 responses
+
+        And the fetching of several entities at once with:
+            - SCOTCH_MAX_WORKERS: maximum number of concurrent requests sent by a single call
+            - SCOTCH_BULK_CHUNK_SIZE: maximum number of ids sent in a single bulk request
+            - SCOTCH_SQL_CHUNK_SIZE: maximum number of ids sent in a single `IN` query to the database
+
+        And the cache of the responses of the remote API with:
+            - SCOTCH_CACHE_TTL: default time to live of the responses, in seconds (disabled when 0)
+            - SCOTCH_CACHE_MAX_ENTRIES, SCOTCH_CACHE_MAX_BYTES: limits of the cache, the least recently used
+            responses are evicted beyond them
+            - SCOTCH_CACHE_BACKEND: "memory" (a cache per process), "sqlite" (a cache shared by the processes
+            of the host, see SqliteCache) or a ResponseCache instance
+            - SCOTCH_CACHE_PATH: the path of the database of the "sqlite" cache, in the instance folder of the app
+            when None
+            - SCOTCH_CACHE_STALE_TTL: how long (in seconds) an expired response is still served right away,
+            while it is refreshed in the background, or while the remote API fails (5xx, unreachable, open circuit)
+            - SCOTCH_COALESCE_REQUESTS: send a single request for the identical GET requests made at the same time
+
+        And the circuit breakers stopping the calls to a failing remote API (see CircuitBreaker) with:
+            - SCOTCH_CIRCUIT_BREAKER: enables the circuit breakers
+            - SCOTCH_CIRCUIT_SCOPE: "host" (a circuit per host of the remote API) or "model" (a circuit per model)
+            - SCOTCH_CIRCUIT_FAILURE_RATE: proportion of failed calls from which the circuit opens
+            - SCOTCH_CIRCUIT_SLOW_CALL: duration (in seconds) from which a call counts as failed
+            - SCOTCH_CIRCUIT_MIN_CALLS, SCOTCH_CIRCUIT_WINDOW: minimum number of calls made in the last
+            SCOTCH_CIRCUIT_WINDOW seconds before the circuit can open
+            - SCOTCH_CIRCUIT_RESET_TIMEOUT: how long (in seconds) the circuit stays open before a call is tried again
+
+        And the rate limiters spacing the calls to a remote API (see RateLimiter) with:
+            - SCOTCH_RATE_LIMIT: average number of requests per second, per process, unlimited when None
+            - SCOTCH_RATE_BURST: maximum number of requests sent at once, a second of requests when None
+            - SCOTCH_ADAPTIVE_CONCURRENCY: adjust the number of requests in flight to the throttling (429 responses)
+            and the latency of the remote API
+            - SCOTCH_MIN_CONCURRENCY, SCOTCH_MAX_CONCURRENCY: bounds of the number of requests in flight
+            - SCOTCH_RATE_LIMIT_SCOPE: "host" (a limiter per host of the remote API) or "model" (a limiter per model)
+            - SCOTCH_RATE_LIMIT_RETRIES: number of times a throttled request is sent again, once its Retry-After
+            delay is elapsed
+
+        And the decoding of the responses and encoding of the requests with:
+            - SCOTCH_JSON_BACKEND: "json" (standard library), "orjson", or a Serializer instance
+            - SCOTCH_COMPRESS_MIN_SIZE: size (in bytes) from which the request bodies are compressed with gzip,
+            never when None
+
+        And the loading of the collections of the models declaring `__warmup__` or `__refresh_interval__` with:
+            - SCOTCH_WARMUP: when they are first loaded: "startup" (before the first request is handled, which
+            waits for them), "request" (in the background, from the first request), or None (only when `warm_up`
+            is called). Not by init_app, the models being usually declared after it
+            - SCOTCH_WARMUP_MODELS: the models (or their names) loaded by this app, those declared in the package
+            of the app (see Flask.import_name) when None
+            - SCOTCH_REFRESH_CONCURRENCY: maximum number of collections loaded at once
+            - SCOTCH_REFRESH_JITTER: maximal random variation of the refresh intervals, as a fraction of them
+
+        And the webhook receiving the change events of the remote API (see webhook_blueprint) with:
+            - SCOTCH_WEBHOOK_SECRET: the secret signing the events, the webhook is only registered when it is set
+            - SCOTCH_WEBHOOK_URL: the url of the webhook
+            - SCOTCH_WEBHOOK_TOLERANCE: maximum age (in seconds) of the signature of an event
+            - SCOTCH_WEBHOOK_REFRESH: fetch the changed entities again in the background, rather than on next use
+
+        And the identity map of the entities loaded during a request with:
+            - SCOTCH_IDENTITY_MAP: fetch a remote entity at most once per request, see IdentityMap
+
+        And the summary of the remote calls made by each request (see Instrumentation) with:
+            - SCOTCH_N_PLUS_ONE_THRESHOLD: number of calls to the same entity url from which a warning is logged
+            - SCOTCH_SERVER_TIMING: add the number and duration of the remote calls in the Server-Timing header
 
         :param app:
         :return:
@@ -55,3 +160,216 @@ class FlaskScotch:
 
         if "SCOTCH_API_URL" in app.config:
             self.api_url = app.config.get("SCOTCH_API_URL")
+
+        app.config.setdefault("SCOTCH_POOL_CONNECTIONS", 10)
+        app.config.setdefault("SCOTCH_POOL_MAXSIZE", 10)
+        app.config.setdefault("SCOTCH_POOL_BLOCK", False)
+        app.config.setdefault("SCOTCH_CONNECT_TIMEOUT", 5.0)
+        app.config.setdefault("SCOTCH_READ_TIMEOUT", 30.0)
+        app.config.setdefault("SCOTCH_MAX_RETRIES", 0)
+        app.config.setdefault("SCOTCH_RETRY_BACKOFF", 0.0)
+        app.config.setdefault("SCOTCH_MAX_WORKERS", 8)
+        app.config.setdefault("SCOTCH_BULK_CHUNK_SIZE", 100)
+        app.config.setdefault("SCOTCH_SQL_CHUNK_SIZE", 500)
+        app.config.setdefault("SCOTCH_CACHE_TTL", 0)
+        app.config.setdefault("SCOTCH_CACHE_MAX_ENTRIES", 1024)
+        app.config.setdefault("SCOTCH_CACHE_MAX_BYTES", None)
+        app.config.setdefault("SCOTCH_CACHE_BACKEND", "memory")
+        app.config.setdefault("SCOTCH_CACHE_PATH", None)
+        app.config.setdefault("SCOTCH_CACHE_STALE_TTL", 0)
+        app.config.setdefault("SCOTCH_COALESCE_REQUESTS", True)
+        app.config.setdefault("SCOTCH_CIRCUIT_BREAKER", False)
+        app.config.setdefault("SCOTCH_CIRCUIT_SCOPE", "host")
+        app.config.setdefault("SCOTCH_CIRCUIT_FAILURE_RATE", 0.5)
+        app.config.setdefault("SCOTCH_CIRCUIT_SLOW_CALL", 10.0)
+        app.config.setdefault("SCOTCH_CIRCUIT_MIN_CALLS", 10)
+        app.config.setdefault("SCOTCH_CIRCUIT_WINDOW", 30.0)
+        app.config.setdefault("SCOTCH_CIRCUIT_RESET_TIMEOUT", 30.0)
+        app.config.setdefault("SCOTCH_RATE_LIMIT", None)
+        app.config.setdefault("SCOTCH_RATE_BURST", None)
+        app.config.setdefault("SCOTCH_ADAPTIVE_CONCURRENCY", False)
+        app.config.setdefault("SCOTCH_MIN_CONCURRENCY", 1)
+        app.config.setdefault("SCOTCH_MAX_CONCURRENCY", 32)
+        app.config.setdefault("SCOTCH_RATE_LIMIT_SCOPE", "host")
+        app.config.setdefault("SCOTCH_RATE_LIMIT_RETRIES", 1)
+        app.config.setdefault("SCOTCH_WARMUP", None)
+        app.config.setdefault("SCOTCH_WARMUP_MODELS", None)
+        app.config.setdefault("SCOTCH_REFRESH_CONCURRENCY", 2)
+        app.config.setdefault("SCOTCH_REFRESH_JITTER", 0.1)
+        app.config.setdefault("SCOTCH_WEBHOOK_SECRET", None)
+        app.config.setdefault("SCOTCH_WEBHOOK_URL", "/scotch/webhook")
+        app.config.setdefault("SCOTCH_WEBHOOK_TOLERANCE", 300)
+        app.config.setdefault("SCOTCH_WEBHOOK_REFRESH", False)
+        app.config.setdefault("SCOTCH_IDENTITY_MAP", False)
+        app.config.setdefault("SCOTCH_N_PLUS_ONE_THRESHOLD", 10)
+        app.config.setdefault("SCOTCH_SERVER_TIMING", False)
+        app.config.setdefault("SCOTCH_JSON_BACKEND", "json")
+        app.config.setdefault("SCOTCH_COMPRESS_MIN_SIZE", None)
+        self.session_pool = SessionPool.from_config(app.config)
+        self._async_session_pool = None
+        self.serializer = get_serializer(app.config["SCOTCH_JSON_BACKEND"])
+        self.cache = ResponseCache.from_config(app.config, self.serializer, app.instance_path)
+        self.circuit_breakers = {}
+        self.rate_limiters = {}
+        app.teardown_appcontext(IdentityMap.clear_current)
+        app.after_request(Instrumentation.after_request)
+        if app.config["SCOTCH_WEBHOOK_SECRET"]:
+            app.register_blueprint(webhook_blueprint(self, app.config["SCOTCH_WEBHOOK_URL"]))
+            if app.config["SCOTCH_CACHE_BACKEND"] == "memory":
+                app.logger.warning(
+                    "The change events received by the webhook only invalidate the in-memory cache of the worker "
+                    'receiving them, use a cache shared by the workers, e.g. SCOTCH_CACHE_BACKEND = "sqlite"'
+                )
+        if app.config["SCOTCH_WARMUP"] in ("startup", "request"):
+            app.before_request(self._warm_up_on_first_request)
+
+    @property
+    def async_session_pool(self) -> AsyncSessionPool:
+        """
+        The pool of connections used by the async api, created on first use, so that httpx
+        is only required by the applications using the async api
+
+        :return: AsyncSessionPool
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        if self._async_session_pool is None:
+            self._async_session_pool = AsyncSessionPool.from_config(self.app.config)
+        return self._async_session_pool
+
+    def circuit_breaker(self, name: str) -> CircuitBreaker:
+        """
+        :param name: the host of the remote API, or the name of the model, see SCOTCH_CIRCUIT_SCOPE
+        :return: the circuit breaker of that remote API, created on first use
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        with self._lock:
+            breaker = self.circuit_breakers.get(name)
+            if breaker is None:
+                breaker = self.circuit_breakers[name] = CircuitBreaker.from_config(name, self.app.config)
+            return breaker
+
+    def rate_limiter(self, name: str) -> RateLimiter:
+        """
+        :param name: the host of the remote API, or the name of the model, see SCOTCH_RATE_LIMIT_SCOPE
+        :return: the rate limiter of that remote API, created on first use
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        with self._lock:
+            limiter = self.rate_limiters.get(name)
+            if limiter is None:
+                limiter = self.rate_limiters[name] = RateLimiter.from_config(name, self.app.config)
+            return limiter
+
+    def run_in_background(self, key: Hashable, function: Callable[[], Any]) -> Future:
+        """
+        Runs the function in a background thread (at most SCOTCH_MAX_WORKERS at once),
+        unless a function with the same key is already running, e.g. the refresh of the same stale response
+
+        :param key: identifies the work done by the function
+        :param function: called without arguments, its exceptions are only kept in the returned future
+        :return: the future of the function running for that key
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        with self._lock:
+            running = self._background.get(key)
+            if running is not None:
+                return running
+            if self._background_executor is None:
+                self._background_executor = ThreadPoolExecutor(
+                    self.app.config["SCOTCH_MAX_WORKERS"], thread_name_prefix="scotch"
+                )
+            future = self._background_executor.submit(function)
+            self._background[key] = future
+
+        def _done(done: Future):
+            with self._lock:
+                if self._background.get(key) is done:
+                    del self._background[key]
+
+        future.add_done_callback(_done)
+        return future
+
+    def warm_up(self, wait: bool = True) -> RefreshScheduler:
+        """
+        Loads the collections of the models of the app declaring `__warmup__ = True`, concurrently, and refreshes
+        those declaring a `__refresh_interval__` in the background from then on, see RefreshScheduler.
+        The models of the app are those of SCOTCH_WARMUP_MODELS, or those declared in its package, so it must be
+        called once they are declared. Does nothing when already done, but can be called again when none of
+        the models was found
+
+        :param wait: wait until the collections are loaded
+        :return: the RefreshScheduler
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        with self._lock:
+            if self.refresh_scheduler is not None:
+                return self.refresh_scheduler
+            models = self._app_models()
+            warmed = [model for model in models if model.__warmup__]
+            refreshed = [(model, model.__refresh_interval__) for model in models if model.__refresh_interval__]
+            config = self.app.config
+            scheduler = RefreshScheduler(
+                self.app, config["SCOTCH_REFRESH_CONCURRENCY"], config["SCOTCH_REFRESH_JITTER"]
+            )
+            if warmed or refreshed:
+                self.refresh_scheduler = scheduler
+
+        scheduler.warm(warmed, wait)
+        for model, interval in refreshed:
+            scheduler.schedule(model, interval)
+        return scheduler
+
+    def _app_models(self) -> list[type[RemoteModel]]:
+        """
+        :return: the models of SCOTCH_WARMUP_MODELS, or the registered models declared in the package of the app
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        names = self.app.config["SCOTCH_WARMUP_MODELS"]
+        if names is not None:
+            return [remote_model_from_name(name) for name in names]
+        package = self.app.import_name
+        return [
+            model
+            for model in RemoteModel.__registry__.models()
+            if model.__module__ == package or model.__module__.startswith(f"{package}.")
+        ]
+
+    def _warm_up_on_first_request(self):
+        # Only once, the models of the app being declared by the time it handles a request
+        with self._lock:
+            first = not self._warm_up_requested
+            self._warm_up_requested = True
+        if first and self.app is not None:
+            self.warm_up(wait=self.app.config["SCOTCH_WARMUP"] == "startup")
+
+    def sync_mirrors(self, full: bool = False) -> dict[str, int]:
+        """
+        Synchronizes the local mirror of all the remote models declaring a `__mirror__`, see ApiAccessor.sync
+
+        :param full: download the whole collections, even when an incremental synchronization is possible
+        :return: the number of entities written, by mirror table
+        """
+        if self.app is None:
+            raise AssertionError("Scotch extension not initialized")
+        written = {}
+        with self.app.app_context():
+            for model in RemoteModel.__registry__.models():
+                if model.__mirror__:
+                    written[model.api.mirror.name] = model.api.sync(full)
+        return written
+
+    def connection_stats(self) -> dict[str, int]:
+        """
+        Counters of the HTTP connection pool, see SessionPool.stats
+
+        :return: a dict of counters
+        """
+        if self.session_pool is None:
+            raise AssertionError("Scotch extension not initialized")
+        return self.session_pool.stats()
@@ -1,5 +1,9 @@
+import codecs
 import inspect
-from typing import Any, Union, cast
+import json
+from typing import Any, Iterable, Iterator, Union, cast
+
+_JSON_WHITESPACE = " \t\n\r"
 
 
 def all_subclasses(cls: type[Any]):
@@ -14,6 +18,9 @@ def class_from_name(name: Union[str, type[Any]], parent_class: type[Any]) -> typ
 
     When the model passed in parameter is a class, it is returned without any further validation
 
+    When the parent class has a `__registry__` (a ModelRegistry), the name is resolved with it,
+    otherwise all the subclasses of the parent class are searched
+
     If no class with the given name is found, raises a ValueError
 
     :param name: the class or the name of the class
@@ -22,8 +29,12 @@ def class_from_name(name: Union[str, type[Any]], parent_class: type[Any]) -> typ
     """
     if inspect.isclass(name):
         return cast(type[Any], name)
-    all_known_classes = all_subclasses(parent_class)
 
+    registry = getattr(parent_class, "__registry__", None)
+    if registry is not None:
+        return registry.resolve(name)
+
+    all_known_classes = all_subclasses(parent_class)
     found = next(iter(cls for cls in all_known_classes if cls.__name__ == name), None)
     if found is None:
         raise ValueError(f"Failed to find class with name {name}, is it a subclass of {parent_class.__name__} ?")
@@ -52,3 +63,68 @@ def local_model_from_name(name: Union[str, type[Any]]) -> type[Any]:
     from .LocalModel import LocalModel
 
     return class_from_name(name, LocalModel)
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Any]:
+    """
+    Incrementally parses a json array received by chunks, yielding each of its items as soon
+    as it has been fully received, so that the whole document never has to be held in memory.
+
+    :param chunks: the successive chunks of the json document
+    :param encoding: the encoding of the document
+    :return: an iterator over the items of the array
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ""
+    position = 0
+    finished = False
+    # The next token: the opening bracket, an item or the closing bracket (right after the opening bracket),
+    # an item (after a comma), or a comma or the closing bracket (after an item)
+    expected = "["
+    chunk_iterator = iter(chunks)
+
+    while not finished:
+        chunk = next(chunk_iterator, None)
+        finished = chunk is None
+        buffer = buffer[position:] + text_decoder.decode(chunk or b"", final=finished)
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in _JSON_WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if expected == "[":
+                if char != "[":
+                    raise ValueError("The json document is not an array")
+                expected = "item or ]"
+                position += 1
+                continue
+            if char == "]" and expected != "item":
+                return
+            if expected == ", or ]":
+                if char != ",":
+                    raise ValueError(f"Invalid json array, expected a comma at {char!r}")
+                expected = "item"
+                position += 1
+                continue
+            if char in ",]":
+                raise ValueError(f"Invalid json array, expected an item at {char!r}")
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if finished:
+                    raise
+                break
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buffer) or buffer[end] not in _JSON_WHITESPACE + ",]":
+                if finished:
+                    raise ValueError("Invalid json array")
+                break
+            position = end
+            expected = ", or ]"
+            yield item
+
+    raise ValueError("The json array is not terminated")
@@ -4,6 +4,8 @@ import pytest
 from flask_sqlalchemy import SQLAlchemy
 from flask_scotch import FlaskScotch
 
+from benchmarks.server import StandInServer
+
 
 @pytest.fixture
 def app(request):
@@ -23,3 +25,13 @@ def db(app):
 @pytest.fixture
 def scotch(app, db):
     return FlaskScotch(app, "http://localhost", db)
+
+
+@pytest.fixture
+def api_server():
+    """
+    A local stand-in of the remote API (see benchmarks/server.py), serving the json content of its `collections`
+    over real (keep-alive) HTTP connections
+    """
+    with StandInServer() as server:
+        yield server
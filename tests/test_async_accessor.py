@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+
+
+from flask_scotch import FlaskScotch, RemoteModel, AsyncApiAccessor
+
+
+def test_async_operations(app, db, api_server):
+    api_server.collections["moons"] = {index: {"id": index, "name": f"Moon {index}"} for index in range(1, 6)}
+    FlaskScotch(app, api_server.url, db)
+
+    class Moon(RemoteModel):
+        __remote_directory__ = "moons"
+
+        name: str
+
+    async def _scenario():
+        assert isinstance(Moon.aapi, AsyncApiAccessor)
+
+        moons = await Moon.aapi.all()
+        assert [moon.name for moon in moons] == [f"Moon {index}" for index in range(1, 6)]
+
+        first = await Moon.aapi.get(1)
+        assert isinstance(first, Moon)
+        assert first.name == "Moon 1"
+
+        first.name = "Changed"
+        await Moon.aapi.update(first)
+        assert (await Moon.aapi.get(1)).name == "Changed"
+
+        await Moon.aapi.create(Moon(name="New moon"))
+        assert api_server.collections["moons"][6]["name"] == "New moon"
+
+        await Moon.aapi.delete(6)
+        assert 6 not in api_server.collections["moons"]
+
+        await app.extensions["scotch"].async_session_pool.aclose()
+
+    with app.test_request_context():
+        asyncio.run(_scenario())
+
+
+def test_async_get_many(app, db, api_server):
+    api_server.collections["stars"] = {index: {"id": index, "name": f"Star {index}"} for index in range(1, 21)}
+    FlaskScotch(app, api_server.url, db)
+
+    class Star(RemoteModel):
+        __remote_directory__ = "stars"
+
+        name: str
+
+    async def _scenario():
+        stars = await Star.aapi.get_many([3, 1, 3, 20, 99, 2])
+        await app.extensions["scotch"].async_session_pool.aclose()
+        return stars
+
+    with app.test_request_context():
+        stars = asyncio.run(_scenario())
+
+    assert [star.id for star in stars if isinstance(star, Star)] == [3, 1, 3, 20, 2]
+    assert isinstance(stars[4], httpx.HTTPStatusError) and stars[4].response.status_code == 404
+    # Duplicated ids are only fetched once
+    assert len(api_server.hits) == 5
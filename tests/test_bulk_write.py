@@ -0,0 +1,122 @@
+import json
+
+import responses
+from requests import HTTPError
+
+from flask_scotch import FlaskScotch, RemoteModel
+
+
+def test_fan_out(app, db, api_server):
+    api_server.collections["lamps"] = {index: {"id": index, "name": f"Lamp {index}"} for index in range(1, 4)}
+    FlaskScotch(app, api_server.url, db)
+
+    class Lamp(RemoteModel):
+        __remote_directory__ = "lamps"
+
+        name: str
+
+    with app.test_request_context():
+        created = Lamp.api.create_many([Lamp(id=index, name=f"Lamp {index}") for index in range(4, 14)])
+        assert all(isinstance(lamp, Lamp) for lamp in created)
+        assert len(api_server.collections["lamps"]) == 13
+
+        updated = Lamp.api.update_many([Lamp(id=1, name="Changed"), Lamp(id=2, name="Changed")], max_workers=2)
+        assert updated == [{"msg": "Success"}] * 2
+        assert api_server.collections["lamps"][2]["name"] == "Changed"
+
+        deleted = Lamp.api.delete_many(range(1, 14))
+        assert deleted == [{"msg": "Success"}] * 13
+        assert api_server.collections["lamps"] == {}
+
+
+@responses.activate
+def test_bulk_endpoint(app, scotch):
+    received = []
+
+    def _bulk(request):
+        items = json.loads(request.body)
+        received.append((request.method, items))
+        if any(item == {"id": 13, "name": "Broken"} for item in items):
+            return 500, {}, json.dumps({"msg": "Failed"})
+        if request.method == "POST":
+            return 200, {}, json.dumps([{"msg": "Success"} for _ in items])
+        if request.method == "PUT":
+            return (
+                200,
+                {},
+                json.dumps([{"msg": "Failed" if item["name"] == "Invalid" else "Success"} for item in items]),
+            )
+        return 200, {}, json.dumps({"msg": "Success"})
+
+    for method in (responses.POST, responses.PUT, responses.DELETE):
+        responses.add_callback(method, "http://localhost/desks/bulk", callback=_bulk)
+
+    class Desk(RemoteModel):
+        __remote_directory__ = "desks"
+        __bulk_endpoint__ = "bulk"
+        __bulk_chunk_size__ = 4
+
+        name: str
+
+    with app.test_request_context():
+        desks = [Desk(id=index, name=f"Desk {index}") for index in range(1, 11)]
+        created = Desk.api.create_many(desks)
+        assert created == desks
+        assert sorted(len(items) for _, items in received) == [2, 4, 4]
+
+        # A failed chunk does not abort the other ones
+        received.clear()
+        desks[8] = Desk(id=13, name="Broken")
+        desks[9].name = "Desk 10"
+        desks[0].name = "Desk 1"
+        desks[1].name = "Invalid"
+        updated = Desk.api.update_many(desks, max_workers=1)
+        assert updated[:8] == [{"msg": "Success"}, {"msg": "Failed"}] + [{"msg": "Success"}] * 6
+        assert len(updated) == 10 and all(isinstance(error, HTTPError) for error in updated[8:])
+        # Only the updated entities are clean again
+        assert [desk.id for desk in desks if desk.changed_fields] == [2, 10]
+        assert [len(items) for _, items in received] == [4, 4, 2]
+
+        received.clear()
+        assert Desk.api.delete_many([1, 2, 3]) == [{"msg": "Success"}] * 3
+        assert received == [("DELETE", [1, 2, 3])]
+
+
+@responses.activate
+def test_bulk_writes_through_to_the_mirror(app, scotch):
+    def _bulk(request):
+        items = json.loads(request.body)
+        if any(item in (13, {"id": 13, "name": "Broken"}) for item in items):
+            return 500, {}, json.dumps({"msg": "Failed"})
+        return 200, {}, json.dumps([{"msg": "Success"} for _ in items])
+
+    responses.add(responses.GET, "http://localhost/benches/", json=[{"id": 1, "name": "Bench 1"}])
+    for method in (responses.POST, responses.DELETE):
+        responses.add_callback(method, "http://localhost/benches/bulk", callback=_bulk)
+
+    class Bench(RemoteModel):
+        __remote_directory__ = "benches"
+        __bulk_endpoint__ = "bulk"
+        __bulk_chunk_size__ = 2
+        __mirror__ = True
+
+        name: str
+
+    with app.test_request_context():
+        Bench.api.sync()
+        calls = len(responses.calls)
+
+        benches = [Bench(id=2, name=""), Bench(id=3, name=""), Bench(id=13, name="")]
+        for bench, name in zip(benches, ["Bench 2", "Bench 3", "Broken"]):
+            bench.name = name
+        created = Bench.api.create_many(benches)
+        assert created[:2] == benches[:2] and isinstance(created[2], HTTPError)
+        # Only the created entities are clean, and written to the mirror
+        assert [bench.id for bench in benches if bench.changed_fields] == [13]
+        assert [bench.name for bench in Bench.api.all()] == ["Bench 1", "Bench 2", "Bench 3"]
+
+        deleted = Bench.api.delete_many([1, 2, 13])
+        assert deleted[:2] == [{"msg": "Success"}] * 2 and isinstance(deleted[2], HTTPError)
+        assert [bench.name for bench in Bench.api.all()] == ["Bench 3"]
+        # Read from the mirror, the remote API was only called for the writes
+        assert [call.request.method for call in responses.calls[calls:]] == ["POST", "POST", "DELETE", "DELETE"]
@@ -0,0 +1,157 @@
+import time
+
+import pytest
+import responses
+from requests import HTTPError
+
+from flask_scotch import CircuitBreaker, CircuitOpenError, RemoteModel
+
+
+def test_open_and_half_open():
+    breaker = CircuitBreaker("api", failure_rate=0.5, slow_call=0.5, minimum_calls=4, reset_timeout=0.05)
+    breaker.record(True, 0.01)
+    breaker.record(False, 0.01)
+    breaker.record(True, 0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Slow calls count as failures
+    breaker.record(True, 1.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # A single probe is let through once the reset timeout elapsed
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(False, 0.01)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(True, 0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+@responses.activate
+def test_fail_fast(app, scotch):
+    app.config["SCOTCH_CIRCUIT_BREAKER"] = True
+    app.config["SCOTCH_CIRCUIT_MIN_CALLS"] = 2
+    responses.add(responses.GET, "http://localhost/ferries/1", status=503, json={"msg": "Unavailable"})
+
+    class Ferry(RemoteModel):
+        __remote_directory__ = "ferries"
+
+        name: str
+
+    with app.test_request_context():
+        for _ in range(2):
+            with pytest.raises(HTTPError, match="503"):
+                Ferry.api.get(1)
+
+        with pytest.raises(CircuitOpenError, match="localhost"):
+            Ferry.api.get(1)
+        assert len(responses.calls) == 2
+        assert scotch.circuit_breaker("localhost").stats()["state"] == CircuitBreaker.OPEN
+
+
+@responses.activate
+def test_stale_while_revalidate(app, scotch):
+    app.config["SCOTCH_CACHE_STALE_TTL"] = 60
+    responses.add(responses.GET, "http://localhost/ships/1", json={"id": 1, "name": "Ship"})
+
+    class Ship(RemoteModel):
+        __remote_directory__ = "ships"
+        __cache_ttl__ = 0.05
+
+        name: str
+
+    with app.test_request_context():
+        assert Ship.api.get(1).name == "Ship"
+        time.sleep(0.1)
+
+        # The expired response is served right away, and refreshed in the background
+        responses.replace(responses.GET, "http://localhost/ships/1", json={"id": 1, "name": "Changed"})
+        assert Ship.api.get(1).name == "Ship"
+        deadline = time.monotonic() + 2
+        while scotch.cache.get(Ship.api._build_url("1")) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert Ship.api.get(1).name == "Changed"
+        assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_serve_stale_while_open(app, scotch):
+    app.config["SCOTCH_CIRCUIT_BREAKER"] = True
+    app.config["SCOTCH_CIRCUIT_MIN_CALLS"] = 2
+    responses.add(responses.GET, "http://localhost/barges/1", json={"id": 1, "name": "Barge"}, headers={"ETag": '"1"'})
+    responses.add(responses.GET, "http://localhost/barges/2", status=500, json={"msg": "Error"})
+
+    class Barge(RemoteModel):
+        __remote_directory__ = "barges"
+        __cache_ttl__ = 0.05
+
+        name: str
+
+    with app.test_request_context():
+        assert Barge.api.get(1).name == "Barge"
+        with pytest.raises(HTTPError, match="500"):
+            Barge.api.get(2)
+        time.sleep(0.1)
+
+        # The circuit is open: the expired response is served instead of failing
+        assert Barge.api.get(1).name == "Barge"
+        with pytest.raises(CircuitOpenError):
+            Barge.api.get(3)
+        assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_serve_stale_on_error(app, scotch):
+    responses.add(responses.GET, "http://localhost/yachts/1", json={"id": 1, "name": "Yacht"}, headers={"ETag": '"1"'})
+
+    class Yacht(RemoteModel):
+        __remote_directory__ = "yachts"
+        __cache_ttl__ = 0.05
+
+        name: str
+
+    with app.test_request_context():
+        assert Yacht.api.get(1).name == "Yacht"
+        time.sleep(0.1)
+
+        # The expired response is served while the remote API fails, without any circuit breaker
+        responses.replace(responses.GET, "http://localhost/yachts/1", status=502, json={"msg": "Bad gateway"})
+        assert Yacht.api.get(1).name == "Yacht"
+        assert len(responses.calls) == 2
+
+        # But not the client errors
+        responses.replace(responses.GET, "http://localhost/yachts/1", status=404, json={"msg": "Not found"})
+        with pytest.raises(HTTPError, match="404"):
+            Yacht.api.get(1)
+
+
+def test_interrupted_probe(app, scotch):
+    app.config["SCOTCH_CIRCUIT_BREAKER"] = True
+
+    class Tug(RemoteModel):
+        __remote_directory__ = "tugs"
+
+        name: str
+
+    def _interrupt(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    with app.test_request_context():
+        breaker = scotch.circuit_breaker("localhost")
+        breaker.reset_timeout = 0
+        breaker._open(time.monotonic())
+        scotch.session_pool.request = _interrupt
+        with pytest.raises(KeyboardInterrupt):
+            Tug.api.get(1)
+        # The interrupted probe counts as failed, the next one is let through
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.before_call()
@@ -1,4 +1,4 @@
-from flask_scotch import RemoteRelationship, RemoteModel, LocalModel, LocalRelationship
+from flask_scotch import RemoteRelationship, RemoteModel, LocalModel, LocalRelationship, prefetch_remote
 import sqlalchemy as sa
 import json
 import re
@@ -103,3 +103,173 @@ def test_string_referencing(app, scotch, db):
 
         # Back to querying
         assert Author(id=1, name="Someone").books == []
+
+
+@responses.activate
+def test_prefetch_remote(app, scotch, db):
+    class Shelf(RemoteModel):
+        __remote_directory__ = "shelves"
+
+        name: str
+
+    class Box(LocalModel, db.Model):
+        __tablename__ = "box"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        shelf_id = sa.Column(sa.Integer)
+
+        shelf = RemoteRelationship(Shelf)
+
+    def _get_shelf(req):
+        start_ = len("shelves") + 2
+        shelf_id = int(req.path_url[start_:])
+        return 200, {}, json.dumps({"id": shelf_id, "name": f"Shelf {shelf_id}"})
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/shelves/(\d+)"), callback=_get_shelf)
+
+    with app.test_request_context():
+        db.create_all()
+        db.session.add_all([Box(shelf_id=index % 3 + 1) for index in range(30)] + [Box()])
+        db.session.commit()
+
+        boxes = prefetch_remote(Box.query.all(), "shelf")
+        assert len(responses.calls) == 3
+
+        assert [box.shelf.name for box in boxes[:3]] == ["Shelf 1", "Shelf 2", "Shelf 3"]
+        assert boxes[-1].shelf is None
+        assert len(responses.calls) == 3
+
+        # Changing the key fetches the new object
+        boxes[0].shelf_id = 3
+        assert boxes[0].shelf.name == "Shelf 3"
+        assert len(responses.calls) == 4
+
+
+@responses.activate
+def test_prefetch_remote_bulk_filter(app, scotch, db):
+    class Wall(RemoteModel):
+        __remote_directory__ = "walls"
+        __bulk_filter__ = "id__in"
+
+        name: str
+
+    class Frame(LocalModel, db.Model):
+        __tablename__ = "frame"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        wall_id = sa.Column(sa.Integer)
+
+        wall = RemoteRelationship("Wall")
+
+    def _get_walls(req):
+        ids = req.params["id__in"].split(",")
+        return 200, {}, json.dumps([{"id": int(wall_id), "name": f"Wall {wall_id}"} for wall_id in ids])
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/walls/\?.*"), callback=_get_walls)
+    app.config["SCOTCH_BULK_CHUNK_SIZE"] = 4
+
+    with app.test_request_context():
+        frames = prefetch_remote([Frame(wall_id=index) for index in range(1, 11)], "wall")
+
+        # 10 ids by chunks of 4
+        assert len(responses.calls) == 3
+        assert [frame.wall.name for frame in frames] == [f"Wall {index}" for index in range(1, 11)]
+        assert len(responses.calls) == 3
+
+
+def test_relationships_discovered_on_class(db):
+    class Lamp(RemoteModel):
+        __remote_directory__ = "lamps"
+
+        name: str
+        bulbs = LocalRelationship("Bulb")
+
+    class Bulb(LocalModel, db.Model):
+        __tablename__ = "bulb"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        lamp_id = sa.Column(sa.Integer)
+
+        lamp = RemoteRelationship(Lamp)
+
+    assert Bulb.remote_relationship("lamp").key_attribute() == "lamp_id"
+    assert isinstance(Bulb.lamp, property)
+    assert Lamp.local_relationship("bulbs").database_field_name == "Lamp_id"
+    assert "bulbs" not in Lamp.__fields__
+
+    # Relationships are not part of the serialized remote entity
+    assert json.loads(Lamp(id=1, name="Desk").json()) == {"id": 1, "name": "Desk"}
+
+
+@responses.activate
+def test_relationships_declared_on_mixins(app, scotch, db):
+    class Shelf(RemoteModel):
+        __remote_directory__ = "shelves"
+
+        name: str
+
+    class OnShelf:
+        shelf_id = sa.Column(sa.Integer)
+
+        shelf = RemoteRelationship(Shelf)
+
+    class Crate(OnShelf, LocalModel, db.Model):
+        __tablename__ = "crate"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+
+    responses.add(responses.GET, "http://localhost/shelves/1", json={"id": 1, "name": "Top"})
+
+    assert isinstance(Crate.shelf, property)
+    assert Crate.remote_relationship("shelf").key_attribute() == "shelf_id"
+    with app.test_request_context():
+        assert Crate(shelf_id=1).shelf == Shelf(id=1, name="Top")
+
+
+@responses.activate
+def test_identity_map(app, scotch, db):
+    app.config["SCOTCH_IDENTITY_MAP"] = True
+
+    class Depot(RemoteModel):
+        __remote_directory__ = "depots"
+
+        name: str
+
+    class Parcel(LocalModel, db.Model):
+        __tablename__ = "parcel"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        depot_id = sa.Column(sa.Integer)
+        origin_id = sa.Column(sa.Integer)
+
+        depot = RemoteRelationship(Depot)
+        origin = RemoteRelationship(Depot)
+
+    def _get_depot(req):
+        depot_id = int(req.path_url.rsplit("/", 1)[-1])
+        return 200, {}, json.dumps({"id": depot_id, "name": f"Depot {depot_id}"})
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/depots/(\d+)"), callback=_get_depot)
+    responses.add(responses.GET, "http://localhost/depots/", json=[{"id": 1, "name": "Depot 1"}])
+    responses.add(responses.DELETE, "http://localhost/depots/2", json={"msg": "Success"})
+
+    with app.test_request_context():
+        parcels = [Parcel(depot_id=1, origin_id=2), Parcel(depot_id=2, origin_id=1), Parcel(depot_id=1)]
+
+        # The same remote entity is fetched once, and is the same instance through all the relationships
+        assert parcels[0].depot is parcels[1].origin is parcels[2].depot
+        assert parcels[0].origin is parcels[1].depot
+        assert len(responses.calls) == 2
+        assert Depot.api.all()[0] is parcels[0].depot
+        assert Depot.api.fetch_many([1, 2]) == {1: parcels[0].depot, 2: parcels[1].depot}
+        assert len(responses.calls) == 3
+
+        # A deleted entity is forgotten
+        Depot.api.delete(2)
+        assert Depot.api.get(2) is not parcels[1].depot
+        assert len(responses.calls) == 5
+
+    # The identity map does not outlive the request
+    with app.test_request_context():
+        assert Parcel(depot_id=1).depot is not parcels[0].depot
+        assert len(responses.calls) == 6
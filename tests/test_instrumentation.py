@@ -0,0 +1,189 @@
+import socket
+
+import pytest
+import sqlalchemy as sa
+
+from flask_scotch import (
+    FlaskScotch,
+    Instrumentation,
+    RemoteModel,
+    LocalModel,
+    RemoteRelationship,
+    MetricsSink,
+    StatsdSink,
+    PrometheusSink,
+    RemoteCall,
+    remote_call,
+    request_summary,
+)
+from flask_scotch.Instrumentation import loading_relationship
+
+
+class _ListSink(MetricsSink):
+    def __init__(self):
+        self.calls = []
+
+    def record(self, call):
+        self.calls.append(call)
+
+
+def test_remote_calls_recorded(app, db, api_server):
+    api_server.collections["docks"] = {index: {"id": index, "name": f"Dock {index}"} for index in range(1, 4)}
+    app.config["SCOTCH_CACHE_TTL"] = 60
+    scotch = FlaskScotch(app, api_server.url, db)
+    sink = _ListSink()
+    scotch.instrumentation.add_sink(sink)
+
+    class Dock(RemoteModel):
+        __remote_directory__ = "docks"
+
+        name: str
+
+    class Crate(LocalModel, db.Model):
+        __tablename__ = "crate"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        dock_id = sa.Column(sa.Integer)
+
+        dock = RemoteRelationship(Dock)
+
+    with app.app_context():
+        Dock.api.get(1)
+        Dock.api.get(1)
+        Dock.api.update(Dock(id=2, name="Changed"))
+        assert Crate(dock_id=3).dock.name == "Dock 3"
+
+    first, hit, update, relationship = sink.calls
+    assert first.model == "Dock"
+    assert (first.verb, first.url_template, first.url) == ("get", "/docks/{id}", f"{api_server.url}/docks/1")
+    assert (first.status, first.cache, first.relationship) == (200, "miss", None)
+    assert first.latency > 0 and first.parse_time > 0
+    assert first.response_bytes == len(b'{"id": 1, "name": "Dock 1"}')
+
+    assert (hit.cache, hit.status, hit.response_bytes) == ("hit", None, 0)
+
+    assert (update.verb, update.cache) == ("put", None)
+    assert update.request_bytes == len(Dock(id=2, name="Changed").json())
+
+    assert relationship.relationship == "Crate.dock"
+
+    scotch.instrumentation.remove_sink(sink)
+    with app.app_context():
+        Dock.api.get(3)
+    assert len(sink.calls) == 4
+
+
+def test_request_summary(app, db, api_server, caplog):
+    pytest.importorskip("blinker")
+    api_server.collections["quays"] = {index: {"id": index, "name": f"Quay {index}"} for index in range(1, 6)}
+    app.config["SCOTCH_N_PLUS_ONE_THRESHOLD"] = 3
+    app.config["SCOTCH_SERVER_TIMING"] = True
+    FlaskScotch(app, api_server.url, db)
+
+    class Quay(RemoteModel):
+        __remote_directory__ = "quays"
+
+        name: str
+
+    class Barrel(LocalModel, db.Model):
+        __tablename__ = "barrel"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        quay_id = sa.Column(sa.Integer)
+
+        quay = RemoteRelationship(Quay)
+
+    @app.route("/barrels")
+    def barrels():
+        return ",".join(Barrel(quay_id=index).quay.name for index in range(1, 6))
+
+    @app.route("/quays")
+    def quays():
+        return str(len(Quay.api.all()))
+
+    calls = []
+    summaries = []
+
+    def _on_call(sender, call):
+        calls.append((sender, call))
+
+    def _on_summary(sender, summary):
+        summaries.append(summary)
+
+    with remote_call.connected_to(_on_call), request_summary.connected_to(_on_summary, app):
+        with app.test_request_context("/barrels"):
+            response = app.full_dispatch_request()
+        assert response.status_code == 200
+
+        assert len(calls) == 5
+        assert all(sender is Quay and isinstance(call, RemoteCall) for sender, call in calls)
+        (summary,) = summaries
+        assert summary.calls == 5
+        assert summary.relationships == {"Barrel.quay": 5}
+        assert response.headers["Server-Timing"].startswith('scotch;desc="5 remote calls";dur=')
+        assert "Barrel.quay loaded 5 times, use prefetch_remote" in caplog.text
+
+        caplog.clear()
+        with app.test_request_context("/quays"):
+            response = app.full_dispatch_request()
+        assert response.headers["Server-Timing"].startswith('scotch;desc="1 remote calls"')
+        assert "N+1" not in caplog.text
+
+
+def test_summary_of_worker_threads(app, db, api_server):
+    api_server.collections["piers"] = {index: {"id": index, "name": f"Pier {index}"} for index in range(1, 6)}
+    FlaskScotch(app, api_server.url, db)
+
+    class Pier(RemoteModel):
+        __remote_directory__ = "piers"
+
+        name: str
+
+    with app.test_request_context("/"):
+        Pier.api.get(1)
+        Pier.api.get_many([2, 3, 4, 5])
+        summary = Instrumentation.current_summary()
+        assert summary.calls == 5
+        assert summary.templates == {("get", "/piers/{id}"): 5}
+
+        # The calls of the workers are attributed to the relationship being loaded
+        with loading_relationship("Dock.piers"):
+            Pier.api.get_many([1, 2], max_workers=2)
+        assert summary.calls == 7
+        assert summary.relationships == {"Dock.piers": 2}
+
+
+def test_statsd_sink():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    sink = StatsdSink("127.0.0.1", receiver.getsockname()[1], prefix="shop")
+
+    sink.record(RemoteCall("Dock", "get", "/docks/{id}", "http://api/docks/1", 200, 0.012, 0, 42, 0.001, "miss"))
+    lines = receiver.recv(4096).decode().split("\n")
+    sink.close()
+    receiver.close()
+
+    assert lines == [
+        "shop.dock.cache.miss:1|c",
+        "shop.dock.get.calls.2xx:1|c",
+        "shop.dock.get.latency:12.000|ms",
+        "shop.dock.get.parse:1.000|ms",
+        "shop.dock.get.request_bytes:0|c",
+        "shop.dock.get.response_bytes:42|c",
+    ]
+
+
+def test_prometheus_sink():
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    sink = PrometheusSink(registry)
+
+    sink.record(RemoteCall("Dock", "get", "/docks/{id}", "http://api/docks/1", 404, 0.25, 0, 42, 0.001, "miss"))
+    sink.record(RemoteCall("Dock", "get", "/docks/{id}", "http://api/docks/1", None, 0, 0, 0, 0, "hit"))
+
+    labels = {"model": "Dock", "verb": "get", "url_template": "/docks/{id}", "status": "4xx"}
+    assert registry.get_sample_value("scotch_remote_call_seconds_count", labels) == 1
+    assert registry.get_sample_value("scotch_remote_bytes_total", {"model": "Dock", "direction": "received"}) == 42
+    assert registry.get_sample_value("scotch_cache_total", {"model": "Dock", "result": "hit"}) == 1
+    assert registry.get_sample_value("scotch_cache_total", {"model": "Dock", "result": "miss"}) == 1
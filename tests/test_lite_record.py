@@ -0,0 +1,54 @@
+import sys
+
+import pytest
+import responses
+import sqlalchemy as sa
+
+from flask_scotch import LiteRecord, LocalModel, LocalRelationship, RemoteModel, prefetch_local
+
+
+@responses.activate
+def test_lite_records(app, scotch, db):
+    responses.add(
+        responses.GET,
+        "http://localhost/warehouses/",
+        json=[{"id": 1, "name": "North", "unknown": "dropped"}, {"id": 2, "name": "South", "city": "Nice"}],
+    )
+
+    class Warehouse(RemoteModel):
+        __remote_directory__ = "warehouses"
+
+        name: str
+        city: str = "Paris"
+
+        pallets = LocalRelationship("Pallet", "warehouse_id")
+
+    class Pallet(LocalModel, db.Model):
+        __tablename__ = "lite_pallet"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        warehouse_id = sa.Column(sa.Integer)
+
+    with app.test_request_context():
+        db.create_all()
+        db.session.add_all([Pallet(warehouse_id=1), Pallet(warehouse_id=1), Pallet(warehouse_id=2)])
+        db.session.commit()
+
+        north, south = Warehouse.api.all(lite=True)
+        assert isinstance(north, LiteRecord)
+        assert not hasattr(north, "__dict__")
+        assert (north.id, north.name, north.city) == (1, "North", "Paris")
+        assert south.city == "Nice"
+        with pytest.raises(AttributeError):
+            north.unknown
+        with pytest.raises(AttributeError):
+            north.name = "Changed"
+
+        # The local relationships are resolved when accessed, or prefetched
+        assert len(north.pallets) == 2
+        south, *_ = prefetch_local([south], "pallets")
+        assert len(south._proxies["pallets"]) == 1
+
+        assert north.to_model() == Warehouse(id=1, name="North", city="Paris")
+        assert [record.name for record in Warehouse.api.iter_all(lite=True)] == ["North", "South"]
+        assert sys.getsizeof(north) < sys.getsizeof(Warehouse(id=1, name="North").__dict__)
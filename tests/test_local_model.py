@@ -6,7 +6,7 @@ import json
 from requests import PreparedRequest
 import sqlalchemy as sa
 
-from flask_scotch import RemoteModel, LocalRelationship
+from flask_scotch import RemoteModel, LocalRelationship, prefetch_local
 
 CARS: list[Any] = []
 
@@ -82,3 +82,42 @@ def test_attached(app, db, scotch):
 
         car_tires = created_car.tires
         assert len(car_tires) == 4
+
+
+@responses.activate
+def test_prefetch_local(app, db, scotch):
+    responses.add(responses.GET, "http://localhost/garages/", json=[{"id": index} for index in range(1, 8)])
+
+    class Bike(db.Model):
+        __tablename__ = "bike"
+
+        id = sa.Column(sa.Integer, primary_key=True)
+        garage_id = sa.Column(sa.Integer)
+
+    class Garage(RemoteModel):
+        __remote_directory__ = "garages"
+
+        bikes = LocalRelationship(Bike, "garage_id")
+        first_bike = LocalRelationship(Bike, "garage_id", use_list=False)
+
+    app.config["SCOTCH_SQL_CHUNK_SIZE"] = 3
+
+    with app.test_request_context():
+        db.create_all()
+        db.session.add_all([Bike(garage_id=index % 4 + 1) for index in range(12)])
+        db.session.commit()
+
+        statements = []
+        sa.event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        garages = Garage.api.all(prefetch=["bikes"])
+        prefetch_local(garages, "first_bike")
+
+        # 7 ids by chunks of 3, for each relationship
+        assert len(statements) == 6
+
+        assert [len(garage.bikes) for garage in garages] == [3, 3, 3, 3, 0, 0, 0]
+        assert all(bike.garage_id == garages[0].id for bike in garages[0].bikes)
+        assert garages[1].first_bike.garage_id == 2
+        assert garages[-1].first_bike is None
+        assert len(statements) == 6
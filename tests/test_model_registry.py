@@ -0,0 +1,96 @@
+import gc
+
+import pytest
+
+from flask_scotch import ModelRegistry, RemoteModel, RemoteRelationship, LocalModel, lite_class
+from flask_scotch.utils import remote_model_from_name
+
+
+class Outer:
+    class Nested(RemoteModel):
+        __remote_directory__ = "nested"
+
+
+def test_resolve_names():
+    assert remote_model_from_name("Nested") is Outer.Nested
+    assert remote_model_from_name("Outer.Nested") is Outer.Nested
+    assert remote_model_from_name("test_model_registry.Outer.Nested") is Outer.Nested
+    assert remote_model_from_name(Outer.Nested) is Outer.Nested
+
+    with pytest.raises(ValueError, match="Failed to find class with name Missing"):
+        remote_model_from_name("Missing")
+
+
+def test_ambiguous_names():
+    registry = ModelRegistry("Model")
+
+    class First:
+        class Duplicate:
+            pass
+
+    class Second:
+        class Duplicate:
+            pass
+
+    registry.register(First.Duplicate)
+    registry.register(Second.Duplicate)
+
+    with pytest.raises(ValueError, match="Ambiguous class name Duplicate"):
+        registry.resolve("Duplicate")
+    assert registry.resolve("test_ambiguous_names.<locals>.Second.Duplicate") is Second.Duplicate
+
+    # A class declared again with the same full name replaces the previous one
+    def _declare():
+        class Redeclared:
+            pass
+
+        return Redeclared
+
+    first, second = _declare(), _declare()
+    registry.register(first)
+    registry.register(second)
+    assert registry.resolve("Redeclared") is second
+
+
+def test_dead_classes_are_forgotten():
+    registry = ModelRegistry("Model")
+
+    class Ephemeral:
+        pass
+
+    registry.register(Ephemeral)
+    assert "Ephemeral" in registry
+
+    del Ephemeral
+    gc.collect()
+    assert "Ephemeral" not in registry
+
+
+def test_forward_reference(db):
+    class Socket(LocalModel, db.Model):
+        __tablename__ = "socket"
+
+        id = db.Column(db.Integer, primary_key=True)
+        plug_id = db.Column(db.Integer)
+
+        plug = RemoteRelationship("Plug")
+
+    class Plug(RemoteModel):
+        __remote_directory__ = "plugs"
+
+    assert Socket.remote_relationship("plug")._remote_class() is Plug
+
+
+def test_accessed_models_are_forgotten(app, scotch):
+    class Transient(RemoteModel):
+        __remote_directory__ = "transients"
+
+    with app.app_context():
+        assert Transient.api is Transient.api
+        assert Transient.aapi is Transient.aapi
+        assert lite_class(Transient) is lite_class(Transient)
+
+    # Neither the accessors nor the lite class keep the model alive
+    del Transient
+    gc.collect()
+    assert "Transient" not in RemoteModel.__registry__
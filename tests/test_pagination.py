@@ -0,0 +1,170 @@
+import json
+import re
+from urllib import parse
+
+import pytest
+import responses
+from requests import HTTPError
+
+from flask_scotch import FlaskScotch, RemoteModel, CursorPagination, remote_call
+from flask_scotch.utils import iter_json_array
+
+ROCKS = [{"id": index, "name": f"Rock {index}"} for index in range(1, 251)]
+
+
+class Rock(RemoteModel):
+    __remote_directory__ = "rocks"
+
+    name: str
+
+
+def _query(request):
+    return dict(parse.parse_qsl(parse.urlparse(request.url).query))
+
+
+def test_iter_json_array():
+    document = json.dumps([{"name": "é]}", "values": [1, 2]}, 12, -1.5e3, None, True, "", []]).encode()
+    for size in (1, 2, 3, 7, len(document)):
+        chunks = [document[start:][:size] for start in range(0, len(document), size)]
+        assert list(iter_json_array(chunks)) == json.loads(document)
+
+    assert list(iter_json_array([b" [ ] "])) == []
+    for invalid in (b'{"id": 1}', b"[1, 2", b"[1x]", b"[1 2]", b"[,,1]", b"[1,,2]", b"[1,]", b"[,]"):
+        with pytest.raises(ValueError):
+            list(iter_json_array([invalid]))
+
+
+@responses.activate
+def test_offset_pagination(app, scotch):
+    def _page(request):
+        query = _query(request)
+        offset, limit = int(query["offset"]), int(query["limit"])
+        return 200, {}, json.dumps(ROCKS[offset:][:limit])
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?.*"), callback=_page)
+
+    with app.test_request_context():
+        rocks = list(Rock.api.iter_all(page_size=100, pagination="offset"))
+
+    assert [rock.id for rock in rocks] == list(range(1, 251))
+    # Until an empty page
+    assert len(responses.calls) == 4
+
+
+@responses.activate
+def test_capped_page_size(app, scotch):
+    # The remote API sends at most 30 items per page, whatever the requested size
+    def _offset(request):
+        offset, limit = int(_query(request)["offset"]), min(int(_query(request)["limit"]), 30)
+        return 200, {}, json.dumps(ROCKS[offset:][:limit])
+
+    def _page(request):
+        page, size = int(_query(request)["page"]), min(int(_query(request)["page_size"]), 30)
+        start = (page - 1) * size
+        return 200, {}, json.dumps(ROCKS[start:][:size])
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?offset.*"), callback=_offset)
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?page.*"), callback=_page)
+
+    with app.test_request_context():
+        assert len(list(Rock.api.iter_all(page_size=100, pagination="offset"))) == 250
+        assert len(list(Rock.api.iter_all(page_size=100, pagination="page"))) == 250
+
+
+@responses.activate
+def test_page_pagination(app, scotch):
+    def _page(request):
+        query = _query(request)
+        page, size = int(query["page"]), int(query["page_size"])
+        assert query["kind"] == "granite"
+        start = (page - 1) * size
+        return 200, {}, json.dumps(ROCKS[start:][:size])
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?.*"), callback=_page)
+
+    with app.test_request_context():
+        rocks = list(Rock.api.iter_all(page_size=50, pagination="page", kind="granite"))
+
+    assert len(rocks) == 250
+    # The last page is empty
+    assert len(responses.calls) == 6
+
+
+@responses.activate
+def test_cursor_pagination(app, scotch):
+    def _page(request):
+        start = int(_query(request).get("after", 0))
+        end = start + int(_query(request)["limit"])
+        return 200, {}, json.dumps({"items": ROCKS[start:end], "cursor": str(end) if end < len(ROCKS) else None})
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?.*"), callback=_page)
+
+    with app.test_request_context():
+        pagination = CursorPagination(cursor_param="after", results_key="items", next_key="cursor")
+        rocks = list(Rock.api.iter_all(page_size=120, pagination=pagination))
+
+    assert [rock.id for rock in rocks] == list(range(1, 251))
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_link_pagination(app, scotch):
+    def _page(request):
+        page, size = int(_query(request).get("page", 1)), int(_query(request)["per_page"])
+        headers = {}
+        if page * size < len(ROCKS):
+            headers["Link"] = f'<http://localhost/rocks/?page={page + 1}&per_page={size}>; rel="next"'
+        start = (page - 1) * size
+        return 200, headers, json.dumps(ROCKS[start:][:size])
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?.*"), callback=_page)
+
+    with app.test_request_context():
+        rocks = list(Rock.api.iter_all(page_size=100, pagination="link"))
+
+    assert [rock.id for rock in rocks] == list(range(1, 251))
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_failed_pages(app, scotch):
+    def _page(request):
+        if int(_query(request).get("offset", 0)) >= 100:
+            return 503, {}, json.dumps({"msg": "Unavailable"})
+        return 200, {}, json.dumps(ROCKS[:100])
+
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/rocks/\?.*"), callback=_page)
+    statuses = []
+
+    def _on_call(sender, call):
+        statuses.append(call.status)
+
+    with remote_call.connected_to(_on_call), app.test_request_context():
+        rocks = Rock.api.iter_all(page_size=100, pagination="offset")
+        assert len([next(rocks) for _ in range(100)]) == 100
+        with pytest.raises(HTTPError, match="503"):
+            next(rocks)
+
+        # Neither is the error of a streamed collection parsed as its items
+        responses.reset()
+        responses.add(responses.GET, "http://localhost/rocks/", status=500, json={"msg": "Failed"})
+        with pytest.raises(HTTPError, match="500"):
+            list(Rock.api.iter_all())
+
+    # And the calls are recorded like any other
+    assert statuses == [200, 503, 500]
+
+
+def test_streamed_collection(app, db, api_server):
+    api_server.collections["pebbles"] = {index: {"id": index, "name": "Pebble" * 20} for index in range(1, 2001)}
+    FlaskScotch(app, api_server.url, db)
+
+    class Pebble(RemoteModel):
+        __remote_directory__ = "pebbles"
+
+        name: str
+
+    with app.test_request_context():
+        pebbles = Pebble.api.iter_all()
+        assert next(pebbles).id == 1
+        assert sum(1 for _ in pebbles) == 1999
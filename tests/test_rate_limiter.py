@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import responses
+
+from flask_scotch import FlaskScotch, RateLimiter, RemoteModel
+from flask_scotch.RateLimiter import parse_retry_after
+
+
+def test_token_bucket():
+    limiter = RateLimiter("api", rate=100, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+        limiter.release(0.001, 200)
+    # The burst is sent right away, the 4 other requests 10 ms apart
+    assert 0.03 <= time.monotonic() - started < 0.5
+
+
+def test_adaptive_concurrency():
+    limiter = RateLimiter("api", adaptive=True, min_concurrency=2, max_concurrency=8)
+    assert limiter.limit == 8
+
+    # Halved once per round trip when the calls are throttled
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(0.01, 429, "0")
+    assert limiter.limit == 4
+    assert limiter.stats() == {"limit": 4, "in_flight": 0, "throttled": 3}
+
+    # Raised by about one per round trip while the calls succeed
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(0.01, 200)
+    assert limiter.limit == 6
+
+    # And lowered when the latency rises
+    time.sleep(0.11)
+    limiter.acquire()
+    limiter.release(0.1, 200)
+    assert limiter.limit == 3
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) == 1.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon", default=2.0) == 2.0
+
+
+@responses.activate
+def test_retry_throttled(app, scotch):
+    app.config["SCOTCH_RATE_LIMIT"] = 1000
+    responses.add(responses.GET, "http://localhost/sleds/1", status=429, headers={"Retry-After": "1"})
+    responses.add(responses.GET, "http://localhost/sleds/1", json={"id": 1, "name": "Sled"})
+
+    class Sled(RemoteModel):
+        __remote_directory__ = "sleds"
+
+        name: str
+
+    with app.test_request_context():
+        started = time.monotonic()
+        assert Sled.api.get(1).name == "Sled"
+        # Sent again once the Retry-After delay elapsed
+        assert time.monotonic() - started >= 1
+        assert len(responses.calls) == 2
+        assert scotch.rate_limiter("localhost").stats()["throttled"] == 1
+
+
+def test_cancelled_calls(app, db, api_server):
+    app.config["SCOTCH_ADAPTIVE_CONCURRENCY"] = True
+    app.config["SCOTCH_MAX_CONCURRENCY"] = 2
+    api_server.collections["skis"] = {index: {"id": index, "name": f"Ski {index}"} for index in range(1, 5)}
+    api_server.latency = 0.3
+    scotch = FlaskScotch(app, api_server.url, db)
+
+    class Ski(RemoteModel):
+        __remote_directory__ = "skis"
+
+        name: str
+
+    async def _scenario():
+        for index in range(1, 4):
+            try:
+                await asyncio.wait_for(Ski.aapi.get(index), 0.05)
+            except asyncio.TimeoutError:
+                pass
+        # The slots of the cancelled calls were given back
+        api_server.latency = 0
+        ski = await asyncio.wait_for(Ski.aapi.get(4), 2)
+        await scotch.async_session_pool.aclose()
+        return ski
+
+    with app.test_request_context():
+        assert asyncio.run(_scenario()).name == "Ski 4"
+    assert scotch.rate_limiter(api_server.url.split("//")[1]).stats()["in_flight"] == 0
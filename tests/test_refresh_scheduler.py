@@ -0,0 +1,124 @@
+import time
+
+import responses
+
+from flask_scotch import FlaskScotch, RemoteModel
+
+
+@responses.activate
+def test_warm_up_and_refresh(app, db):
+    app.config["SCOTCH_WARMUP"] = "startup"
+    app.config["SCOTCH_CACHE_TTL"] = 60
+    app.config["SCOTCH_REFRESH_JITTER"] = 0.5
+    scotch = FlaskScotch(app, "http://localhost", db)
+
+    # Declared after init_app, like the models of most applications
+    class Country(RemoteModel):
+        __remote_directory__ = "countries"
+        __warmup__ = True
+        __refresh_interval__ = 0.05
+
+        name: str
+
+    collection = responses.add(responses.GET, "http://localhost/countries/", json=[{"id": 1, "name": "France"}])
+    try:
+        # Loaded before the first request is handled, along with each entity
+        assert collection.call_count == 0
+        with app.test_request_context("/"):
+            app.preprocess_request()
+            assert collection.call_count == 1
+            assert Country.api.get(1).name == "France"
+            assert len(Country.api.all()) == 1
+        assert len(responses.calls) == 1
+
+        # Then refreshed in the background, although still cached
+        responses.replace(responses.GET, "http://localhost/countries/", json=[{"id": 1, "name": "Changed"}])
+        deadline = time.monotonic() + 2
+        while scotch.cache.get("http://localhost/countries/1")["name"] != "Changed" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with app.app_context():
+            assert Country.api.get(1).name == "Changed"
+    finally:
+        if scotch.refresh_scheduler is not None:
+            scotch.refresh_scheduler.stop()
+        # The models outlive the test, they must not be loaded by the other tests
+        Country.__warmup__ = False
+        Country.__refresh_interval__ = None
+
+
+@responses.activate
+def test_warm_up_on_first_request(app, db):
+    app.config["SCOTCH_WARMUP"] = "request"
+    scotch = FlaskScotch(app, "http://localhost", db)
+
+    class Continent(RemoteModel):
+        __remote_directory__ = "continents"
+        __refresh_interval__ = 60
+
+    responses.add(responses.GET, "http://localhost/continents/", json=[])
+    try:
+        assert scotch.refresh_scheduler is None
+        with app.test_request_context("/"):
+            app.preprocess_request()
+        assert scotch.refresh_scheduler is not None
+        assert scotch.warm_up() is scotch.refresh_scheduler
+        assert [model for _, _, model, _ in scotch.refresh_scheduler._queue] == [Continent]
+    finally:
+        if scotch.refresh_scheduler is not None:
+            scotch.refresh_scheduler.stop()
+        Continent.__refresh_interval__ = None
+
+
+@responses.activate
+def test_warm_up_models_declared_later(app, db):
+    scotch = FlaskScotch(app, "http://localhost", db)
+    # Nothing to load yet, which does not prevent a later warm up
+    scotch.warm_up()
+    assert scotch.refresh_scheduler is None
+
+    class Ocean(RemoteModel):
+        __remote_directory__ = "oceans"
+        __warmup__ = True
+
+    oceans = responses.add(responses.GET, "http://localhost/oceans/", json=[])
+    try:
+        scotch.warm_up()
+        assert oceans.call_count == 1
+        assert scotch.refresh_scheduler is not None
+    finally:
+        if scotch.refresh_scheduler is not None:
+            scotch.refresh_scheduler.stop()
+        Ocean.__warmup__ = False
+
+
+def test_no_warm_up_by_default(app, scotch):
+    with app.test_request_context("/"):
+        app.preprocess_request()
+    assert scotch.refresh_scheduler is None
+
+
+@responses.activate
+def test_warm_up_app_models(app, db):
+    class Region(RemoteModel):
+        __remote_directory__ = "regions"
+        __warmup__ = True
+
+    class Province(RemoteModel):
+        __remote_directory__ = "provinces"
+        __warmup__ = True
+
+    # As if declared by the package of another app
+    Province.__module__ = "other_app.models"
+    regions = responses.add(responses.GET, "http://localhost/regions/", json=[])
+    provinces = responses.add(responses.GET, "http://localhost/provinces/", json=[])
+    try:
+        scotch = FlaskScotch(app, "http://localhost", db)
+        scotch.warm_up().stop()
+        assert (regions.call_count, provinces.call_count) == (1, 0)
+
+        app.config["SCOTCH_WARMUP_MODELS"] = [Province]
+        scotch = FlaskScotch(app, "http://localhost", db)
+        scotch.warm_up().stop()
+        assert (regions.call_count, provinces.call_count) == (1, 1)
+    finally:
+        Region.__warmup__ = Province.__warmup__ = False
@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+import json
+import re
+from urllib import parse
+
+import pytest
+import responses
+import sqlalchemy as sa
+from requests import HTTPError
+
+from flask_scotch import FlaskScotch, RemoteModel
+
+SHIPS = {
+    index: {"id": index, "name": f"Ship {index}", "tags": ["fast"], "updated_at": f"2026-01-0{index}T00:00:00"}
+    for index in range(1, 4)
+}
+
+
+def _collection(request):
+    query = dict(parse.parse_qsl(parse.urlparse(request.url).query))
+    if request.headers.get("If-None-Match") == '"v1"' and len(SHIPS) == 3:
+        return 304, {}, ""
+    ships = [ship for ship in SHIPS.values() if ship["updated_at"] > query.get("updated_since", "")]
+    return 200, {"ETag": '"v1"'}, json.dumps(ships)
+
+
+@responses.activate
+def test_mirror(app, db, scotch):
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/ships/(\?.*)?$"), callback=_collection)
+    responses.add_callback(
+        responses.GET,
+        re.compile(r"http://localhost/ships/\d+$"),
+        callback=lambda r: (200, {}, json.dumps(SHIPS[int(r.path_url.split("/")[-1])])),
+    )
+    responses.add(responses.PUT, "http://localhost/ships/1", json={"msg": "Success"})
+    responses.add(responses.PUT, "http://localhost/ships/2", status=400, json={"msg": "Invalid name"})
+
+    class Ship(RemoteModel):
+        __remote_directory__ = "ships"
+        __mirror__ = True
+        __mirror_updated_field__ = "updated_at"
+
+        name: str
+        tags: list[str]
+        updated_at: datetime.datetime
+
+    with app.test_request_context():
+        # Not synchronized yet: read from the remote API
+        assert Ship.api.get(1).name == "Ship 1"
+        assert len(responses.calls) == 1
+
+        assert Ship.api.sync() == 3
+        calls = len(responses.calls)
+        assert [ship.name for ship in Ship.api.all()] == ["Ship 1", "Ship 2", "Ship 3"]
+        assert Ship.api.get(2).tags == ["fast"]
+        assert len(responses.calls) == calls
+
+        # The mirror can be queried with SQL
+        table = Ship.api.mirror.table
+        with db.engine.connect() as connection:
+            assert connection.execute(sa.select(table.c.name).where(table.c.id == 3)).scalar() == "Ship 3"
+
+        # Incremental synchronization
+        SHIPS[4] = {"id": 4, "name": "Ship 4", "tags": [], "updated_at": "2026-01-04T00:00:00"}
+        SHIPS[2] = SHIPS[2] | {"name": "Changed", "updated_at": "2026-01-05T00:00:00"}
+        assert Ship.api.sync() == 2
+        assert "updated_since=2026-01-03T00%3A00%3A00" in responses.calls[-1].request.url
+        assert Ship.api.get(2).name == "Changed"
+
+        # Full synchronization removes the deleted entities
+        del SHIPS[4]
+        assert Ship.api.sync(full=True) == 3
+        assert [ship.id for ship in Ship.api.all()] == [1, 2, 3]
+
+        # Nothing downloaded while the ETag does not change
+        Ship.__mirror_updated_field__ = None
+        assert Ship.api.sync() == 0
+
+        # Writes go through to the mirror
+        ship = Ship.api.get(1)
+        ship.name = "Renamed"
+        ship.update()
+        assert Ship.api.get(1).name == "Renamed"
+
+        # Unless the remote API rejected them
+        ship = Ship.api.get(2)
+        ship.name = "Rejected"
+        with pytest.raises(HTTPError, match="400"):
+            ship.update()
+        assert Ship.api.get(2).name == "Changed"
+
+
+def test_async_mirror_writes(app, db, api_server):
+    api_server.collections["tankers"] = {index: {"id": index, "name": f"Tanker {index}"} for index in range(1, 4)}
+    FlaskScotch(app, api_server.url, db)
+
+    class Tanker(RemoteModel):
+        __remote_directory__ = "tankers"
+        __mirror__ = True
+
+        name: str
+
+    async def _scenario():
+        tanker = Tanker(id=1, name="Renamed")
+        await Tanker.aapi.update(tanker)
+        await Tanker.aapi.create(Tanker(id=4, name="New"))
+        await Tanker.aapi.delete(2)
+        await app.extensions["scotch"].async_session_pool.aclose()
+
+    with app.test_request_context():
+        Tanker.api.sync()
+        asyncio.run(_scenario())
+        # The async writes went through to the mirror, read without requesting the remote API
+        hits = len(api_server.hits)
+        assert [tanker.name for tanker in Tanker.api.all()] == ["Renamed", "Tanker 3", "New"]
+        assert len(api_server.hits) == hits
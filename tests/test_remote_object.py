@@ -1,10 +1,13 @@
+import time
+
 import pytest
 import responses
 import json
+from typing import Optional
 
-from requests import PreparedRequest
+from requests import HTTPError, PreparedRequest
 
-from flask_scotch import RemoteModel
+from flask_scotch import FlaskScotch, RemoteModel
 
 ITEMS = [
     {"id": 1, "name": "Car"},
@@ -78,3 +81,115 @@ def test_remote_object_operations(app, scotch):
         after = len(ITEMS)
         assert before + 1 == after
         assert ITEMS[-1]["name"] == "Mouse"
+
+
+def test_get_many(app, db, api_server):
+    api_server.collections["items"] = {index: {"id": index, "name": f"Item {index}"} for index in range(1, 9)}
+    api_server.latency = 0.2
+    FlaskScotch(app, api_server.url, db)
+
+    class Gadget(RemoteModel):
+        __remote_directory__ = "items"
+
+        name: str
+
+    with app.test_request_context():
+        start = time.perf_counter()
+        gadgets = Gadget.api.get_many([8, 1, 2, 3, 42, 4, 5, 6, 7, 1], max_workers=10)
+        elapsed = time.perf_counter() - start
+
+    # The 9 distinct ids are fetched concurrently
+    assert len(api_server.hits) == 9
+    assert elapsed < 9 * api_server.latency / 2
+
+    assert [gadget.id for gadget in gadgets if isinstance(gadget, Gadget)] == [8, 1, 2, 3, 4, 5, 6, 7, 1]
+    assert isinstance(gadgets[4], HTTPError) and gadgets[4].response.status_code == 404
+
+
+@responses.activate
+def test_remote_errors(app, scotch):
+    responses.add(responses.GET, "http://localhost/things/1", status=404, json={"msg": "Not found"})
+    responses.add(responses.GET, "http://localhost/things/2", status=500, json={"msg": "Error"})
+
+    class Thing(RemoteModel):
+        __remote_directory__ = "things"
+
+        name: Optional[str]
+
+    # The error bodies are never parsed as entities, even when they would be valid
+    with app.test_request_context():
+        with pytest.raises(HTTPError, match="404"):
+            Thing.api.get(1)
+        missing, failed = Thing.api.get_many([1, 2])
+    assert isinstance(missing, HTTPError) and missing.response.status_code == 404
+    assert isinstance(failed, HTTPError) and failed.response.status_code == 500
+
+
+@responses.activate
+def test_save_changed_fields(app, scotch):
+    sent = []
+
+    def _record(request: PreparedRequest):
+        sent.append((request.method, json.loads(request.body or "")))
+        return 200, {}, json.dumps({"msg": "Success"})
+
+    responses.add(responses.GET, "http://localhost/notes/1", json={"id": 1, "title": "Note", "text": "A" * 1000})
+    responses.add_callback(responses.PATCH, "http://localhost/notes/1", callback=_record)
+    responses.add_callback(responses.PUT, "http://localhost/notes/1", callback=_record)
+
+    class Note(RemoteModel):
+        __remote_directory__ = "notes"
+
+        title: str
+        text: str
+
+    class FullNote(Note):
+        __patch_updates__ = False
+
+    with app.test_request_context():
+        note = Note.api.get(1)
+        assert note.changed_fields == set()
+        assert note.save() is None
+
+        note.title = "Changed"
+        assert note.changed_fields == {"title"}
+        assert note.save() == {"msg": "Success"}
+        assert sent == [("PATCH", {"title": "Changed"})]
+
+        # Once saved, the entity is clean again
+        assert note.save() is None
+        assert len(sent) == 1
+
+        full_note = FullNote(id=1, title="Note", text="Text")
+        full_note.title = "Changed"
+        full_note.save()
+        assert sent[-1] == ("PUT", {"id": 1, "title": "Changed", "text": "Text"})
+
+
+@responses.activate
+def test_save_failure(app, scotch):
+    app.config["SCOTCH_IDENTITY_MAP"] = True
+    responses.add(responses.GET, "http://localhost/memos/1", json={"id": 1, "title": "Memo"})
+    responses.add(responses.PATCH, "http://localhost/memos/1", status=405, json={"msg": "Method not allowed"})
+    responses.add(responses.POST, "http://localhost/memos/", status=400, json={"msg": "Invalid title"})
+
+    class Memo(RemoteModel):
+        __remote_directory__ = "memos"
+
+        title: str
+
+    with app.test_request_context():
+        memo = Memo.api.get(1)
+        edited = Memo(id=1, title="Memo")
+        edited.title = "Changed"
+        with pytest.raises(HTTPError, match="405"):
+            edited.save()
+        # The edits are kept, and the rejected entity does not replace the loaded one
+        assert edited.changed_fields == {"title"}
+        assert Memo.api.get(1) is memo
+
+        new = Memo(title="Memo")
+        new.title = "New"
+        with pytest.raises(HTTPError, match="400"):
+            Memo.api.create(new)
+        assert new.changed_fields == {"title"}
@@ -0,0 +1,144 @@
+import json
+import re
+
+import pytest
+import responses
+from requests import HTTPError
+
+from flask_scotch import RemoteModel, RemoteQuery, QueryStyle
+
+CARS = [
+    {"id": index, "name": f"Car {index}", "color": "red" if index % 2 else "blue", "price": index * 10}
+    for index in range(1, 21)
+]
+
+
+def _list_cars(request):
+    params = dict(request.params)
+    cars = [car for car in CARS if params.get("color", car["color"]) == car["color"]]
+    if "price__lte" in params:
+        cars = [car for car in cars if car["price"] <= int(params["price__lte"])]
+    if "ordering" in params:
+        field = params["ordering"].lstrip("-")
+        cars = sorted(cars, key=lambda car: car[field], reverse=params["ordering"].startswith("-"))
+    total = len(cars)
+    offset = int(params.get("offset", 0))
+    cars = cars[offset:][: int(params.get("limit", len(cars)))]
+    if "fields" in params:
+        cars = [{field: car[field] for field in params["fields"].split(",")} for car in cars]
+    return 200, {"X-Total-Count": str(total)}, json.dumps(cars)
+
+
+@responses.activate
+def test_remote_query(app, scotch):
+    responses.add_callback(responses.GET, re.compile(r"http://localhost/cars/(\?.*)?$"), callback=_list_cars)
+
+    class Car(RemoteModel):
+        __remote_directory__ = "cars"
+
+        name: str
+        color: str
+        price: int
+
+    with app.app_context():
+        query = Car.api.filter(color="red", price__lte=100).order_by("-price")
+        assert isinstance(query, RemoteQuery)
+
+        # Lazily evaluated
+        assert len(responses.calls) == 0
+
+        cars = list(query.limit(3))
+        assert [car.id for car in cars] == [9, 7, 5]
+        assert responses.calls[-1].request.params == {
+            "color": "red",
+            "price__lte": "100",
+            "ordering": "-price",
+            "limit": "3",
+        }
+
+        # The results are kept
+        limited = query.limit(2).offset(1)
+        assert [car.id for car in limited] == [7, 5]
+        assert [car.id for car in limited] == [7, 5]
+        assert len(responses.calls) == 2
+
+        assert query.first().id == 9
+        assert Car.api.filter(color="green").first() is None
+
+        # Only the total, sent in a header, is requested
+        assert query.count() == 5
+        assert responses.calls[-1].request.params["limit"] == "1"
+        assert query.offset(4).count() == 1
+
+        names = query.only("name").all()
+        assert [(car.id, car.name) for car in names] == [
+            (9, "Car 9"),
+            (7, "Car 7"),
+            (5, "Car 5"),
+            (3, "Car 3"),
+            (1, "Car 1"),
+        ]
+        assert not hasattr(names[0], "price")
+        assert responses.calls[-1].request.params["fields"] == "id,name"
+
+
+def test_query_style(app, scotch):
+    class Truck(RemoteModel):
+        __remote_directory__ = "trucks"
+        __query_style__ = QueryStyle(
+            filter_format="filter[{field}]",
+            operator_format="filter[{field}][{operator}]",
+            operators={"lte": "max"},
+            fields_param=None,
+            order_param="sort",
+            limit_param="page[size]",
+        )
+
+        name: str
+
+    with app.app_context():
+        query = Truck.api.filter(name="Big", weight__lte=3, tags=["a", "b"], used=False).order_by("-id", "name")
+        assert query.params() == {
+            "filter[name]": "Big",
+            "filter[weight][max]": "3",
+            "filter[tags]": "a,b",
+            "filter[used]": "false",
+            "sort": "-id,name",
+        }
+        assert query.limit(5).url() == (
+            "http://localhost/trucks/?filter%5Bname%5D=Big&filter%5Bweight%5D%5Bmax%5D=3&filter%5Btags%5D=a%2Cb"
+            "&filter%5Bused%5D=false&sort=-id%2Cname&page%5Bsize%5D=5"
+        )
+
+        with pytest.raises(ValueError):
+            query.only("name")
+
+
+@responses.activate
+def test_query_errors_and_unlimited_style(app, scotch):
+    responses.add(
+        responses.GET, "http://localhost/vans/", json=[{"id": 1, "name": "Van 1"}, {"id": 2, "name": "Van 2"}]
+    )
+    responses.add(
+        responses.GET, "http://localhost/buses/", status=500, json={"msg": "Failed"}, headers={"X-Total-Count": "9"}
+    )
+
+    class Van(RemoteModel):
+        __remote_directory__ = "vans"
+        __query_style__ = QueryStyle(limit_param=None)
+
+        name: str
+
+    class Bus(RemoteModel):
+        __remote_directory__ = "buses"
+
+        name: str
+
+    with app.app_context():
+        # Without limits, the first entity is taken from the whole result
+        assert Van.api.query().first().id == 1
+        assert "limit" not in responses.calls[-1].request.url
+
+        # The count sent with an error is not trusted
+        with pytest.raises(HTTPError, match="500"):
+            Bus.api.query().count()
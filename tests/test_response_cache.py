@@ -0,0 +1,224 @@
+import json
+import os
+import time
+
+import responses
+
+from flask_scotch import FlaskScotch, MetricsSink, RemoteModel, ResponseCache, SqliteCache
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "expirations": 0,
+        "invalidations": 0,
+        "entries": 2,
+        "bytes": 0,
+    }
+
+
+def test_byte_budget():
+    cache = ResponseCache(max_entries=None, max_bytes=10)
+    cache.set("a", "a", ttl=60, size=4)
+    cache.set("b", "b", ttl=60, size=4)
+    cache.set("c", "c", ttl=60, size=4)
+    cache.set("too big", "d", ttl=60, size=11)
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("too big") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_ttl_and_tags():
+    cache = ResponseCache()
+    cache.set("short", 1, ttl=0.01)
+    cache.set("first", 1, ttl=60, tags=("cars",))
+    cache.set("second", 2, ttl=60, tags=("cars", "red"))
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.invalidate_tag("red")
+    assert cache.get("first") == 1
+    assert cache.get("second") is None
+
+
+@responses.activate
+def test_accessor_cache(app, scotch):
+    car = {"id": 1, "name": "Car"}
+    responses.add_callback(responses.GET, "http://localhost/vehicles/1", callback=lambda r: (200, {}, json.dumps(car)))
+    responses.add(responses.GET, "http://localhost/vehicles/", json=[car])
+    responses.add(responses.PUT, "http://localhost/vehicles/1", json={"msg": "Success"})
+
+    class Vehicle(RemoteModel):
+        __remote_directory__ = "vehicles"
+        __cache_ttl__ = 60
+
+        name: str
+
+    with app.test_request_context():
+        assert Vehicle.api.get(1).name == "Car"
+        assert Vehicle.api.get(1).name == "Car"
+        assert len(Vehicle.api.all()) == 1
+        assert len(Vehicle.api.all()) == 1
+        assert len(responses.calls) == 2
+        assert scotch.cache.stats()["hits"] == 2
+
+        # A modification invalidates the entity and the collections
+        car["name"] = "Changed"
+        Vehicle.api.update(Vehicle(**car))
+        assert Vehicle.api.get(1).name == "Changed"
+        Vehicle.api.all()
+        assert len(responses.calls) == 5
+
+
+@responses.activate
+def test_cache_disabled_by_default(app, scotch):
+    responses.add(responses.GET, "http://localhost/bicycles/1", json={"id": 1})
+
+    class Bicycle(RemoteModel):
+        __remote_directory__ = "bicycles"
+
+    with app.test_request_context():
+        Bicycle.api.get(1)
+        Bicycle.api.get(1)
+        assert len(responses.calls) == 2
+        assert len(scotch.cache) == 0
+
+
+def test_conditional_revalidation(app, db, api_server):
+    api_server.collections["products"] = {index: {"id": index, "name": f"Product {index}"} for index in range(1, 51)}
+    api_server.compress = True
+    scotch = FlaskScotch(app, api_server.url, db)
+    calls = []
+
+    class _RecordingSink(MetricsSink):
+        def record(self, call):
+            calls.append(call)
+
+    scotch.instrumentation.add_sink(_RecordingSink())
+
+    class Product(RemoteModel):
+        __remote_directory__ = "products"
+        __cache_ttl__ = 0.05
+
+        name: str
+
+    with app.app_context():
+        assert len(Product.api.all()) == 50
+        time.sleep(0.1)
+        assert len(Product.api.all()) == 50
+
+        api_server.collections["products"][1]["name"] = "Changed"
+        time.sleep(0.1)
+        assert Product.api.all()[0].name == "Changed"
+
+    first, revalidation, changed = calls
+    (_, _, first_headers, _), (_, _, revalidation_headers, _), _ = api_server.received
+
+    # The responses are compressed
+    assert "gzip" in first_headers["Accept-Encoding"]
+    assert first.response_bytes < len(json.dumps(list(api_server.collections["products"].values())))
+
+    # Once expired, the cached collection is revalidated with its ETag, and reused when it did not change
+    assert revalidation_headers["If-None-Match"]
+    assert (revalidation.status, revalidation.cache, revalidation.response_bytes) == (304, "revalidated", 0)
+    assert (changed.status, changed.cache) == (200, "miss")
+    assert scotch.cache.stats()["entries"] == 1
+
+
+def test_request_compression(app, db, api_server):
+    api_server.collections["notes"] = {}
+    app.config["SCOTCH_COMPRESS_MIN_SIZE"] = 200
+    FlaskScotch(app, api_server.url, db)
+
+    class Memo(RemoteModel):
+        __remote_directory__ = "notes"
+
+        text: str
+
+    with app.app_context():
+        Memo.api.create(Memo(id=1, text="a" * 1000))
+        Memo.api.update(Memo(id=1, text="short"))
+
+    (_, _, created, created_body), (_, _, updated, updated_body) = api_server.received
+    assert created["Content-Encoding"] == "gzip"
+    assert created["Content-Type"] == "application/json"
+    assert len(created_body) < 200
+    assert "Content-Encoding" not in updated
+    assert json.loads(updated_body) == {"id": 1, "text": "short"}
+    assert api_server.collections["notes"][1] == {"id": 1, "text": "short"}
+
+
+def test_sqlite_cache_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    # Two instances on the same database, as in two workers
+    first, second = SqliteCache(path, max_entries=2), SqliteCache(path, max_entries=2)
+
+    first.set("cars", [{"id": 1, "name": "Car" * 500}], ttl=60, size=10, tags=("cars",))
+    assert second.get("cars") == [{"id": 1, "name": "Car" * 500}]
+    second.invalidate_tag("cars")
+    assert first.get("cars") is None
+
+    first.set("a", 1, ttl=60)
+    first.set("b", 2, ttl=0.01, validators=[("If-None-Match", '"b"')])
+    time.sleep(0.02)
+    assert second.get("a") == 1
+    assert second.get("b") is None
+    assert second.stale("b").validators == (("If-None-Match", '"b"'),)
+
+    # The least recently used entry is evicted
+    second.set("c", 3, ttl=60)
+    assert first.get("a") is None
+    assert first.stale("b").value == 2
+    assert first.get("c") == 3
+    assert second.stats()["evictions"] == 1
+    assert len(first) == 2
+
+
+def test_sqlite_cache_backend(app, db, tmp_path):
+    app.config["SCOTCH_CACHE_BACKEND"] = "sqlite"
+    app.config["SCOTCH_CACHE_PATH"] = str(tmp_path / "cache.sqlite")
+    app.config["SCOTCH_CACHE_TTL"] = 60
+    scotch = FlaskScotch(app, "http://localhost", db)
+    assert isinstance(scotch.cache, SqliteCache)
+
+    with responses.RequestsMock() as mock:
+        mock.add(responses.GET, "http://localhost/trams/1", json={"id": 1, "name": "Tram"})
+        mock.add(responses.PUT, "http://localhost/trams/1", json={"msg": "Success"})
+
+        class Tram(RemoteModel):
+            __remote_directory__ = "trams"
+
+            name: str
+
+        with app.test_request_context():
+            Tram.api.get(1)
+            # Another worker reads the response fetched by the first one
+            assert SqliteCache(app.config["SCOTCH_CACHE_PATH"]).get("http://localhost/trams/1")["name"] == "Tram"
+            assert Tram.api.get(1).name == "Tram"
+            Tram.api.update(Tram(id=1, name="Tram"))
+            assert SqliteCache(app.config["SCOTCH_CACHE_PATH"]).get("http://localhost/trams/1") is None
+        assert len(mock.calls) == 2
+
+
+def test_sqlite_cache_instance_path(app, db, tmp_path):
+    app.config["SCOTCH_CACHE_BACKEND"] = "sqlite"
+    app.instance_path = str(tmp_path / "instance")
+    scotch = FlaskScotch(app, "http://localhost", db)
+    # In the instance folder of the app, readable by its user only
+    assert scotch.cache.path == str(tmp_path / "instance" / "scotch-cache.sqlite")
+    assert os.stat(scotch.cache.path).st_mode & 0o077 == 0
@@ -0,0 +1,121 @@
+import datetime
+import json
+
+import pytest
+import responses
+
+from flask_scotch import FlaskScotch, RemoteModel, Serializer, OrjsonSerializer, get_serializer
+
+
+def test_serializers_encode_alike():
+    class Tag(RemoteModel):
+        __remote_directory__ = "tags"
+
+        label: str
+
+    class Parcel(RemoteModel):
+        __remote_directory__ = "parcels"
+
+        class Config:
+            json_encoders = {datetime.timedelta: lambda delta: delta.total_seconds()}
+
+        name: str
+        sent_at: datetime.datetime
+        delay: datetime.timedelta
+        tags: list[Tag]
+
+    parcel = Parcel(
+        id=1,
+        name="Parcel",
+        sent_at=datetime.datetime(2022, 1, 2, 3, 4, 5),
+        delay=datetime.timedelta(hours=1),
+        tags=[Tag(label="fragile")],
+    )
+
+    expected = json.loads(parcel.json())
+    assert expected["delay"] == 3600
+    for serializer in (Serializer(), get_serializer("orjson")):
+        assert json.loads(serializer.dump_model(parcel)) == expected
+        assert json.loads(serializer.dump_model(parcel, include={"name"})) == {"name": "Parcel"}
+        assert serializer.loads(b'{"id": 1}') == {"id": 1}
+
+    assert isinstance(get_serializer("orjson"), OrjsonSerializer)
+    assert isinstance(get_serializer(None), Serializer)
+    with pytest.raises(ValueError):
+        get_serializer("yaml")
+
+
+@responses.activate
+def test_orjson_backend(app, db):
+    app.config["SCOTCH_JSON_BACKEND"] = "orjson"
+    FlaskScotch(app, "http://localhost", db)
+
+    class Shipment(RemoteModel):
+        __remote_directory__ = "shipments"
+
+        name: str
+        sent_at: datetime.datetime
+
+    responses.add(
+        responses.GET,
+        "http://localhost/shipments/",
+        json=[{"id": 1, "name": "First", "sent_at": "2022-01-02T03:04:05"}],
+    )
+    responses.add(responses.POST, "http://localhost/shipments/", json={"msg": "Success"})
+
+    with app.app_context():
+        (first,) = Shipment.api.all()
+        assert first.sent_at == datetime.datetime(2022, 1, 2, 3, 4, 5)
+
+        Shipment.api.create(Shipment(name="Second", sent_at=datetime.datetime(2022, 2, 1)))
+
+    request = responses.calls[-1].request
+    assert request.headers["Content-Type"] == "application/json"
+    assert isinstance(request.body, bytes)
+    assert json.loads(request.body) == {"id": None, "name": "Second", "sent_at": "2022-02-01T00:00:00"}
+
+
+@responses.activate
+def test_trusted_responses(app, scotch):
+    class Courier(RemoteModel):
+        __remote_directory__ = "couriers"
+        __trust_responses__ = True
+
+        name: str
+        hired_at: datetime.date
+        rating: float = 5.0
+
+    responses.add(responses.GET, "http://localhost/couriers/1", json={"id": 1, "name": "Max", "hired_at": "2020-01-01"})
+
+    with app.app_context():
+        courier = Courier.api.get(1)
+
+    # Not validated: the values are kept as sent, the defaults are still set
+    assert courier.hired_at == "2020-01-01"
+    assert courier.rating == 5.0
+    assert courier.changed_fields == set()
+    courier.name = "Maxime"
+    assert courier.changed_fields == {"name"}
+
+
+@responses.activate
+def test_trusted_responses_do_not_share_the_cache(app, db):
+    app.config["SCOTCH_CACHE_TTL"] = 60
+    scotch = FlaskScotch(app, "http://localhost", db)
+
+    class Post(RemoteModel):
+        __remote_directory__ = "posts"
+        __trust_responses__ = True
+
+        tags: list[str]
+
+    responses.add(responses.GET, "http://localhost/posts/1", json={"id": 1, "tags": ["news"]})
+
+    with app.app_context():
+        post = Post.api.get(1)
+        post.tags.append("edited")
+
+        # Neither the cached response nor the next entities see the change
+        assert scotch.cache.get("http://localhost/posts/1") == {"id": 1, "tags": ["news"]}
+        assert Post.api.get(1).tags == ["news"]
+    assert len(responses.calls) == 1
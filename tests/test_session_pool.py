@@ -0,0 +1,68 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from flask_scotch import AsyncSessionPool, FlaskScotch, RemoteModel, SessionPool
+
+
+def test_config(app, db):
+    app.config["SCOTCH_POOL_MAXSIZE"] = 3
+    app.config["SCOTCH_CONNECT_TIMEOUT"] = 1.5
+    app.config["SCOTCH_READ_TIMEOUT"] = 2
+    scotch = FlaskScotch(app, "http://localhost", db)
+
+    assert isinstance(scotch.session_pool, SessionPool)
+    assert scotch.session_pool.adapter._pool_maxsize == 3
+    assert scotch.session_pool.timeout == (1.5, 2)
+
+
+def test_connections_are_reused(app, db, api_server):
+    api_server.collections["planets"] = {1: {"id": 1, "name": "Mercury"}, 2: {"id": 2, "name": "Venus"}}
+    scotch = FlaskScotch(app, api_server.url, db)
+
+    class Planet(RemoteModel):
+        __remote_directory__ = "planets"
+
+        name: str
+
+    with app.test_request_context():
+        for _ in range(5):
+            assert Planet.api.get(1).name == "Mercury"
+
+        stats = scotch.connection_stats()
+        assert stats["requests"] == 5
+        assert stats["connections"] == 1
+        assert stats["reused"] == 4
+
+
+def test_pool_shared_between_threads(api_server):
+    api_server.collections["planets"] = {1: {"id": 1, "name": "Mercury"}}
+    pool = SessionPool(pool_maxsize=4, timeout=5)
+
+    def _fetch(_):
+        return pool.request("get", f"{api_server.url}/planets/1").json()["name"]
+
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(_fetch, range(40))) == ["Mercury"] * 40
+
+    stats = pool.stats()
+    assert stats["requests"] == 40
+    assert stats["connections"] <= 4
+    pool.close()
+
+
+def test_async_client_closed_with_its_loop(api_server):
+    pool = AsyncSessionPool()
+    clients = []
+
+    async def _scenario():
+        response = await pool.request("get", f"{api_server.url}/moons/")
+        clients.append(pool.client)
+        await pool.request("get", f"{api_server.url}/moons/")
+        return response.status_code
+
+    # Once the loop of each run is shut down, its client (and its connections) are closed
+    assert asyncio.run(_scenario()) == 200
+    assert asyncio.run(_scenario()) == 200
+    first, second = clients
+    assert first is not second
+    assert first.is_closed and second.is_closed
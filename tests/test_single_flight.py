@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from flask_scotch import FlaskScotch, RemoteModel, SingleFlight
+
+
+def test_single_flight_shares_result_and_error():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def _slow(value):
+        def _call():
+            calls.append(value)
+            started.set()
+            time.sleep(0.1)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        return _call
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("key", _slow("first"))))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do("key", _slow("other")))) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert calls == ["first"]
+    assert results == ["first"] * 6
+    assert flights.coalesced == 5
+
+    # Once the call is done, the next one is made again
+    assert flights.do("key", lambda: "second") == "second"
+
+    error = ValueError("failed")
+    started.clear()
+    errors = []
+
+    def _failing():
+        try:
+            flights.do("error", _slow(error))
+        except ValueError as raised:
+            errors.append(raised)
+
+    threads = [threading.Thread(target=_failing) for _ in range(3)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [error] * 3
+
+
+def test_coalesced_gets(app, db, api_server):
+    api_server.collections["planets"] = {1: {"id": 1, "name": "Mercury"}}
+    api_server.latency = 0.2
+    FlaskScotch(app, api_server.url, db)
+
+    class Planet(RemoteModel):
+        __remote_directory__ = "planets"
+
+        name: str
+
+    class Comet(RemoteModel):
+        __remote_directory__ = "planets"
+        __coalesce_requests__ = False
+
+        name: str
+
+    with app.app_context():
+        accessors = [Planet.api, Comet.api]
+
+    def _get(accessor, planets):
+        planets.append(accessor.get(1))
+
+    for accessor in accessors:
+        planets = []
+        threads = [threading.Thread(target=_get, args=(accessor, planets)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [planet.name for planet in planets] == ["Mercury"] * 8
+
+    # The 8 requests of Planet were coalesced into one, those of Comet were all sent
+    assert len(api_server.hits) == 1 + 8
+
+    async def _scenario():
+        entities = await asyncio.gather(*(Planet.aapi.get(1) for _ in range(8)))
+        missing = await asyncio.gather(*(Planet.aapi.get(2) for _ in range(3)), return_exceptions=True)
+        await app.extensions["scotch"].async_session_pool.aclose()
+        return entities, missing
+
+    api_server.hits.clear()
+    with app.test_request_context():
+        entities, missing = asyncio.run(_scenario())
+
+    assert [entity.name for entity in entities] == ["Mercury"] * 8
+    assert len(missing) == 3 and all(isinstance(error, Exception) for error in missing)
+    assert len(api_server.hits) == 2
+
+
+def test_coalescing_disabled(app, db, api_server):
+    api_server.collections["asteroids"] = {1: {"id": 1, "name": "Ceres"}}
+    app.config["SCOTCH_COALESCE_REQUESTS"] = False
+    FlaskScotch(app, api_server.url, db)
+
+    class Asteroid(RemoteModel):
+        __remote_directory__ = "asteroids"
+
+        name: str
+
+    with app.app_context():
+        assert not Asteroid.api.coalesce_requests
+        with pytest.raises(TypeError):
+            Asteroid.api._request("head")
@@ -0,0 +1,96 @@
+import json
+import time
+
+import responses
+
+from flask_scotch import FlaskScotch, RemoteModel, sign_event
+
+
+def _post(app, events, secret="secret", timestamp=None):
+    body = json.dumps(events).encode()
+    headers = sign_event(body, secret, timestamp)
+    with app.test_request_context("/scotch/webhook", method="POST", data=body, headers=headers):
+        return app.full_dispatch_request()
+
+
+@responses.activate
+def test_webhook_invalidation(app, db, caplog):
+    app.config["SCOTCH_WEBHOOK_SECRET"] = "secret"
+    app.config["SCOTCH_CACHE_TTL"] = 3600
+    scotch = FlaskScotch(app, "http://localhost", db)
+    # The in-memory cache of the other workers is not invalidated
+    assert "SCOTCH_CACHE_BACKEND" in caplog.text
+    responses.add(responses.GET, "http://localhost/kayaks/1", json={"id": 1, "name": "Kayak"})
+    responses.add(responses.GET, "http://localhost/kayaks/2", json={"id": 2, "name": "Other"})
+    responses.add(responses.GET, "http://localhost/kayaks/", json=[{"id": 1, "name": "Kayak"}])
+
+    class Kayak(RemoteModel):
+        __remote_directory__ = "kayaks"
+
+        name: str
+
+    with app.app_context():
+        Kayak.api.get(1)
+        Kayak.api.get(2)
+        Kayak.api.all()
+    assert len(scotch.cache) == 3
+
+    # Unsigned, badly signed, or replayed events are rejected
+    assert _post(app, {"directory": "kayaks"}, secret="wrong").status_code == 401
+    assert _post(app, {"directory": "kayaks"}, timestamp=int(time.time()) - 3600).status_code == 401
+    with app.test_request_context("/scotch/webhook", method="POST", data=b"{}"):
+        assert app.full_dispatch_request().status_code == 401
+    assert _post(app, {"ids": [1]}).status_code == 400
+    assert _post(app, {"directory": "kayaks", "ids": [[1], {"id": 2}]}).status_code == 400
+    assert len(scotch.cache) == 3
+
+    # The changed entity and the collections are invalidated
+    response = _post(app, [{"directory": "kayaks", "ids": [1]}, {"directory": "canoes"}])
+    assert response.status_code == 200
+    assert response.get_json() == {"events": 2, "unknown": ["canoes"]}
+    assert scotch.cache.get("http://localhost/kayaks/2") is not None
+    assert len(scotch.cache) == 1
+
+    # As well as all the responses of the model when the whole collection changed
+    assert _post(app, {"directory": "kayaks"}).status_code == 200
+    assert len(scotch.cache) == 0
+
+    # Or fetched again in the background
+    app.config["SCOTCH_WEBHOOK_REFRESH"] = True
+    assert _post(app, {"directory": "kayaks", "ids": [2]}).status_code == 200
+    deadline = time.monotonic() + 2
+    while scotch.cache.get("http://localhost/kayaks/2") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scotch.cache.get("http://localhost/kayaks/2") == {"id": 2, "name": "Other"}
+
+
+def test_webhook_disabled_by_default(app, scotch):
+    assert "scotch_webhook" not in app.blueprints
+
+
+@responses.activate
+def test_webhook_mirror(app, db):
+    app.config["SCOTCH_WEBHOOK_SECRET"] = "secret"
+    scotch = FlaskScotch(app, "http://localhost", db)
+    responses.add(responses.GET, "http://localhost/rafts/", json=[{"id": 1, "name": "Raft"}, {"id": 2, "name": "Old"}])
+    responses.add(responses.GET, "http://localhost/rafts/2", json={"id": 2, "name": "New"})
+
+    class Raft(RemoteModel):
+        __remote_directory__ = "rafts"
+        __mirror__ = True
+
+        name: str
+
+    with app.app_context():
+        Raft.api.sync()
+
+    def _wait():
+        for future in list(scotch._background.values()):
+            future.result(timeout=2)
+
+    _post(app, {"directory": "rafts", "ids": [2]})
+    _wait()
+    _post(app, {"directory": "rafts", "ids": [1], "deleted": True})
+    _wait()
+    with app.app_context():
+        assert [raft.name for raft in Raft.api.all()] == ["New"]